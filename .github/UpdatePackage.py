@@ -1,9 +1,10 @@
-import requests
 import os
 import time
 import json
 import base64
+import hashlib
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
 
@@ -12,9 +13,21 @@ print(project_root)
 sys.path.append(project_root.as_posix())
 
 from webFunc import *
+from webFunc.DeltaPackage import build_delta
+from webFunc.HttpClient import get_session
+from webFunc.SegmentedDownload import hash_file
 
 ADDRESS = "FaustLauncher"
 API_URL = "https://api.txttool.cn/netcut/note"
+LLC_REPO = ("LocalizeLimbusCompany", "LocalizeLimbusCompany")
+# 为之前几个版本生成增量包
+MAX_DELTA_BASES = 2
+# 增量包超过完整压缩包的这个比例时不发布，客户端直接下载完整的压缩包
+MAX_DELTA_RATIO = 0.5
+CHUNK_SIZE = 1024 * 1024
+# 网盘链接的有效期，超过后重新上传
+MIRROR_TTL = timedelta(days=2, hours=12)
+EPOCH = '1970-01-01T00:00:00'
 
 
 def make_device():
@@ -73,7 +86,7 @@ def get_ourplay():
     print("正在请求 OurPlay 汉化包信息")
     
     try:
-        r = requests.post(url, headers=headers, data=data_json, timeout=10)
+        r = get_session().post(url, headers=headers, data=data_json, timeout=10)
         r.raise_for_status()
         response_data = r.json()
         
@@ -96,12 +109,234 @@ def get_llc():
             False,
             ignore_ssl=True
         )
-        last_ver = GithubDownloader.get_latest_release("LocalizeLimbusCompany", "LocalizeLimbusCompany")
+        last_ver = GithubDownloader.get_latest_release(*LLC_REPO)
         return last_ver.tag_name, last_ver # type: ignore
 
     except Exception as e:
         print(f"获取 LLC 版本失败: {e}")
+        return None, None
+
+class AssetReader:
+    """从网络响应中按块读取数据，同时计算 SHA-256，需要时同时保存到文件"""
+
+    def __init__(self, raw, save_path=None):
+        self.raw = raw
+        self.hasher = hashlib.sha256()
+        self.sink = open(save_path, "wb") if save_path else None
+
+    def read(self, n=CHUNK_SIZE):
+        data = self.raw.read(n)
+        self.hasher.update(data)
+        if self.sink:
+            self.sink.write(data)
+        return data
+
+    def close(self):
+        if self.sink:
+            self.sink.close()
+
+def make_progress_logger(name):
+    """每上传 10% 输出一次进度"""
+    state = {'step': 0}
+    def log(sent, total):
+        step = sent * 10 // total if total else 0
+        if step > state['step']:
+            state['step'] = step
+            print(f"{name}: 已上传 {step * 10}% ({sent}/{total} bytes)")
+    return log
+
+def mirror_asset(file_transfer, asset, save_path=None):
+    """
+    把 GitHub Release 中的文件边下载边上传到网盘，不写入临时文件
+
+    Args:
+        file_transfer: 上传使用的 UpFileClient
+        asset: ReleaseAsset
+        save_path: 不为空时同时保存到这个文件（生成增量包需要）
+
+    Returns:
+        (上传结果, SHA-256)
+    """
+    with get_session().get(asset.download_url, verify=False, stream=True) as r: # 关闭SSL验证
+        r.raise_for_status()
+        r.raw.decode_content = True
+        size = int(r.headers.get('Content-Length') or asset.size)
+        reader = AssetReader(r.raw, save_path)
+        try:
+            result = file_transfer.upload_stream(reader, asset.name, size,
+                                                 progress_callback=make_progress_logger(asset.name))
+        finally:
+            reader.close()
+    return result, reader.hasher.hexdigest()
+
+def save_asset(asset, save_path):
+    """下载 GitHub Release 中的文件（不上传），返回 SHA-256"""
+    with get_session().get(asset.download_url, verify=False, stream=True) as r: # 关闭SSL验证
+        r.raise_for_status()
+        r.raw.decode_content = True
+        reader = AssetReader(r.raw, save_path)
+        try:
+            while reader.read():
+                pass
+        finally:
+            reader.close()
+    return reader.hasher.hexdigest()
+
+def parse_time(value):
+    """解析 ISO 格式的时间，无法解析时返回 1970-01-01"""
+    try:
+        return datetime.fromisoformat(value or EPOCH)
+    except (ValueError, TypeError):
+        return datetime.fromisoformat(EPOCH)
+
+def mirror_entry(upload_result, sha256, **extra):
+    """镜像配置中的一个文件：下载地址、摘要、网盘文件ID和上传时间"""
+    return {'direct': upload_result.get('direct_download_url'),
+            'web': upload_result.get('download_url'),
+            'sha256': sha256,
+            'file_id': upload_result.get('file_id'),
+            'uploaded_at': datetime.now().isoformat(),
+            **extra}
+
+def link_fresh(entry, sha256=''):
+    """
+    已上传的文件是否可以继续使用：摘要一致、链接没有快要过期，并且网盘上的文件还在
+    """
+    if not entry or not entry.get('direct'):
+        return False
+    if sha256 and entry.get('sha256') != sha256:
+        return False
+    if datetime.now() - parse_time(entry.get('uploaded_at')) >= MIRROR_TTL:
+        return False
+    if entry.get('file_id'):
+        try:
+            UpFileClient().get_file_info(entry['file_id'])
+        except Exception as e:
+            print(f"网盘文件 {entry['file_id']} 已失效: {e}")
+            return False
+    return True
+
+def publish_asset(asset, entry, save_path=None):
+    """
+    发布一个文件到网盘：GitHub 提供的摘要与已上传的文件一致且链接没有过期时不重新上传
+
+    Args:
+        asset: ReleaseAsset
+        entry: 镜像配置中已有的条目
+        save_path: 不为空时同时保存到这个文件（生成增量包需要）
+
+    Returns:
+        新的镜像条目
+
+    Raises:
+        ValueError: 摘要不一致或上传失败
+        requests.exceptions.RequestException: 下载失败
+    """
+    if asset.sha256 and link_fresh(entry, asset.sha256):
+        print(f"{asset.name} 与已上传的文件相同，跳过上传")
+        if save_path and save_asset(asset, save_path) != asset.sha256:
+            raise ValueError(f"{asset.name} 的SHA-256与GitHub提供的不一致")
+        return entry
+
+    result, sha256 = mirror_asset(UpFileClient(), asset, save_path)
+    if asset.sha256 and asset.sha256 != sha256:
+        raise ValueError(f"{asset.name} 的SHA-256与GitHub提供的不一致")
+    if not result.get('success'):
+        raise ValueError(f"{asset.name} 上传失败: {result.get('error')}")
+    return mirror_entry(result, sha256)
+
+def build_llc_delta(new_zip_path, new_version, base_version):
+    """
+    为一个之前的版本生成并上传增量包
+
+    Returns:
+        镜像条目（额外记录 'to' 和 'size'），增量包过大或失败时返回 None
+    """
+    base_zip_path = f"LLC_{base_version}.zip"
+    delta_path = f"LLC_delta_{base_version}_{new_version}.zip"
+    try:
+        release = GitHubReleaseFetcher(False, ignore_ssl=True).get_release_by_tag(*LLC_REPO, base_version)
+        assets = release.get_assets_by_extension(".zip") if release else []
+        if not assets:
+            print(f"未找到 {base_version} 的 zip 压缩包，跳过增量包")
+            return None
+        save_asset(assets[0], base_zip_path)
+
+        stats = build_delta(base_zip_path, new_zip_path, delta_path, base_version, new_version)
+        print(f"增量包 {base_version} -> {new_version}: 更新 {stats['files']} 个文件，"
+              f"删除 {stats['removed']} 个文件，大小 {stats['size'] / 1024:.1f}KB")
+        if stats['size'] > os.path.getsize(new_zip_path) * MAX_DELTA_RATIO:
+            print("增量包过大，不发布")
+            return None
+
+        delta_sha256 = hash_file(delta_path).hexdigest()
+        upload_result = UpFileClient().upload(delta_path)
+        if not upload_result.get('success'):
+            print(f"增量包 {base_version} 上传失败")
+            return None
+        return mirror_entry(upload_result, delta_sha256, to=new_version, size=stats['size'])
+    except Exception as e:
+        print(f"生成 {base_version} 的增量包失败: {e}")
         return None
+    finally:
+        for path in (base_zip_path, delta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+def publish_llc(current_data, last_ver, new_llc_version, current_llc_version):
+    """
+    发布 LLC 汉化包的镜像：zip、7z 和增量包同时传输，只重新上传内容有变化或链接快要过期的文件
+
+    Returns:
+        是否成功，成功时更新 current_data 中的镜像配置
+    """
+    seven_zip_asset = last_ver.get_assets_by_extension(".7z")[0]
+    zip_asset = last_ver.get_assets_by_extension(".zip")[0]
+    old_mirror = current_data.get('llc_download_mirror') or {}
+    old_deltas = current_data.get('llc_delta') or {}
+
+    # 最近的版本号（最新的在前），为之前的版本生成增量包，已发布且没有过期的增量包保留
+    version_history = current_data.get('llc_version_history') or ([current_llc_version] if current_llc_version else [])
+    version_history = [new_llc_version] + [v for v in version_history if v != new_llc_version]
+    version_history = version_history[:MAX_DELTA_BASES + 1]
+    llc_delta = {}
+    pending_bases = []
+    for base_version in version_history[1:]:
+        entry = old_deltas.get(base_version)
+        if entry and entry.get('to') == new_llc_version and link_fresh(entry):
+            llc_delta[base_version] = entry
+        else:
+            pending_bases.append(base_version)
+
+    # 7z 和 zip 同时传输；需要生成增量包时 zip 同时保存到本地，传输完成后同时生成各个增量包
+    with ThreadPoolExecutor(max_workers=2 + len(pending_bases)) as executor:
+        seven_future = executor.submit(publish_asset, seven_zip_asset, old_mirror.get('seven'))
+        try:
+            zip_entry = publish_asset(zip_asset, old_mirror.get('zip'),
+                                      zip_asset.name if pending_bases else None)
+            delta_futures = {base_version: executor.submit(build_llc_delta, zip_asset.name, new_llc_version, base_version)
+                             for base_version in pending_bases}
+            seven_entry = seven_future.result()
+        except Exception as e:
+            print(f"LLC镜像发布失败: {e}，取消更新")
+            return False
+        for base_version, future in delta_futures.items():
+            entry = future.result()
+            if entry:
+                llc_delta[base_version] = entry
+    if pending_bases and os.path.exists(zip_asset.name):
+        os.remove(zip_asset.name)
+
+    current_data['llc_download_url'] = {'zip': zip_asset.download_url,
+                                        'seven': seven_zip_asset.download_url}
+    current_data['llc_download_mirror'] = {'zip': zip_entry, 'seven': seven_entry}
+    current_data['llc_delta'] = llc_delta
+    current_data['llc_version_history'] = version_history
+    # 下次在最早上传的文件快要过期时检查镜像
+    current_data['llc_mirror_update_time'] = min(
+        parse_time(entry.get('uploaded_at')) for entry in [zip_entry, seven_entry, *llc_delta.values()]
+    ).isoformat()
+    return True
 
 def get_current_week_boundary():
     """
@@ -217,29 +452,33 @@ def main():
         print("OurPlay和LLC本周已有更新，且不在中午12点，镜像不需要更新，跳过检查")
         return
     
-    # 获取最新版本
-    new_ourplay_version = None
-    new_llc_version = None
-    
-    if should_check_ourplay_flag:
-        print("检查OurPlay更新...")
-        new_ourplay_version, download_url = get_ourplay()
-        if new_ourplay_version is None:
-            print("获取OurPlay版本失败，使用当前版本")
+    # 同时检查OurPlay和LLC的最新版本
+    last_ver = None
+    download_url = None
+    check_llc = should_check_llc_flag or should_check_llc_mirror_flag
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        ourplay_future = executor.submit(get_ourplay) if should_check_ourplay_flag else None
+        llc_future = executor.submit(get_llc) if check_llc else None
+
+        if ourplay_future:
+            print("检查OurPlay更新...")
+            new_ourplay_version, download_url = ourplay_future.result()
+            if new_ourplay_version is None:
+                print("获取OurPlay版本失败，使用当前版本")
+                new_ourplay_version = current_ourplay_version
+        else:
+            print("跳过OurPlay检查")
             new_ourplay_version = current_ourplay_version
-    else:
-        print("跳过OurPlay检查")
-        new_ourplay_version = current_ourplay_version
-    
-    if should_check_llc_flag or should_check_llc_mirror_flag:
-        print("检查LLC更新...")
-        new_llc_version, last_ver = get_llc() # type: ignore
-        if new_llc_version is None:
-            print("获取LLC版本失败，使用当前版本")
+
+        if llc_future:
+            print("检查LLC更新...")
+            new_llc_version, last_ver = llc_future.result()
+            if new_llc_version is None:
+                print("获取LLC版本失败，使用当前版本")
+                new_llc_version = current_llc_version
+        else:
+            print("跳过LLC检查")
             new_llc_version = current_llc_version
-    else:
-        print("跳过LLC检查")
-        new_llc_version = current_llc_version
     
     if new_ourplay_version is None and new_llc_version is None:
         print("获取版本信息失败，退出")
@@ -253,41 +492,13 @@ def main():
         print("版本无变化")
         return
     
-    if need_update_llc or should_check_llc_mirror_flag:
+    if (need_update_llc or should_check_llc_mirror_flag) and last_ver is not None:
         if need_update_llc:print(f"LLC版本更新: {current_llc_version} -> {new_llc_version}")
 
-        seven_zip_asset = last_ver.get_assets_by_extension(".7z")[0] # type: ignore
-        zip_asset = last_ver.get_assets_by_extension(".zip")[0] # type: ignore
-        new_llc_download_url = {'zip':zip_asset.download_url, 
-                                'seven':seven_zip_asset.download_url}
-        
-        with open(zip_asset.name, "wb") as f:
-            r = requests.get(zip_asset.download_url, verify=False) # 关闭SSL验证
-            f.write(r.content)
-            
-        with open(seven_zip_asset.name, "wb") as f:
-            r = requests.get(seven_zip_asset.download_url, verify=False) # 关闭SSL验证
-            f.write(r.content)
-        
-        file_transfer = UpFileClient()
-        llc_upload_result = file_transfer.upload(zip_asset.name)
-        llc_seven_upload_result = file_transfer.upload(seven_zip_asset.name)
-        
-        if not llc_upload_result.get('success') or not llc_seven_upload_result.get('success'):
-            print("LLC文件上传失败，取消更新")
+        if not publish_llc(current_data, last_ver, new_llc_version, current_llc_version):
             return
-        
-        new_llc_mirror = {
-            'zip': {'direct': llc_upload_result.get('direct_download_url'),
-                    'web': llc_upload_result.get('download_url')},
-            'seven': {'direct': llc_seven_upload_result.get('direct_download_url'),
-                      'web': llc_seven_upload_result.get('download_url')}
-        }
-        current_data['llc_download_url'] = new_llc_download_url
-        current_data['llc_download_mirror'] = new_llc_mirror
         current_data['llc_version'] = new_llc_version
         if need_update_llc:current_data['llc_last_update_time'] = datetime.now().isoformat()
-        current_data['llc_mirror_update_time'] = datetime.now().isoformat()
         
     if need_update_ourplay:
         print(f"OurPlay版本更新: {current_ourplay_version} -> {new_ourplay_version}")
@@ -0,0 +1,137 @@
+"""
+解压后端测速脚本
+
+生成一个与零协会汉化包规模相近的压缩包（大量 JSON 文件），用每个可用的解压后端解压并计时，
+结果保存到 workshop/extract_bench.json，之后 extract_archive 会优先使用最快的后端。
+
+用法：
+    python bench_extract.py [--files 2000] [--size-kb 30] [--repeat 3] [--no-save]
+"""
+
+import os
+import json
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import tempfile
+import subprocess
+from functions.dowloads.extract_backends import (
+    EXTRACTORS, BENCH_RESULTS_PATH, SevenZipExtractor, py7zr, load_bench_results
+)
+
+LANG_DIR = 'LimbusCompany_Data/Lang/LLC_zh-CN'
+WORDS = ['罪人', '镜像', '迷宫', '人格', '技能', '被动', '伤害', '混乱', '理智', '烧伤', '流血', '震颤',
+         'Faust', 'Yi Sang', 'Don Quixote', 'Heathcliff', 'Ishmael', 'Outis', 'Gregor', 'Sinclair']
+
+
+def make_json(size: int, rng: random.Random) -> bytes:
+    """生成一个接近指定大小的汉化 JSON 文件"""
+    entries = []
+    length = 0
+    while length < size:
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 40)))
+        entry = {'id': len(entries), 'title': rng.choice(WORDS), 'desc': text}
+        entries.append(entry)
+        length += len(json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+    return json.dumps({'dataList': entries}, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def make_source_tree(root: str, files: int, size_kb: int):
+    """生成汉化文件目录"""
+    rng = random.Random(0)
+    for i in range(files):
+        folder = os.path.join(root, LANG_DIR, rng.choice(['', 'StoryData', 'BattleAnnouncer', 'Skills']))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f'KR_{i:05d}.json'), 'wb') as f:
+            f.write(make_json(rng.randint(size_kb // 2, size_kb * 3 // 2) * 1024, rng))
+
+
+def make_archives(source: str, output_dir: str) -> dict:
+    """生成 zip 和 7z 压缩包，返回 {格式: 路径}"""
+    archives = {}
+
+    zip_path = os.path.join(output_dir, 'bench.zip')
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+        for folder, _, names in os.walk(source):
+            for name in names:
+                path = os.path.join(folder, name)
+                zip_ref.write(path, os.path.relpath(path, source))
+    archives['zip'] = zip_path
+
+    seven_path = os.path.join(output_dir, 'bench.7z')
+    seven_zip = SevenZipExtractor()
+    if seven_zip.is_available():
+        subprocess.run([seven_zip.executable, 'a', seven_path, os.path.join(source, '*')], # type: ignore
+                       capture_output=True, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+    elif py7zr is not None:
+        with py7zr.SevenZipFile(seven_path, 'w') as archive:
+            archive.writeall(os.path.join(source, 'LimbusCompany_Data'), 'LimbusCompany_Data')
+    if os.path.exists(seven_path):
+        archives['7z'] = seven_path
+    else:
+        print("没有可以创建 7z 压缩包的工具，跳过 7z 测试")
+    return archives
+
+
+def bench(archives: dict, work_dir: str, repeat: int) -> dict:
+    """用每个后端解压每种格式，返回 {格式: {后端: 最短用时}}"""
+    results = {}
+    for archive_format, archive_path in archives.items():
+        size = os.path.getsize(archive_path) / 1024 / 1024
+        print(f"\n{archive_format} 压缩包: {size:.1f}MB")
+        for extractor in EXTRACTORS:
+            if archive_format not in extractor.formats or not extractor.is_available():
+                continue
+            timings = []
+            for _ in range(repeat):
+                target = os.path.join(work_dir, f'out_{extractor.name}')
+                shutil.rmtree(target, ignore_errors=True)
+                count = [0]
+                start = time.perf_counter()
+                ok = extractor.extract(archive_path, target,
+                                       progress_callback=lambda done, total, name: count.__setitem__(0, done))
+                elapsed = time.perf_counter() - start
+                shutil.rmtree(target, ignore_errors=True)
+                if not ok:
+                    break
+                timings.append(elapsed)
+            if timings:
+                best = min(timings)
+                results.setdefault(archive_format, {})[extractor.name] = best
+                print(f"  {extractor.name:<12} {best * 1000:>9.1f} ms  ({count[0]} 个文件)")
+            else:
+                print(f"  {extractor.name:<12}      失败")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='解压后端测速')
+    parser.add_argument('--files', type=int, default=2000, help='JSON 文件数量')
+    parser.add_argument('--size-kb', type=int, default=30, help='每个文件的平均大小（KB）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个后端重复次数，取最短用时')
+    parser.add_argument('--no-save', action='store_true', help='不保存测速结果')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_extract_')
+    try:
+        source = os.path.join(work_dir, 'source')
+        print(f"生成 {args.files} 个 JSON 文件...")
+        make_source_tree(source, args.files, args.size_kb)
+        archives = make_archives(source, work_dir)
+        results = bench(archives, work_dir, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if not args.no_save and results:
+        saved = load_bench_results()
+        saved.update(results)
+        os.makedirs(os.path.dirname(BENCH_RESULTS_PATH), exist_ok=True)
+        with open(BENCH_RESULTS_PATH, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, ensure_ascii=False, indent=2)
+        print(f"\n测速结果已保存到 {BENCH_RESULTS_PATH}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+"""
+这个模块负责缓存处理完成的汉化包。
+
+启动时把所有会影响处理结果的输入（汉化版本、workshop/LLC_zh-CN 的文件、changes.json、
+美化相关设置和 Font 文件夹）计算成一个构建键。
+构建键相同时直接使用缓存目录中的汉化包，只重新执行结果随机、不能缓存的处理步骤（私活Tip）。
+
+函数：
+    - `compute_build_key()`: 计算当前输入对应的构建键。
+    - `apply_uncached_transforms(lang_dir)`: 对缓存的汉化包执行不能缓存的处理步骤。
+    - `get_or_build(source_dir)`: 返回可以直接部署的汉化包目录。
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Set
+from functions.settings_manager import get_settings_manager
+from functions.launch_trace import trace_span
+
+BUILD_CACHE_DIR = "workshop/build_cache"
+LANG_DIR_NAME = "LLC_zh-CN"
+MAX_CACHED_BUILDS = 2
+
+# 处理逻辑有变化时修改这个值，让旧的缓存失效
+BUILD_FORMAT_VERSION = 2
+
+# 不能缓存的处理步骤所处理文件的缓存版本，每次启动从这里重新处理
+UNCACHED_BASE_DIR_NAME = "uncached_base"
+
+# 影响处理结果的设置项
+BUILD_SETTINGS = [
+    'enable_text_gradient',
+    'bubble_text_gradient_rate',
+    'enable_show_user_name',
+    'user_name',
+    'enable_ego_style',
+    'enable_skill_style',
+]
+
+# 影响处理结果的其他文件（私活Tip 每次启动重新生成，Tip 文本不影响缓存）
+BUILD_INPUT_FILES = [
+    "workshop/changes.json",
+]
+
+
+def _hash_tree_stats(sha256, root_dir: str):
+    """把目录下所有文件的相对路径、大小和修改时间写入哈希"""
+    if not os.path.isdir(root_dir):
+        sha256.update(b'<missing>')
+        return
+    entries = []
+    for root, dirs, files in os.walk(root_dir):
+        for file in files:
+            full_path = os.path.join(root, file)
+            stat = os.stat(full_path)
+            relative_path = os.path.relpath(full_path, root_dir).replace(os.sep, '/')
+            entries.append(f"{relative_path}\0{stat.st_size}\0{stat.st_mtime_ns}")
+    for entry in sorted(entries):
+        sha256.update(entry.encode('utf-8'))
+        sha256.update(b'\n')
+
+
+def _hash_file_content(sha256, file_path: str):
+    """把文件内容写入哈希，文件不存在时写入占位内容"""
+    try:
+        with open(file_path, 'rb') as f:
+            sha256.update(hashlib.sha256(f.read()).digest())
+    except FileNotFoundError:
+        sha256.update(b'<missing>')
+
+
+def get_llc_version(source_dir: str) -> str:
+    """读取汉化包版本号"""
+    try:
+        with open(os.path.join(source_dir, 'info', 'version.json'), 'r', encoding='utf-8') as f:
+            return str(json.load(f)['version'])
+    except Exception:
+        return ""
+
+
+def compute_build_key(source_dir: str = "workshop/LLC_zh-CN", font_dir: str = "Font") -> str:
+    """计算当前输入对应的构建键"""
+    settings_manager = get_settings_manager()
+    sha256 = hashlib.sha256()
+
+    sha256.update(f"format={BUILD_FORMAT_VERSION}\n".encode('utf-8'))
+    sha256.update(f"version={get_llc_version(source_dir)}\n".encode('utf-8'))
+
+    settings = {key: settings_manager.get_setting(key) for key in BUILD_SETTINGS}
+    sha256.update(json.dumps(settings, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+    for file_path in BUILD_INPUT_FILES:
+        sha256.update(f"\nfile={file_path}\n".encode('utf-8'))
+        _hash_file_content(sha256, file_path)
+
+    sha256.update(b"\nsource\n")
+    _hash_tree_stats(sha256, source_dir)
+    sha256.update(b"\nfont\n")
+    _hash_tree_stats(sha256, font_dir)
+
+    return sha256.hexdigest()[:32]
+
+
+def get_cached_build(build_key: str, cache_dir: str = BUILD_CACHE_DIR) -> Optional[str]:
+    """返回缓存中的汉化包目录，不存在时返回 None"""
+    build_dir = os.path.join(cache_dir, build_key)
+    lang_dir = os.path.join(build_dir, LANG_DIR_NAME)
+    if os.path.isdir(lang_dir):
+        # 更新访问时间，用于淘汰旧缓存
+        os.utime(build_dir)
+        return lang_dir
+    return None
+
+
+def copy_tree_counted(source_dir: str, target_dir: str, skip: Optional[Set[str]] = None) -> Dict[str, int]:
+    """
+    复制目录（允许目标已存在），返回复制的文件数量和字节数
+
+    Args:
+        skip: 不复制的文件相对路径（使用 '/' 分隔）
+    """
+    stats = {'files': 0, 'bytes': 0}
+
+    def copy_function(source_path, target_path):
+        if skip and os.path.relpath(source_path, source_dir).replace(os.sep, '/') in skip:
+            return
+        shutil.copy2(source_path, target_path)
+        stats['files'] += 1
+        stats['bytes'] += os.path.getsize(target_path)
+
+    shutil.copytree(source_dir, target_dir, copy_function=copy_function, dirs_exist_ok=True)
+    return stats
+
+
+def build(source_dir: str, build_key: str, font_dir: str = "Font",
+          cache_dir: str = BUILD_CACHE_DIR) -> str:
+    """
+    复制源汉化包并执行全部处理步骤，完成后放入缓存目录
+
+    需要处理的文件由处理流水线直接从源目录读取、写入构建目录，
+    其余文件同时在后台线程中复制，复制和处理互相重叠。
+    """
+    from functions.fancy.pipeline import run_pipeline, plan_pipeline
+
+    build_dir = os.path.join(cache_dir, build_key)
+    building_dir = build_dir + '.building'
+    lang_dir = os.path.join(building_dir, LANG_DIR_NAME)
+
+    shutil.rmtree(building_dir, ignore_errors=True)
+    os.makedirs(building_dir, exist_ok=True)
+
+    print("正在构建汉化包缓存...")
+    plan = plan_pipeline(source_dir, cacheable=True)
+    transformed = {relative_path for relative_path, names in plan.tasks}
+
+    def copy_source():
+        with trace_span('build.copy_source') as info:
+            info.update(copy_tree_counted(source_dir, lang_dir, skip=transformed))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        copy_future = executor.submit(copy_source)
+        with trace_span('build.pipeline'):
+            run_pipeline(lang_dir, source_dir=source_dir, plan=plan)
+        copy_future.result()
+
+    if os.path.isdir(font_dir):
+        with trace_span('build.copy_font') as info:
+            info.update(copy_tree_counted(font_dir, os.path.join(lang_dir, 'Font')))
+        print("字体文件夹复制完成")
+
+    build_info: Dict[str, Any] = {
+        'key': build_key,
+        'version': get_llc_version(source_dir),
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    with open(os.path.join(building_dir, 'build_info.json'), 'w', encoding='utf-8') as f:
+        json.dump(build_info, f, ensure_ascii=False, indent=4)
+
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.replace(building_dir, build_dir)
+    print(f"汉化包缓存构建完成: {build_key}")
+
+    return os.path.join(build_dir, LANG_DIR_NAME)
+
+
+def apply_uncached_transforms(lang_dir: str):
+    """
+    对缓存的汉化包执行不能缓存的处理步骤
+
+    处理前的文件第一次处理时保存到构建目录的 uncached_base 中，之后每次都从这里重新处理，
+    缓存中的其他文件不变。
+    """
+    from functions.fancy.pipeline import run_pipeline, plan_pipeline, list_json_files
+
+    plan = plan_pipeline(lang_dir, cacheable=False)
+    base_dir = os.path.join(os.path.dirname(lang_dir), UNCACHED_BASE_DIR_NAME)
+
+    # 关闭了的处理步骤之前处理过的文件恢复为缓存版本
+    tasks = {relative_path for relative_path, names in plan.tasks}
+    if os.path.isdir(base_dir):
+        for relative_path in set(list_json_files(base_dir)) - tasks:
+            shutil.copy2(os.path.join(base_dir, relative_path), os.path.join(lang_dir, relative_path))
+    if not plan.tasks:
+        return
+
+    for relative_path, names in plan.tasks:
+        base_path = os.path.join(base_dir, relative_path)
+        if not os.path.exists(base_path):
+            os.makedirs(os.path.dirname(base_path), exist_ok=True)
+            shutil.copy2(os.path.join(lang_dir, relative_path), base_path)
+    run_pipeline(lang_dir, workers=1, source_dir=base_dir, plan=plan)
+
+
+def evict_old_builds(keep_key: str, cache_dir: str = BUILD_CACHE_DIR, max_builds: int = MAX_CACHED_BUILDS):
+    """只保留最近使用的几个缓存"""
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.is_dir()]
+    except FileNotFoundError:
+        return
+
+    # 清理中途失败留下的构建目录
+    for entry in entries:
+        if entry.name.endswith('.building'):
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    builds = [entry for entry in entries if not entry.name.endswith('.building') and entry.name != keep_key]
+    builds.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in builds[max(0, max_builds - 1):]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def get_or_build(source_dir: str = "workshop/LLC_zh-CN", font_dir: str = "Font",
+                 cache_dir: str = BUILD_CACHE_DIR) -> str:
+    """
+    返回可以直接部署的汉化包目录
+
+    构建键命中时直接返回缓存目录，否则重新构建。之后再执行不能缓存的处理步骤。
+
+    Args:
+        source_dir: 原始汉化包目录
+        font_dir: 字体文件夹
+        cache_dir: 缓存目录
+
+    Returns:
+        str: 处理完成的 LLC_zh-CN 目录
+    """
+    with trace_span('build.compute_key'):
+        build_key = compute_build_key(source_dir, font_dir)
+
+    lang_dir = get_cached_build(build_key, cache_dir)
+    if lang_dir:
+        print(f"使用已缓存的汉化包: {build_key}")
+    else:
+        with trace_span('build', key=build_key):
+            lang_dir = build(source_dir, build_key, font_dir, cache_dir)
+
+    with trace_span('build.uncached'):
+        apply_uncached_transforms(lang_dir)
+
+    with trace_span('build.evict'):
+        evict_old_builds(build_key, cache_dir)
+    return lang_dir
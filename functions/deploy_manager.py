@@ -0,0 +1,357 @@
+"""
+这个模块负责把汉化文件夹部署到游戏目录。
+
+部署时会在 workshop 下保存一份清单（路径、大小、修改时间、内容哈希），
+下一次部署只复制新增或变化的文件，只删除源目录中已经移除的文件。
+
+有变化时先把变化的文件复制到 workshop/deploy_staging 中，准备完成后再写入游戏目录；
+写入前把会被覆盖或删除的文件复制到 workshop/deploy_previous 保留（独立的副本，不使用硬链接），
+写入失败时自动回滚，也可以手动回滚到上一个版本。游戏的 Lang 目录中不会出现额外的文件夹。
+
+变化的文件是逐个写入游戏目录的，没有使用整个目录重命名替换：完整复制一份新目录在每次部署时
+都要写入整个汉化包（私活Tip 每次启动都会变化）。作为代替，写入前在 deploy_previous 中记录
+“正在写入”，写入完成后才标记完成；程序在写入中途被结束时，下次启动或部署前由
+`recover_deploy` 回滚到原来的版本，游戏不会使用新旧混合的汉化文件。
+
+函数：
+    - `prepare_staging(source_dir, target_dir)`: 在暂存目录中准备变化的文件，可以在后台线程中提前执行。
+    - `commit_staging(target_dir)`: 把暂存目录中的文件写入游戏目录。
+    - `deploy_tree(source_dir, target_dir)`: 准备并写入新版本。
+    - `rollback_deploy(target_dir)`: 回滚到上一个版本。
+    - `recover_deploy()`: 回滚中途中断的部署。
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from typing import Dict, Any, Optional
+
+DEPLOY_MANIFEST_PATH = "workshop/deploy_manifest.json"
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+DEPLOY_STAGING_DIR = "workshop/deploy_staging"
+DEPLOY_PREVIOUS_DIR = "workshop/deploy_previous"
+STAGING_SUFFIX = '.staging'
+PREVIOUS_SUFFIX = '.previous'
+# 保存在 deploy_previous 中的回滚信息
+PREVIOUS_INFO_NAME = 'previous.json'
+
+
+def file_sha256(file_path: str) -> str:
+    """计算文件内容的 SHA-256"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def scan_tree(root_dir: str) -> Dict[str, os.stat_result]:
+    """遍历目录，返回 {相对路径: stat} 字典（相对路径统一使用 '/' 分隔）"""
+    result = {}
+    for root, dirs, files in os.walk(root_dir):
+        for file in files:
+            full_path = os.path.join(root, file)
+            relative_path = os.path.relpath(full_path, root_dir).replace(os.sep, '/')
+            result[relative_path] = os.stat(full_path)
+    return result
+
+
+def load_manifest(manifest_path: str = DEPLOY_MANIFEST_PATH) -> Optional[Dict[str, Any]]:
+    """读取部署清单，不存在或损坏时返回 None"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION:
+            return None
+        return manifest
+    except Exception:
+        return None
+
+
+def save_manifest(manifest: Dict[str, Any], manifest_path: str = DEPLOY_MANIFEST_PATH):
+    """保存部署清单（先写临时文件再替换，避免写到一半的清单）"""
+    os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(temp_path, manifest_path)
+
+
+def _stat_matches(stat: os.stat_result, size: int, mtime: int) -> bool:
+    """比较文件的大小和修改时间是否与记录一致"""
+    return stat.st_size == size and stat.st_mtime_ns == mtime
+
+
+def _copy_file(source_path: str, target_path: str):
+    """复制单个文件并保留修改时间"""
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    shutil.copy2(source_path, target_path)
+
+
+def _move_file(source_path: str, target_path: str):
+    """移动单个文件，不在同一个磁盘上时复制"""
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    try:
+        os.replace(source_path, target_path)
+    except OSError:
+        shutil.copy2(source_path, target_path)
+
+
+def prepare_staging(source_dir: str, target_dir: str, manifest_path: str = DEPLOY_MANIFEST_PATH,
+                    staging_dir: str = DEPLOY_STAGING_DIR) -> Dict[str, int]:
+    """
+    把变化的文件复制到暂存目录
+
+    源文件和目标文件的大小、修改时间都与清单一致的文件视为未变化；
+    源文件的时间变了但内容哈希不变、且目标文件未被改动时，也视为未变化。
+    没有可用清单（首次部署、清单损坏或目标目录变化）时，所有文件都从源目录复制。
+    全部文件都未变化时不会创建暂存目录。
+
+    Args:
+        source_dir: 源目录（如 workshop/LLC_zh-CN）
+        target_dir: 目标目录（如 游戏目录/LimbusCompany_Data/Lang/LLC_zh-CN）
+        manifest_path: 清单文件路径
+        staging_dir: 暂存目录
+
+    Returns:
+        dict: 部署统计 {'copied', 'skipped', 'removed', 'bytes', 'staged'}
+    """
+    stats = {'copied': 0, 'skipped': 0, 'removed': 0, 'bytes': 0, 'staged': 0}
+    target_key = os.path.normcase(os.path.abspath(target_dir))
+
+    manifest = load_manifest(manifest_path)
+    target_files = set()
+    if manifest is None or manifest.get('target') != target_key or not os.path.isdir(target_dir):
+        if os.path.exists(target_dir):
+            print(f"未找到可用的部署清单，重新完整部署: {target_dir}")
+            # 目标目录中已有的文件都要重新比较，源目录中没有的文件需要删除
+            target_files = set(scan_tree(target_dir))
+        old_files = {}
+    else:
+        old_files = manifest.get('files', {})
+
+    source_files = scan_tree(source_dir)
+    new_files = {}
+    changed = []
+
+    for relative_path, source_stat in source_files.items():
+        source_path = os.path.join(source_dir, relative_path)
+        entry = old_files.get(relative_path)
+
+        target_stat = None
+        if entry is not None:
+            try:
+                target_stat = os.stat(os.path.join(target_dir, relative_path))
+            except OSError:
+                target_stat = None
+
+        target_intact = (entry is not None and target_stat is not None and
+                         _stat_matches(target_stat, entry['target_size'], entry['target_mtime']))
+
+        if target_intact and _stat_matches(source_stat, entry['size'], entry['mtime']): # type: ignore
+            new_files[relative_path] = entry
+            stats['skipped'] += 1
+            continue
+
+        content_hash = file_sha256(source_path)
+        if target_intact and entry['hash'] == content_hash: # type: ignore
+            # 只是源文件的时间变了，内容没变
+            new_files[relative_path] = dict(entry, size=source_stat.st_size, mtime=source_stat.st_mtime_ns) # type: ignore
+            stats['skipped'] += 1
+            continue
+
+        new_files[relative_path] = {
+            'size': source_stat.st_size,
+            'mtime': source_stat.st_mtime_ns,
+            'hash': content_hash,
+        }
+        changed.append(relative_path)
+
+    removed = sorted((old_files.keys() | target_files) - new_files.keys())
+    stats['removed'] = len(removed)
+    new_manifest = {'version': MANIFEST_VERSION, 'target': target_key, 'files': new_files}
+
+    if not changed and not removed and os.path.isdir(target_dir):
+        # 没有变化，只需要更新清单
+        save_manifest(new_manifest, manifest_path)
+        return stats
+
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir, exist_ok=True)
+
+    for relative_path in changed:
+        staged_path = os.path.join(staging_dir, relative_path)
+        _copy_file(os.path.join(source_dir, relative_path), staged_path)
+        stats['copied'] += 1
+        stats['bytes'] += os.path.getsize(staged_path)
+
+    # 暂存清单中额外记录需要写入和删除的文件，写入游戏目录后去掉
+    new_manifest.update(changed=changed, removed=removed)
+    save_manifest(new_manifest, manifest_path + STAGING_SUFFIX)
+    stats['staged'] = 1
+    return stats
+
+
+def commit_staging(target_dir: str, manifest_path: str = DEPLOY_MANIFEST_PATH,
+                   staging_dir: str = DEPLOY_STAGING_DIR, previous_dir: str = DEPLOY_PREVIOUS_DIR) -> bool:
+    """
+    把暂存目录中的文件写入 target_dir，并删除已经移除的文件
+
+    会被覆盖或删除的文件先复制到 previous_dir，并记录正在写入；写入失败时回滚到原来的版本，
+    程序中途被结束时由 recover_deploy 回滚。
+
+    Returns:
+        bool: 是否写入了新版本（没有暂存目录时返回 False）
+    """
+    staging_manifest = manifest_path + STAGING_SUFFIX
+    new_manifest = load_manifest(staging_manifest)
+    if not os.path.isdir(staging_dir) or new_manifest is None:
+        return False
+    changed = new_manifest.pop('changed')
+    removed = new_manifest.pop('removed')
+
+    # 保留上一个版本：被覆盖或删除的文件的副本，以及新增的文件列表
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    os.makedirs(previous_dir, exist_ok=True)
+    saved, added = [], []
+    for relative_path in changed + removed:
+        target_path = os.path.join(target_dir, relative_path)
+        if os.path.isfile(target_path):
+            _copy_file(target_path, os.path.join(previous_dir, 'files', relative_path))
+            saved.append(relative_path)
+        else:
+            added.append(relative_path)
+    previous = {
+        'target': new_manifest['target'],
+        'target_dir': os.path.abspath(target_dir),
+        'saved': saved,
+        'added': added,
+        'state': 'committing',
+    }
+    save_manifest(previous, os.path.join(previous_dir, PREVIOUS_INFO_NAME))
+    if os.path.exists(manifest_path):
+        os.replace(manifest_path, manifest_path + PREVIOUS_SUFFIX)
+
+    try:
+        for relative_path in changed:
+            target_path = os.path.join(target_dir, relative_path)
+            _move_file(os.path.join(staging_dir, relative_path), target_path)
+            target_stat = os.stat(target_path)
+            new_manifest['files'][relative_path]['target_size'] = target_stat.st_size
+            new_manifest['files'][relative_path]['target_mtime'] = target_stat.st_mtime_ns
+        for relative_path in removed:
+            try:
+                os.remove(os.path.join(target_dir, relative_path))
+            except FileNotFoundError:
+                pass
+    except Exception:
+        # 写入失败时恢复原来的文件
+        rollback_deploy(target_dir, manifest_path, previous_dir)
+        raise
+
+    save_manifest(new_manifest, manifest_path)
+    previous['state'] = 'committed'
+    save_manifest(previous, os.path.join(previous_dir, PREVIOUS_INFO_NAME))
+    os.remove(staging_manifest)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    return True
+
+
+def deploy_tree(source_dir: str, target_dir: str, manifest_path: str = DEPLOY_MANIFEST_PATH) -> Dict[str, int]:
+    """
+    增量部署 source_dir 到 target_dir
+
+    先在暂存目录中准备好变化的文件，再写入游戏目录，写入失败时回滚到原来的版本。
+
+    Args:
+        source_dir: 源目录（如 workshop/LLC_zh-CN）
+        target_dir: 目标目录（如 游戏目录/LimbusCompany_Data/Lang/LLC_zh-CN）
+        manifest_path: 清单文件路径
+
+    Returns:
+        dict: 部署统计 {'copied', 'skipped', 'removed', 'bytes', 'staged'}
+    """
+    recover_deploy(manifest_path)
+
+    # 旧版本在游戏的 Lang 目录中留下的暂存和备份目录
+    for leftover_dir in (target_dir + STAGING_SUFFIX, target_dir + PREVIOUS_SUFFIX):
+        shutil.rmtree(leftover_dir, ignore_errors=True)
+
+    stats = prepare_staging(source_dir, target_dir, manifest_path)
+
+    if stats['staged']:
+        commit_staging(target_dir, manifest_path)
+
+    print(f"汉化部署完成: 复制 {stats['copied']} 个文件, 跳过 {stats['skipped']} 个, "
+          f"删除 {stats['removed']} 个, 共写入 {stats['bytes'] / 1024 / 1024:.1f}MB")
+    return stats
+
+
+def rollback_deploy(target_dir: str, manifest_path: str = DEPLOY_MANIFEST_PATH,
+                    previous_dir: str = DEPLOY_PREVIOUS_DIR) -> bool:
+    """
+    回滚到上一次部署的版本：恢复被覆盖或删除的文件，删除新增的文件
+
+    Returns:
+        bool: 是否回滚成功
+    """
+    try:
+        with open(os.path.join(previous_dir, PREVIOUS_INFO_NAME), 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except Exception:
+        print(f"没有可以回滚的汉化版本: {previous_dir}")
+        return False
+    if previous.get('target') != os.path.normcase(os.path.abspath(target_dir)):
+        print(f"上一个版本不是部署到这个目录的: {target_dir}")
+        return False
+
+    try:
+        for relative_path in previous['added']:
+            try:
+                os.remove(os.path.join(target_dir, relative_path))
+            except FileNotFoundError:
+                pass
+        for relative_path in previous['saved']:
+            _copy_file(os.path.join(previous_dir, 'files', relative_path), os.path.join(target_dir, relative_path))
+        if os.path.exists(manifest_path + PREVIOUS_SUFFIX):
+            os.replace(manifest_path + PREVIOUS_SUFFIX, manifest_path)
+        else:
+            invalidate_manifest(manifest_path)
+        shutil.rmtree(previous_dir, ignore_errors=True)
+        print("汉化已回滚到上一个版本")
+        return True
+    except Exception as e:
+        # 目录状态不确定，下次部署时完整比较
+        invalidate_manifest(manifest_path)
+        print(f"回滚汉化失败: {e}")
+        return False
+
+
+def recover_deploy(manifest_path: str = DEPLOY_MANIFEST_PATH, previous_dir: str = DEPLOY_PREVIOUS_DIR) -> bool:
+    """
+    检查上一次部署是否在写入游戏目录的中途被结束，是的话回滚到原来的版本
+
+    Returns:
+        bool: 是否进行了回滚
+    """
+    try:
+        with open(os.path.join(previous_dir, PREVIOUS_INFO_NAME), 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except Exception:
+        return False
+    if previous.get('state') != 'committing':
+        return False
+
+    print("上一次汉化部署没有完成，回滚到原来的版本")
+    return rollback_deploy(previous['target_dir'], manifest_path, previous_dir)
+
+
+def invalidate_manifest(manifest_path: str = DEPLOY_MANIFEST_PATH):
+    """删除部署清单，下次部署将完整复制"""
+    try:
+        os.remove(manifest_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,166 @@
+"""
+这个模块保存下载过的汉化包和字体包，重新安装、修复或回退时不需要重新下载。
+
+压缩包按内容的 SHA-256 保存为 `workshop/archive_store/<sha256>.<扩展名>`，
+索引 `index.json` 记录每个压缩包的名称、版本、大小和最近使用时间。
+总大小超过设置 archive_store_max_mb 时淘汰最久没有使用的压缩包，设为 0 时不保存。
+
+函数：
+    - `get_archive_store()`: 获取压缩包仓库单例。
+    - `ArchiveStore.lookup(name, version, sha256)`: 查找已保存的压缩包。
+    - `ArchiveStore.put(path, name, version, sha256)`: 把下载完成的压缩包移入仓库。
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, Optional
+from webFunc.SegmentedDownload import hash_file, normalize_digest
+from functions.settings_manager import get_settings_manager
+
+ARCHIVE_STORE_DIR = 'workshop/archive_store'
+DEFAULT_MAX_MB = 512
+
+
+class ArchiveStore:
+    """按内容摘要保存压缩包，按总大小淘汰最久没有使用的压缩包"""
+
+    def __init__(self, store_dir: str = ARCHIVE_STORE_DIR, max_bytes: Optional[int] = None):
+        """
+        Args:
+            store_dir: 仓库目录
+            max_bytes: 最大总大小，为 None 时读取设置 archive_store_max_mb
+        """
+        self.store_dir = store_dir
+        self.index_path = os.path.join(store_dir, 'index.json')
+        self.lock = threading.Lock()
+        self._max_bytes = max_bytes
+
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is not None:
+            return self._max_bytes
+        max_mb = get_settings_manager().get_setting('archive_store_max_mb')
+        return (DEFAULT_MAX_MB if max_mb is None else int(max_mb)) * 1024 * 1024 # type: ignore
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_index(self, index: Dict[str, Dict[str, Any]]):
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            temp_path = self.index_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.index_path)
+        except Exception as e:
+            print(f"保存压缩包索引失败: {e}")
+
+    def _blob_path(self, entry: Dict[str, Any]) -> str:
+        return os.path.join(self.store_dir, entry['sha256'] + entry.get('ext', ''))
+
+    def lookup(self, name: str, version: str, sha256: str = '') -> Optional[str]:
+        """
+        查找已保存的压缩包
+
+        Args:
+            name: 压缩包名称
+            version: 版本
+            sha256: 预期的 SHA-256，不为空时只返回摘要一致的压缩包
+
+        Returns:
+            压缩包路径，没有保存时返回 None
+        """
+        if not self.enabled:
+            return None
+        sha256 = normalize_digest(sha256)
+        with self.lock:
+            index = self._load_index()
+            for digest, entry in index.items():
+                if entry['name'] != name or entry['version'] != version or (sha256 and digest != sha256):
+                    continue
+                path = self._blob_path(entry)
+                if not os.path.exists(path) or os.path.getsize(path) != entry['size']:
+                    continue
+                entry['last_used'] = time.time()
+                self._save_index(index)
+                print(f"使用已保存的压缩包: {name} {version}")
+                return path
+        return None
+
+    def put(self, path: str, name: str, version: str, sha256: str = '') -> Optional[str]:
+        """
+        把压缩包移入仓库
+
+        Args:
+            path: 下载完成的压缩包，成功时会被移走
+            name: 压缩包名称
+            version: 版本
+            sha256: 已校验的 SHA-256，为空时计算
+
+        Returns:
+            仓库中的压缩包路径，不保存时返回 None（原文件保持不变）
+        """
+        if not self.enabled:
+            return None
+        try:
+            size = os.path.getsize(path)
+            if size > self.max_bytes:
+                return None
+            digest = normalize_digest(sha256) or hash_file(path).hexdigest()
+            entry = {
+                'sha256': digest,
+                'name': name,
+                'version': version,
+                'size': size,
+                'ext': os.path.splitext(path)[1],
+                'last_used': time.time(),
+            }
+            os.makedirs(self.store_dir, exist_ok=True)
+            with self.lock:
+                blob_path = self._blob_path(entry)
+                os.replace(path, blob_path)
+                index = self._load_index()
+                index[digest] = entry
+                self._evict(index, keep=digest)
+                self._save_index(index)
+            return blob_path
+        except Exception as e:
+            print(f"保存压缩包失败: {e}")
+            return None
+
+    def _evict(self, index: Dict[str, Dict[str, Any]], keep: str):
+        """总大小超过限制时删除最久没有使用的压缩包"""
+        total = sum(entry['size'] for entry in index.values())
+        for digest, entry in sorted(index.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            try:
+                os.remove(self._blob_path(entry))
+            except FileNotFoundError:
+                pass
+            total -= entry['size']
+            del index[digest]
+            print(f"删除最久没有使用的压缩包: {entry['name']} {entry['version']}")
+
+
+_archive_store: Optional[ArchiveStore] = None
+
+
+def get_archive_store() -> ArchiveStore:
+    """获取压缩包仓库单例"""
+    global _archive_store
+    if _archive_store is None:
+        _archive_store = ArchiveStore()
+    return _archive_store
@@ -1,3 +1,4 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from functions.dowloads.sql_manager import *
 
 def download_bubble_files(config_path: str = "") -> bool:
@@ -12,6 +13,26 @@ def download_bubble_files(config_path: str = "") -> bool:
     # 使用sql_manager中的下载功能
     return download_bubble_files_to_game(**db_config, game_path=game_path)
 
+def fetch_bubble_files_async() -> Future:
+    """在后台线程中从数据库获取JSON文件内容，可以和汉化下载同时进行"""
+    # 启动时已经和版本检查在同一个连接上开始获取
+    future = take_launch_bubble_future()
+    if future is not None:
+        return future
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(get_bubble_json_files, **db_config)
+    executor.shutdown(wait=False)
+    return future
+
+def save_bubble_files(bubble_future: Future, config_path: str = "") -> bool:
+    """等待后台获取完成，并把JSON文件保存到游戏目录"""
+    if not config_path:
+        print("未配置游戏路径，请在config/settings.json中设置game_path")
+        return False
+
+    return save_bubble_files_to_game(bubble_future.result(), config_path)
+
 def upload_bubble_files():
     """上传temp目录中的JSON文件到数据库"""
     # 使用sql_manager中的上传功能
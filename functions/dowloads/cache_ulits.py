@@ -0,0 +1,134 @@
+"""
+这个模块实现 GitHub API 响应的磁盘缓存。
+
+每个请求地址（包括查询参数）对应 `workshop/api_cache` 下的一个文件，保存响应数据、
+ETag、Last-Modified 和 Link 头。缓存在有效期（设置 github_cache_ttl）内直接使用，
+过期后带上 `If-None-Match` / `If-Modified-Since` 重新验证，服务器返回 304 时继续使用缓存。
+GitHub 的 304 响应不计入 API 调用次数。
+
+函数：
+    - `ResponseCache.get_json(session, url, params)`: 获取 JSON 响应，返回 (数据, Link 头)。
+    - `parse_last_page(link)`: 从 Link 头中解析最后一页的页码。
+    - `get_cache_ttl()`: 读取设置中的缓存有效期。
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Optional, Tuple
+from functions.settings_manager import get_settings_manager
+
+CACHE_DIR = 'workshop/api_cache'
+DEFAULT_TTL = 300
+
+
+def get_cache_ttl() -> int:
+    """读取设置中的缓存有效期（秒）"""
+    ttl = get_settings_manager().get_setting('github_cache_ttl')
+    return DEFAULT_TTL if ttl is None else max(0, int(ttl)) # type: ignore
+
+
+def parse_last_page(link: str) -> Optional[int]:
+    """从 Link 头（例如 `<...&page=5>; rel="last"`）中解析最后一页的页码"""
+    for part in link.split(','):
+        if 'rel="last"' in part:
+            match = re.search(r'[?&]page=(\d+)', part)
+            if match:
+                return int(match.group(1))
+    return None
+
+
+class ResponseCache:
+    """GitHub API 响应的磁盘缓存，使用 ETag / Last-Modified 重新验证"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, ttl: Optional[int] = None):
+        """
+        Args:
+            cache_dir: 缓存目录
+            ttl: 缓存有效期（秒），为 None 时读取设置 github_cache_ttl，为 0 时每次都重新验证
+        """
+        self.cache_dir = cache_dir
+        self.ttl = get_cache_ttl() if ttl is None else ttl
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """缓存键：地址和排序后的查询参数"""
+        if not params:
+            return url
+        query = '&'.join(f'{key}={params[key]}' for key in sorted(params))
+        return f'{url}?{query}'
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目"""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            return entry if entry.get('key') == key else None
+        except Exception:
+            return None
+
+    def save(self, key: str, entry: Dict[str, Any]):
+        """保存缓存条目（先写临时文件再替换）"""
+        path = self._path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with self.lock:
+                temp_path = path + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(temp_path, path)
+        except Exception as e:
+            print(f"保存API缓存失败: {e}")
+
+    def get_json(self, session, url: str, params: Optional[Dict[str, Any]] = None,
+                 timeout: float = 30) -> Tuple[Any, str]:
+        """
+        获取 JSON 响应：有效期内直接使用缓存，过期后向服务器重新验证
+
+        Args:
+            session: 使用的 requests.Session
+            url: 请求地址
+            params: 查询参数
+            timeout: 超时时间（秒）
+
+        Returns:
+            (JSON 数据, Link 头)
+
+        Raises:
+            requests.exceptions.RequestException: 请求失败
+        """
+        key = self.make_key(url, params)
+        entry = self.load(key)
+        if entry and time.time() - entry.get('fetched_at', 0) < self.ttl:
+            return entry['data'], entry.get('link', '')
+
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        response = session.get(url, params=params, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry:
+            entry['fetched_at'] = time.time()
+            self.save(key, entry)
+            return entry['data'], entry.get('link', '')
+
+        response.raise_for_status()
+        entry = {
+            'key': key,
+            'etag': response.headers.get('ETag', ''),
+            'last_modified': response.headers.get('Last-Modified', ''),
+            'link': response.headers.get('Link', ''),
+            'fetched_at': time.time(),
+            'data': response.json(),
+        }
+        self.save(key, entry)
+        return entry['data'], entry['link']
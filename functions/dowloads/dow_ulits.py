@@ -30,5 +30,13 @@ def check_need_up_translate(version_info:str = "") -> bool:
     except:
         return False
 
+def get_installed_translate_version(path: str = 'workshop/LLC_zh-CN') -> str:
+    """读取已安装的汉化版本号，没有安装时返回空字符串"""
+    try:
+        with open(os.path.join(path, 'info/version.json'), 'r', encoding='utf-8') as f:
+            return str(load(f)['version']).strip()
+    except Exception:
+        return ""
+
 if __name__ == '__main__':
     print(check_need_up_translate("20250115"))
\ No newline at end of file
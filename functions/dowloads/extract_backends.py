@@ -0,0 +1,343 @@
+"""
+这个模块提供可替换的解压后端。
+
+后端：
+    - `SevenZipExtractor`: 调用 7z 可执行文件（打包的 7-Zip\\7z.exe，或 PATH 中的 7z），支持 7z 和 zip。
+    - `LibarchiveExtractor`: 在进程内使用 libarchive（需要安装 libarchive-c），支持 7z 和 zip。
+    - `Py7zrExtractor`: 在进程内使用 py7zr（需要安装 py7zr），支持 7z。
+    - `ZipFileExtractor`: 使用标准库 zipfile，多个线程同时解压不同的文件，支持 zip。
+
+所有后端都可以只解压指定的文件，并在每解压完一个文件后回调进度。
+`extract_archive` 根据压缩包格式选择可用的后端，按 bench_extract.py 测得的速度排序
+（结果保存在 `workshop/extract_bench.json`），没有测速结果时使用默认顺序，失败时换下一个后端。
+
+函数：
+    - `detect_format(archive_path)`: 根据文件头判断压缩包格式（'7z' / 'zip'）。
+    - `get_extractors(archive_format)`: 返回可用于该格式的后端，按速度排序。
+    - `extract_archive(archive_path, extract_path, members, progress_callback)`: 解压压缩包。
+"""
+
+import os
+import json
+import shutil
+import zipfile
+import tempfile
+import threading
+import subprocess
+from typing import Callable, Dict, List, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import py7zr
+    from py7zr.callbacks import ExtractCallback
+except ImportError:
+    py7zr = None
+    ExtractCallback = object
+
+try:
+    import libarchive
+except ImportError:
+    libarchive = None
+
+SEVEN_ZIP_PATH = r"7-Zip\7z.exe"
+BENCH_RESULTS_PATH = 'workshop/extract_bench.json'
+SEVEN_ZIP_SIGNATURE = b"7z\xbc\xaf\x27\x1c"
+
+# 进度回调 progress_callback(已解压文件数, 文件总数, 文件名)，文件总数未知时为 0
+ProgressCallback = Callable[[int, int, str], None]
+
+
+def detect_format(archive_path: str) -> str:
+    """根据文件头判断压缩包格式，无法识别时返回空字符串"""
+    with open(archive_path, 'rb') as f:
+        header = f.read(len(SEVEN_ZIP_SIGNATURE))
+    if header == SEVEN_ZIP_SIGNATURE:
+        return '7z'
+    if zipfile.is_zipfile(archive_path):
+        return 'zip'
+    return ''
+
+
+def _safe_path(extract_path: str, member: str) -> Optional[str]:
+    """把压缩包中的路径转换为解压目录下的路径，路径跳出解压目录时返回 None"""
+    root = os.path.abspath(extract_path)
+    path = os.path.abspath(os.path.join(root, member.replace('\\', '/').lstrip('/')))
+    if path != root and not path.startswith(root + os.sep):
+        return None
+    return path
+
+
+class Extractor:
+    """解压后端的接口"""
+
+    name = ''
+    formats: Sequence[str] = ()
+
+    def is_available(self) -> bool:
+        """后端在当前环境中是否可用"""
+        return True
+
+    def extract(self, archive_path: str, extract_path: str, members: Optional[List[str]] = None,
+                progress_callback: Optional[ProgressCallback] = None) -> bool:
+        """
+        解压压缩包
+
+        Args:
+            archive_path: 压缩包路径
+            extract_path: 解压目录
+            members: 只解压这些文件（使用 / 分隔的路径），为 None 时解压全部文件
+            progress_callback: 每解压完一个文件后回调
+
+        Returns:
+            bool: 是否解压成功
+        """
+        raise NotImplementedError
+
+
+class SevenZipExtractor(Extractor):
+    """调用 7z 可执行文件解压，用 -bb1 输出的文件名统计进度"""
+
+    name = '7z'
+    formats = ('7z', 'zip')
+
+    @property
+    def executable(self) -> Optional[str]:
+        if os.path.exists(SEVEN_ZIP_PATH):
+            return SEVEN_ZIP_PATH
+        return shutil.which('7z') or shutil.which('7za')
+
+    def is_available(self) -> bool:
+        return self.executable is not None
+
+    def extract(self, archive_path, extract_path, members=None, progress_callback=None) -> bool:
+        args = [self.executable, 'x', archive_path, f'-o{extract_path}', '-y', '-bb1', '-sccUTF-8'] # type: ignore
+        list_path = None
+        if members is not None:
+            # 通过列表文件指定要解压的文件
+            with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as list_file:
+                list_file.write('\n'.join(members))
+            list_path = list_file.name
+            args += ['-scsUTF-8', f'@{list_path}']
+
+        total = len(members) if members is not None else 0
+        done = 0
+        try:
+            process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       text=True, encoding='utf-8', errors='replace',
+                                       creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            for line in process.stdout: # type: ignore
+                # -bb1 时每解压一个文件输出一行 "- 文件名"
+                if line.startswith('- '):
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total, line[2:].strip())
+            stderr = process.stderr.read() # type: ignore
+            returncode = process.wait()
+        finally:
+            if list_path:
+                os.remove(list_path)
+
+        if returncode != 0:
+            print(f"7-Zip解压失败，返回码: {returncode}")
+            print(f"错误输出: {stderr}")
+            return False
+        return True
+
+
+class _Py7zrProgress(ExtractCallback): # type: ignore
+    """把 py7zr 的回调转换为进度回调，目录和没有要求解压的文件不计入进度"""
+
+    def __init__(self, names: set, progress_callback: Optional[ProgressCallback]):
+        self.names = names
+        self.total = len(names)
+        self.done = 0
+        self.progress_callback = progress_callback
+
+    def report_start_preparation(self):
+        pass
+
+    def report_start(self, processing_file_path, processing_bytes):
+        pass
+
+    def report_update(self, decompressed_bytes):
+        pass
+
+    def report_end(self, processing_file_path, wrote_bytes):
+        if processing_file_path.replace('\\', '/') not in self.names:
+            return
+        self.done += 1
+        if self.progress_callback:
+            self.progress_callback(self.done, self.total, processing_file_path)
+
+    def report_warning(self, message):
+        print(f"py7zr: {message}")
+
+    def report_postprocess(self):
+        pass
+
+
+class Py7zrExtractor(Extractor):
+    """在进程内使用 py7zr 解压 7z"""
+
+    name = 'py7zr'
+    formats = ('7z',)
+
+    def is_available(self) -> bool:
+        return py7zr is not None
+
+    def extract(self, archive_path, extract_path, members=None, progress_callback=None) -> bool:
+        try:
+            with py7zr.SevenZipFile(archive_path, 'r') as archive: # type: ignore
+                if members is None:
+                    names = {info.filename.replace('\\', '/') for info in archive.list() if not info.is_directory}
+                    archive.extractall(path=extract_path, callback=_Py7zrProgress(names, progress_callback))
+                else:
+                    archive.extract(path=extract_path, targets=members,
+                                    callback=_Py7zrProgress(set(members), progress_callback))
+            return True
+        except Exception as e:
+            print(f"py7zr解压失败: {e}")
+            return False
+
+
+class LibarchiveExtractor(Extractor):
+    """在进程内使用 libarchive 解压，逐个读取文件并写入解压目录"""
+
+    name = 'libarchive'
+    formats = ('7z', 'zip')
+
+    def is_available(self) -> bool:
+        return libarchive is not None
+
+    def extract(self, archive_path, extract_path, members=None, progress_callback=None) -> bool:
+        wanted = set(members) if members is not None else None
+        total = len(members) if members is not None else 0
+        done = 0
+        try:
+            with libarchive.file_reader(archive_path) as archive: # type: ignore
+                for entry in archive:
+                    name = entry.pathname.replace('\\', '/')
+                    if entry.isdir or (wanted is not None and name not in wanted):
+                        continue
+                    path = _safe_path(extract_path, name)
+                    if path is None:
+                        print(f"跳过不安全的路径: {name}")
+                        continue
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, 'wb') as f:
+                        for block in entry.get_blocks():
+                            f.write(block)
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total, name)
+            return True
+        except Exception as e:
+            print(f"libarchive解压失败: {e}")
+            return False
+
+
+class ZipFileExtractor(Extractor):
+    """使用标准库 zipfile 解压，每个线程打开自己的 ZipFile 同时解压不同的文件"""
+
+    name = 'zipfile'
+    formats = ('zip',)
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or min(8, os.cpu_count() or 1)
+
+    def extract(self, archive_path, extract_path, members=None, progress_callback=None) -> bool:
+        try:
+            with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+                names = [info.filename for info in zip_ref.infolist() if not info.is_dir()]
+            if members is not None:
+                wanted = set(members)
+                names = [name for name in names if name.replace('\\', '/') in wanted]
+
+            local = threading.local()
+            lock = threading.Lock()
+            state = {'done': 0}
+
+            def extract_member(name: str):
+                if not hasattr(local, 'zip_ref'):
+                    local.zip_ref = zipfile.ZipFile(archive_path, 'r')
+                    opened.append(local.zip_ref)
+                local.zip_ref.extract(name, extract_path)
+                with lock:
+                    state['done'] += 1
+                    if progress_callback:
+                        progress_callback(state['done'], len(names), name)
+
+            opened: List[zipfile.ZipFile] = []
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    list(executor.map(extract_member, names))
+            finally:
+                for zip_ref in opened:
+                    zip_ref.close()
+            return True
+        except Exception as e:
+            print(f"zipfile解压失败: {e}")
+            return False
+
+
+EXTRACTORS: List[Extractor] = [SevenZipExtractor(), LibarchiveExtractor(), Py7zrExtractor(), ZipFileExtractor()]
+
+# 没有测速结果时的默认顺序
+DEFAULT_ORDER: Dict[str, List[str]] = {
+    '7z': ['7z', 'libarchive', 'py7zr'],
+    'zip': ['zipfile', '7z', 'libarchive'],
+}
+
+
+def load_bench_results() -> Dict[str, Dict[str, float]]:
+    """读取 bench_extract.py 保存的测速结果 {格式: {后端: 秒}}"""
+    try:
+        with open(BENCH_RESULTS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def get_extractors(archive_format: str) -> List[Extractor]:
+    """返回可用于该格式的后端：有测速结果的按用时排序，其余按默认顺序排在后面"""
+    timings = load_bench_results().get(archive_format, {})
+    order = DEFAULT_ORDER.get(archive_format, [])
+    candidates = [extractor for extractor in EXTRACTORS
+                  if archive_format in extractor.formats and extractor.is_available()]
+    return sorted(candidates, key=lambda extractor: (
+        timings.get(extractor.name, float('inf')),
+        order.index(extractor.name) if extractor.name in order else len(order),
+    ))
+
+
+def extract_archive(archive_path: str, extract_path: str, members: Optional[List[str]] = None,
+                    progress_callback: Optional[ProgressCallback] = None) -> bool:
+    """
+    解压压缩包，依次尝试可用的后端直到成功
+
+    Args:
+        archive_path: 压缩包路径
+        extract_path: 解压目录
+        members: 只解压这些文件（使用 / 分隔的路径），为 None 时解压全部文件
+        progress_callback: 进度回调 progress_callback(已解压文件数, 文件总数, 文件名)
+
+    Returns:
+        bool: 是否解压成功
+    """
+    archive_format = detect_format(archive_path)
+    if not archive_format:
+        print(f"无法识别压缩包格式: {archive_path}")
+        return False
+
+    extractors = get_extractors(archive_format)
+    if not extractors:
+        print(f"没有可以解压 {archive_format} 格式的后端")
+        return False
+
+    os.makedirs(extract_path, exist_ok=True)
+    for extractor in extractors:
+        print(f"使用 {extractor.name} 解压: {archive_path}")
+        if extractor.extract(archive_path, extract_path, members, progress_callback):
+            return True
+        print(f"{extractor.name} 解压失败，尝试下一个后端...")
+    return False
@@ -0,0 +1,239 @@
+"""
+这个模块实现只解压有变化的文件的选择性解压。
+
+先读取压缩包的文件列表（7z 使用 `7z l -slt` 或 py7zr，zip 使用 zipfile 的中央目录），
+把每个文件的大小和 CRC 与已有的文件比较：已经记录在解压记录
+（`workshop/extract_manifest.json`）中且磁盘上大小和修改时间都与记录一致的文件，
+或者磁盘上的文件 CRC 一致的文件会被跳过，只解压有变化的文件。可以只解压压缩包中的某个目录
+（例如 `LimbusCompany_Data/Lang/LLC_zh-CN`），并与另一个目录（例如 `workshop/LLC_zh-CN`）比较。
+解压到其他目录时，文件复制到比较的目录之后调用 `commit_manifest` 才写入解压记录。
+
+函数：
+    - `list_members(archive_path)`: 读取压缩包中的文件列表（路径、大小、CRC）。
+    - `extract_selective(archive_path, extract_path, subtree, compare_path)`: 只解压有变化的文件。
+    - `commit_manifest(compare_path)`: 解压的文件复制到比较的目录之后写入解压记录。
+    - `forget_manifest(compare_path)`: 目录被其他方式修改后删除它的解压记录。
+"""
+
+import os
+import json
+import zlib
+import zipfile
+import subprocess
+from typing import Any, Dict, Iterable, List, Optional
+from functions.dowloads.extract_backends import SevenZipExtractor, extract_archive, py7zr
+
+EXTRACT_MANIFEST_PATH = 'workshop/extract_manifest.json'
+CRC_CHUNK_SIZE = 1024 * 1024
+
+# 已经解压、还没有复制到比较目录的文件 {比较目录: {相对路径: [大小, CRC]}}
+_pending_manifests: Dict[str, Dict[str, List[Any]]] = {}
+
+
+def _run_7z(args: List[str]) -> subprocess.CompletedProcess:
+    """运行 7z 可执行文件，控制台使用 UTF-8"""
+    return subprocess.run([SevenZipExtractor().executable] + args + ['-sccUTF-8'], # type: ignore
+                          capture_output=True, text=True, encoding='utf-8', errors='replace',
+                          creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+
+
+def _list_py7zr(archive_path: str) -> List[Dict[str, Any]]:
+    """没有 7z 可执行文件时用 py7zr 读取 7z 压缩包的文件列表"""
+    with py7zr.SevenZipFile(archive_path, 'r') as archive: # type: ignore
+        return [{
+            'name': info.filename,
+            'path': info.filename.replace('\\', '/'),
+            'size': info.uncompressed,
+            'crc': f'{info.crc32:08X}' if info.crc32 is not None else '',
+        } for info in archive.list() if not info.is_directory]
+
+
+def _list_7z(archive_path: str) -> Optional[List[Dict[str, Any]]]:
+    """用 `7z l -slt` 读取 7z 压缩包的文件列表"""
+    if not SevenZipExtractor().is_available():
+        return _list_py7zr(archive_path) if py7zr is not None else None
+    result = _run_7z(['l', '-slt', archive_path])
+    if result.returncode != 0:
+        print(f"读取压缩包文件列表失败: {result.stderr}")
+        return None
+
+    # 文件信息在 "----------" 之后，每个文件一段，用空行分隔
+    _, _, listing = result.stdout.partition('\n----------\n')
+    members = []
+    for block in listing.split('\n\n'):
+        fields = {}
+        for line in block.splitlines():
+            key, sep, value = line.partition(' = ')
+            if sep:
+                fields[key.strip()] = value.strip()
+        if 'Path' not in fields or fields.get('Folder') == '+' or 'D' in fields.get('Attributes', '')[:1]:
+            continue
+        members.append({
+            'name': fields['Path'],
+            'path': fields['Path'].replace('\\', '/'),
+            'size': int(fields.get('Size') or 0),
+            'crc': fields.get('CRC', '').upper(),
+        })
+    return members
+
+
+def _list_zip(archive_path: str) -> List[Dict[str, Any]]:
+    """从 zip 的中央目录读取文件列表"""
+    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+        return [{
+            'name': info.filename,
+            'path': info.filename.replace('\\', '/'),
+            'size': info.file_size,
+            'crc': f'{info.CRC:08X}',
+        } for info in zip_ref.infolist() if not info.is_dir()]
+
+
+def list_members(archive_path: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    读取压缩包中的文件列表
+
+    Returns:
+        [{'name': 压缩包中的原始路径, 'path': 使用 / 分隔的路径, 'size', 'crc': 大写十六进制}]，
+        无法读取时返回 None
+    """
+    try:
+        if zipfile.is_zipfile(archive_path):
+            return _list_zip(archive_path)
+        return _list_7z(archive_path)
+    except Exception as e:
+        print(f"读取压缩包文件列表失败: {e}")
+        return None
+
+
+def file_crc(path: str) -> str:
+    """计算磁盘上文件的 CRC32（大写十六进制）"""
+    crc = 0
+    with open(path, 'rb') as f:
+        while chunk := f.read(CRC_CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+    return f'{crc & 0xFFFFFFFF:08X}'
+
+
+def _load_manifest() -> Dict[str, Dict[str, List[Any]]]:
+    try:
+        with open(EXTRACT_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_manifest(manifest: Dict[str, Dict[str, List[Any]]]):
+    try:
+        os.makedirs(os.path.dirname(EXTRACT_MANIFEST_PATH), exist_ok=True)
+        temp_path = EXTRACT_MANIFEST_PATH + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_path, EXTRACT_MANIFEST_PATH)
+    except Exception as e:
+        print(f"保存解压记录失败: {e}")
+
+
+def _record_manifest(compare_path: str, entries: Dict[str, List[Any]]):
+    """把比较目录中大小与压缩包一致的文件和它们的修改时间写入解压记录"""
+    recorded = {}
+    for relative_path, (size, crc) in entries.items():
+        try:
+            stat = os.stat(os.path.join(compare_path, relative_path))
+        except OSError:
+            continue
+        if stat.st_size == size:
+            recorded[relative_path] = [size, crc, stat.st_mtime_ns]
+    manifest = _load_manifest()
+    manifest[os.path.abspath(compare_path)] = recorded
+    _save_manifest(manifest)
+
+
+def commit_manifest(compare_path: str):
+    """解压到其他目录的文件复制到比较目录之后调用，写入解压记录"""
+    entries = _pending_manifests.pop(os.path.abspath(compare_path), None)
+    if entries is not None:
+        _record_manifest(compare_path, entries)
+
+
+def forget_manifest(compare_path: str):
+    """目录中的文件被其他方式（例如增量更新）修改后删除它的解压记录，之后改为比较磁盘上文件的 CRC"""
+    manifest = _load_manifest()
+    if manifest.pop(os.path.abspath(compare_path), None) is not None:
+        _save_manifest(manifest)
+
+
+def _is_unchanged(member: Dict[str, Any], relative_path: str, compare_path: str,
+                  recorded: Dict[str, List[Any]]) -> bool:
+    """
+    文件是否与已有的文件相同
+
+    磁盘上文件的大小和修改时间与解压记录一致时使用记录的 CRC，
+    否则（没有记录、记录之后被修改过）计算磁盘上文件的 CRC
+    """
+    disk_path = os.path.join(compare_path, relative_path)
+    try:
+        stat = os.stat(disk_path)
+    except OSError:
+        return False
+    if stat.st_size != member['size'] or not member['crc']:
+        return False
+    entry = recorded.get(relative_path)
+    if entry and len(entry) == 3 and entry[0] == stat.st_size and entry[2] == stat.st_mtime_ns:
+        return entry[1] == member['crc']
+    return file_crc(disk_path) == member['crc']
+
+
+def extract_selective(archive_path: str, extract_path: str, subtree: str = '',
+                      compare_path: Optional[str] = None,
+                      always: Iterable[str] = (),
+                      progress_callback=None) -> Optional[Dict[str, int]]:
+    """
+    只解压有变化的文件
+
+    Args:
+        archive_path: 压缩包路径
+        extract_path: 解压目录
+        subtree: 只解压压缩包中这个目录下的文件，为空时解压全部文件
+        compare_path: 与之比较的目录，对应压缩包中的 subtree；为 None 时使用解压目录下的 subtree
+        always: 总是解压的文件（相对于 subtree 的路径），例如版本信息
+        progress_callback: 进度回调 progress_callback(已解压文件数, 文件总数, 文件名)
+
+    Returns:
+        {'extracted', 'skipped', 'total'}，无法读取文件列表时返回 None（由调用者解压全部文件）
+    """
+    members = list_members(archive_path)
+    if members is None:
+        return None
+
+    prefix = subtree.strip('/') + '/' if subtree else ''
+    if compare_path is None:
+        compare_path = os.path.join(extract_path, prefix)
+    members = [member for member in members if member['path'].startswith(prefix)]
+    always = set(always)
+
+    manifest = _load_manifest()
+    manifest_key = os.path.abspath(compare_path)
+    recorded = manifest.get(manifest_key, {})
+
+    changed = []
+    for member in members:
+        relative_path = member['path'][len(prefix):]
+        if relative_path in always or not _is_unchanged(member, relative_path, compare_path, recorded):
+            changed.append(member)
+
+    stats = {'extracted': len(changed), 'skipped': len(members) - len(changed), 'total': len(members)}
+    print(f"选择性解压: {stats['extracted']} 个文件有变化，跳过 {stats['skipped']} 个未变化的文件")
+
+    if changed:
+        if not extract_archive(archive_path, extract_path, [member['path'] for member in changed],
+                               progress_callback):
+            return None
+
+    entries = {member['path'][len(prefix):]: [member['size'], member['crc']] for member in members}
+    if manifest_key == os.path.abspath(os.path.join(extract_path, prefix)):
+        _record_manifest(compare_path, entries)
+    else:
+        # 文件复制到比较目录之前不写入记录，复制前中断时下次重新比较 CRC
+        _pending_manifests[manifest_key] = entries
+        forget_manifest(compare_path)
+    return stats
@@ -2,6 +2,12 @@ import requests
 import warnings
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from functions.dowloads.cache_ulits import ResponseCache, parse_last_page
+from webFunc.HttpClient import new_session
+
+# 并行获取release列表分页时的最大线程数
+MAX_PAGE_WORKERS = 4
 
 
 @dataclass
@@ -12,6 +18,12 @@ class ReleaseAsset:
     download_url: str
     content_type: str
     download_count: int
+    digest: str = ''  # GitHub提供的文件摘要，格式为 "sha256:<hex>"，旧的release没有
+    
+    @property
+    def sha256(self) -> str:
+        """文件的SHA-256，没有时返回空字符串"""
+        return self.digest[len('sha256:'):] if self.digest.startswith('sha256:') else ''
     
     @property
     def formatted_size(self) -> str:
@@ -73,7 +85,8 @@ class GitHubReleaseFetcher:
     def __init__(self, repo_owner: str, repo_name: str, 
                  use_proxy: bool = True, 
                  proxy_url: str = "https://gh-proxy.org/",
-                 ignore_ssl: bool = False):
+                 ignore_ssl: bool = False,
+                 cache_ttl: Optional[int] = None):
         """
         初始化获取器
         
@@ -83,6 +96,7 @@ class GitHubReleaseFetcher:
             use_proxy: 是否使用代理加速API请求
             proxy_url: 代理服务器地址
             ignore_ssl: 是否忽略SSL证书错误
+            cache_ttl: API响应缓存有效期（秒），为 None 时读取设置 github_cache_ttl
         """
         self.repo_owner = repo_owner
         self.repo_name = repo_name
@@ -94,17 +108,24 @@ class GitHubReleaseFetcher:
         self.github_api_base = "https://api.github.com"
         
         # 配置requests会话
-        self.session = requests.Session()
-        self.session.headers.update({
+        # 共用连接池，不自动重试（失败时换代理重试）
+        self.session = new_session({
             'Accept': 'application/vnd.github.v3+json',
             'User-Agent': 'GitHub-Release-Fetcher'
-        })
+        }, retry=False)
+        
+        # API响应缓存，有效期内不发送请求，过期后用ETag重新验证
+        self.cache = ResponseCache(ttl=cache_ttl)
         
         # 忽略SSL警告
         if self.ignore_ssl:
             self.session.verify = False
             warnings.filterwarnings('ignore', message='Unverified HTTPS request')
     
+    def _get_json(self, endpoint: str, params: Optional[Dict[str, Any]] = None):
+        """通过缓存请求API，返回 (JSON数据, Link头)"""
+        return self.cache.get_json(self.session, self._build_api_url(endpoint), params)
+    
     def _build_api_url(self, endpoint: str) -> str:
         """构建GitHub API URL"""
         api_url = f"{self.github_api_base}/repos/{self.repo_owner}/{self.repo_name}/{endpoint}"
@@ -123,16 +144,11 @@ class GitHubReleaseFetcher:
             ReleaseInfo对象，如果失败则返回None
         """
         try:
-            api_url = self._build_api_url("releases/latest")
-            
             print(f"正在获取最新release: {self.repo_owner}/{self.repo_name}")
             if self.use_proxy:
                 print(f"使用代理: {self.proxy_url}")
             
-            response = self.session.get(api_url, timeout=30)
-            response.raise_for_status()
-            
-            release_data = response.json()
+            release_data, _ = self._get_json("releases/latest")
             return self._parse_release_data(release_data)
             
         except requests.exceptions.RequestException as e:
@@ -195,14 +211,9 @@ class GitHubReleaseFetcher:
             ReleaseInfo对象，如果失败则返回None
         """
         try:
-            api_url = self._build_api_url(f"releases/tags/{tag_name}")
-            
             print(f"正在获取release: {self.repo_owner}/{self.repo_name} @ {tag_name}")
             
-            response = self.session.get(api_url, timeout=30)
-            response.raise_for_status()
-            
-            release_data = response.json()
+            release_data, _ = self._get_json(f"releases/tags/{tag_name}")
             return self._parse_release_data(release_data)
             
         except requests.exceptions.RequestException as e:
@@ -221,6 +232,8 @@ class GitHubReleaseFetcher:
         """
         列出所有release（分页）
         
+        第一页的Link头给出总页数时，其余各页并行获取；否则逐页获取
+        
         Args:
             per_page: 每页数量
             
@@ -228,31 +241,31 @@ class GitHubReleaseFetcher:
             ReleaseInfo对象列表
         """
         try:
-            api_url = self._build_api_url("releases")
-            params = {"per_page": per_page}
-            
             print(f"正在列出所有release: {self.repo_owner}/{self.repo_name}")
             
-            releases = []
-            page = 1
+            def fetch_page(page: int):
+                return self._get_json("releases", {"per_page": per_page, "page": page})
             
-            while True:
-                params["page"] = page
-                response = self.session.get(api_url, params=params, timeout=30)
-                response.raise_for_status()
-                
-                page_data = response.json()
-                if not page_data:
-                    break
-                
-                for release in page_data:
-                    releases.append(self._parse_release_data(release))
-                
-                page += 1
-                
+            page_data, link = fetch_page(1)
+            pages = [page_data]
+            last_page = parse_last_page(link)
+            
+            if page_data and last_page and last_page > 1:
+                # 已知总页数，并行获取其余各页
+                with ThreadPoolExecutor(max_workers=min(MAX_PAGE_WORKERS, last_page - 1)) as executor:
+                    pages.extend(data for data, _ in executor.map(fetch_page, range(2, last_page + 1)))
+            else:
+                page = 1
                 # 如果返回的数量小于per_page，说明已经到最后一页
-                if len(page_data) < per_page:
-                    break
+                while page_data and len(page_data) >= per_page:
+                    page += 1
+                    page_data, _ = fetch_page(page)
+                    pages.append(page_data)
+            
+            releases = []
+            for page_data in pages:
+                for release in page_data or []:
+                    releases.append(self._parse_release_data(release))
             
             return releases
             
@@ -273,7 +286,8 @@ class GitHubReleaseFetcher:
                 size=asset['size'],
                 download_url=asset['browser_download_url'],
                 content_type=asset.get('content_type', 'application/octet-stream'),
-                download_count=asset.get('download_count', 0)
+                download_count=asset.get('download_count', 0),
+                digest=asset.get('digest') or ''
             ))
         
         # 创建ReleaseInfo对象
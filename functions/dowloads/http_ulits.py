@@ -0,0 +1,259 @@
+"""
+这个模块实现可以断点续传的 HTTP 下载。
+
+下载中的数据写入 `<文件名>.part`，同时在 `<文件名>.part.json` 中记录下载地址、ETag、
+Last-Modified 和文件总大小。连接中断后会用 `Range` 请求从已下载的位置继续下载，
+并用 `If-Range` 确认服务器上的文件没有变化；服务器不支持 Range 或文件已经变化时从头下载。
+下载完成并检查大小后才会重命名为最终文件名。
+
+提供预期的 SHA-256 时，下载过程中边写入边计算摘要（续传时只补算已下载的部分），
+摘要不一致时立即删除下载的文件，不会留下损坏的压缩包。
+
+服务器支持 Range 请求时，`download_file` 会按设置 download_connections 使用多个连接分段下载
+（见 webFunc.SegmentedDownload），否则使用单连接续传下载。
+
+函数：
+    - `download_file(url, local_filename)`: 下载文件，自动选择分段下载或单连接续传下载。
+    - `download_resumable(url, local_filename)`: 单连接下载文件，中断后自动续传。
+    - `discard_partial(local_filename)`: 删除未完成的下载。
+"""
+
+import os
+import json
+import time
+import hashlib
+import requests
+from typing import Any, Callable, Dict, List, Optional, Union
+from webFunc.SegmentedDownload import download_segmented, hash_file, check_digest
+from webFunc.HttpClient import get_session
+from functions.settings_manager import get_settings_manager
+
+PART_SUFFIX = '.part'
+META_SUFFIX = '.part.json'
+CHUNK_SIZE = 64 * 1024
+MAX_RETRIES = 5
+RETRY_DELAY = 1.0
+REQUEST_TIMEOUT = (10, 30)
+
+
+class DownloadCancelled(Exception):
+    """下载被取消"""
+
+
+def _load_meta(meta_path: str) -> Optional[Dict[str, Any]]:
+    """读取未完成下载的记录"""
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _save_meta(meta_path: str, meta: Dict[str, Any]):
+    """保存未完成下载的记录"""
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def _total_size(response: requests.Response, offset: int) -> int:
+    """根据响应头计算文件总大小，未知时返回 0"""
+    content_range = response.headers.get('Content-Range', '')
+    if response.status_code == 206 and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        if total.isdigit():
+            return int(total)
+    content_length = response.headers.get('Content-Length', '')
+    if content_length.isdigit():
+        return int(content_length) + (offset if response.status_code == 206 else 0)
+    return 0
+
+
+def discard_partial(local_filename: str):
+    """删除未完成的下载文件和记录"""
+    for path in (local_filename + PART_SUFFIX, local_filename + META_SUFFIX):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _resume_offset(url: str, part_path: str, meta: Optional[Dict[str, Any]]) -> int:
+    """返回可以续传的位置，不能续传时返回 0"""
+    if not meta or meta.get('url') != url or not os.path.exists(part_path):
+        return 0
+    # 分段下载的文件预先分配了完整大小，不能按文件大小续传
+    if meta.get('segments'):
+        return 0
+    # 没有 ETag 和 Last-Modified 时无法确认服务器上的文件没有变化
+    if not meta.get('etag') and not meta.get('last_modified'):
+        return 0
+    offset = os.path.getsize(part_path)
+    if meta.get('size') and offset > meta['size']:
+        return 0
+    return offset
+
+
+def _request(session, url: str, offset: int, meta: Optional[Dict[str, Any]], verify: bool) -> requests.Response:
+    """发送下载请求，续传时带上 Range 和 If-Range"""
+    headers = {}
+    if offset > 0 and meta:
+        headers['Range'] = f'bytes={offset}-'
+        headers['If-Range'] = meta.get('etag') or meta.get('last_modified')
+    return session.get(url, stream=True, headers=headers, verify=verify, timeout=REQUEST_TIMEOUT)
+
+
+def download_resumable(url: str, local_filename: str,
+                       progress_callback: Optional[Callable[[int, int], None]] = None,
+                       should_continue: Optional[Callable[[], bool]] = None,
+                       session: Optional[requests.Session] = None,
+                       verify: bool = True,
+                       max_retries: int = MAX_RETRIES,
+                       expected_sha256: str = '') -> bool:
+    """
+    下载文件，连接中断后从已下载的位置继续
+
+    Args:
+        url: 下载地址
+        local_filename: 保存路径
+        progress_callback: 进度回调 progress_callback(已下载字节数, 总字节数)，总大小未知时为 0
+        should_continue: 返回 False 时取消下载，已下载的部分会保留
+        session: 使用的 requests.Session，为 None 时使用共用的会话
+        verify: 是否验证 HTTPS 证书
+        max_retries: 连接中断后的最大重试次数
+        expected_sha256: 预期的 SHA-256，不为空时校验，不一致时删除下载的文件
+
+    Returns:
+        bool: 是否下载成功
+    """
+    session = session or get_session()
+    part_path = local_filename + PART_SUFFIX
+    meta_path = local_filename + META_SUFFIX
+    os.makedirs(os.path.dirname(local_filename) or '.', exist_ok=True)
+
+    retries = 0
+    while True:
+        meta = _load_meta(meta_path)
+        offset = _resume_offset(url, part_path, meta)
+        if offset == 0:
+            discard_partial(local_filename)
+            meta = None
+
+        try:
+            with _request(session, url, offset, meta, verify) as response:
+                if response.status_code == 416 and meta and meta.get('size') == offset:
+                    # 上次已经下载完整，只是没有完成重命名
+                    total = offset
+                    hasher = hash_file(part_path) if expected_sha256 else None
+                elif response.status_code == 416:
+                    print("服务器拒绝续传请求，重新下载")
+                    discard_partial(local_filename)
+                    continue
+                else:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        # 服务器不支持 Range 或文件已经变化，从头下载
+                        if offset > 0:
+                            print("服务器不支持续传或文件已更新，重新下载")
+                        offset = 0
+                    elif offset > 0:
+                        print(f"从 {offset / 1024 / 1024:.1f}MB 处继续下载")
+
+                    total = _total_size(response, offset)
+                    meta = {
+                        'url': url,
+                        'etag': response.headers.get('ETag', ''),
+                        'last_modified': response.headers.get('Last-Modified', ''),
+                        'size': total,
+                    }
+                    _save_meta(meta_path, meta)
+
+                    # 续传时先补算已下载部分的摘要
+                    hasher = None
+                    if expected_sha256:
+                        hasher = hash_file(part_path, end=offset) if offset > 0 else hashlib.sha256()
+                    downloaded = offset
+                    with open(part_path, 'ab' if offset > 0 else 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            if should_continue and not should_continue():
+                                raise DownloadCancelled()
+                            if chunk:
+                                f.write(chunk)
+                                downloaded += len(chunk)
+                                if hasher:
+                                    hasher.update(chunk)
+                                if progress_callback:
+                                    progress_callback(downloaded, total)
+
+            part_size = os.path.getsize(part_path)
+            if total and part_size != total:
+                raise requests.exceptions.ConnectionError(f"下载不完整: {part_size}/{total} bytes")
+
+            if hasher and not check_digest(hasher, expected_sha256, part_path):
+                discard_partial(local_filename)
+                return False
+
+            os.replace(part_path, local_filename)
+            discard_partial(local_filename)
+            return True
+
+        except DownloadCancelled:
+            print("下载已取消，已下载的部分会在下次继续")
+            return False
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                requests.exceptions.ChunkedEncodingError) as e:
+            retries += 1
+            if retries > max_retries:
+                print(f"下载失败，已达最大重试次数: {e}")
+                return False
+            print(f"下载连接中断，准备续传 ({retries}/{max_retries}): {e}")
+            time.sleep(RETRY_DELAY * retries)
+        except requests.exceptions.RequestException as e:
+            print(f"下载失败: {e}")
+            return False
+
+
+def get_download_connections() -> int:
+    """读取设置中的下载连接数"""
+    connections = get_settings_manager().get_setting('download_connections') or 1
+    return max(1, int(connections)) # type: ignore
+
+
+def download_file(urls: Union[str, List[str]], local_filename: str,
+                  progress_callback: Optional[Callable[[int, int], None]] = None,
+                  should_continue: Optional[Callable[[], bool]] = None,
+                  verify: bool = True, connections: Optional[int] = None,
+                  expected_sha256: str = '') -> bool:
+    """
+    下载文件：服务器支持 Range 请求时多连接分段下载，否则单连接续传下载
+
+    Args:
+        urls: 下载地址，或同一个文件的多个下载地址（例如不同的代理）
+        local_filename: 保存路径
+        progress_callback: 进度回调 progress_callback(已下载字节数, 总字节数)
+        should_continue: 返回 False 时取消下载，已下载的部分会保留
+        verify: 是否验证 HTTPS 证书
+        connections: 连接数，为 None 时读取设置 download_connections
+        expected_sha256: 预期的 SHA-256，不为空时校验，不一致时删除下载的文件
+
+    Returns:
+        bool: 是否下载成功
+    """
+    if isinstance(urls, str):
+        urls = [urls]
+    if connections is None:
+        connections = get_download_connections()
+
+    if connections > 1:
+        result = download_segmented(urls, local_filename, connections, progress_callback,
+                                    should_continue, verify=verify, expected_sha256=expected_sha256)
+        if result is not None:
+            return result
+        print("服务器不支持分段下载，使用单连接下载")
+
+    for url in urls:
+        if download_resumable(url, local_filename, progress_callback, should_continue, verify=verify,
+                              expected_sha256=expected_sha256):
+            return True
+        if should_continue and not should_continue():
+            return False
+    return False
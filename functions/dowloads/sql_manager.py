@@ -1,11 +1,370 @@
 import pymysql
 import os
+import json
+import zlib
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import Future
+from functions.dowloads.sql_pool import get_pool
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 
+# 气泡文本的字段和对应的文件名，每个字段另有 <字段>_hash（数据库根据内容计算的sha256）、
+# <字段>_z（zlib压缩后的内容）和 <字段>_z_hash（压缩内容对应的sha256）
+# 只写入文本字段的旧上传工具不会更新压缩内容，这时 _z_hash 与 _hash 不一致，客户端改为下载文本字段
+BUBBLE_FILES = [
+    ('battle_speech_bubble', 'BattleSpeechBubbleDlg.json'),
+    ('battle_speech_bubble_cultivation', 'BattleSpeechBubbleDlg_Cultivation.json'),
+    ('battle_speech_bubble_mowe', 'BattleSpeechBubbleDlg_mowe.json'),
+]
+# 本地保存的气泡文本，校验和与数据库相同时不再下载
+BUBBLE_CACHE_DIR = "workshop/bubble_cache"
+BUBBLE_COMPRESS_LEVEL = 9
+# 按条目保存的气泡文本，每条对话一行，客户端只下载上次同步之后修改过的行；
+# 每个文件的条目顺序保存在顺序表中
+BUBBLE_ROWS_TABLE = "faust_bubble_rows"
+BUBBLE_ORDER_TABLE = "faust_bubble_order"
+BUBBLE_ROWS_CACHE = os.path.join(BUBBLE_CACHE_DIR, "rows.json")
+
+def _bubble_hash(content):
+    """气泡文本的sha256"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def _has_bubble_hash_columns(cursor):
+    """faust_launcher表格是否已经有校验和与压缩内容字段"""
+    cursor.execute("SHOW COLUMNS FROM faust_launcher LIKE 'battle_speech_bubble_z_hash'")
+    return cursor.fetchone() is not None
+
+def _add_bubble_hash_columns(cursor):
+    """给旧的faust_launcher表格添加校验和与压缩内容字段，已有的普通校验和字段改为由数据库计算"""
+    cursor.execute("SHOW COLUMNS FROM faust_launcher")
+    existing = {row['Field'] for row in cursor.fetchall()}
+    columns = []
+    for column, _ in BUBBLE_FILES:
+        action = "MODIFY" if f"{column}_hash" in existing else "ADD"
+        columns.append(f"{action} COLUMN {column}_hash CHAR(64) AS (SHA2({column}, 256)) STORED")
+        if f"{column}_z" not in existing:
+            columns.append(f"ADD COLUMN {column}_z LONGBLOB")
+        columns.append(f"ADD COLUMN {column}_z_hash CHAR(64)")
+    cursor.execute(f"ALTER TABLE faust_launcher {', '.join(columns)}")
+    print("faust_launcher表格添加校验和字段成功")
+
+def _read_bubble_cache(file_name, expected_hash):
+    """读取本地保存的气泡文本，内容与校验和不一致时返回None"""
+    try:
+        with open(os.path.join(BUBBLE_CACHE_DIR, file_name), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if hashlib.sha256(data).hexdigest() != expected_hash:
+        return None
+    return data.decode('utf-8')
+
+def _write_bubble_cache(file_name, content):
+    """保存气泡文本到本地，先写临时文件再替换"""
+    try:
+        os.makedirs(BUBBLE_CACHE_DIR, exist_ok=True)
+        path = os.path.join(BUBBLE_CACHE_DIR, file_name)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(content.encode('utf-8'))
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        print(f"保存本地气泡文本失败: {e}")
+
+def _split_bubble_rows(content):
+    """
+    把气泡文本按原来的顺序拆分为条目 {entry_id: (dlg, extra)}，格式不支持时返回None
+
+    entry_id 是条目 id 的JSON文本，dlg 以外的字段保存在 extra 中
+    """
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or set(data) != {'dataList'} or not isinstance(data['dataList'], list):
+        return None
+    rows = {}
+    for item in data['dataList']:
+        if not isinstance(item, dict) or 'id' not in item:
+            return None
+        entry_id = json.dumps(item['id'], ensure_ascii=False)
+        if entry_id in rows or len(entry_id) > 191:
+            return None
+        extra = {key: value for key, value in item.items() if key != 'id'}
+        dlg = extra.pop('dlg') if isinstance(extra.get('dlg'), str) else None
+        rows[entry_id] = (dlg, json.dumps(extra, ensure_ascii=False) if extra else None)
+    return rows
+
+def _join_bubble_rows(order, rows):
+    """按 order 中的顺序把条目合并为气泡文本"""
+    data_list = []
+    for entry_id in order:
+        dlg, extra = rows[entry_id]
+        item = {'id': json.loads(entry_id)}
+        if dlg is not None:
+            item['dlg'] = dlg
+        if extra:
+            item.update(json.loads(extra))
+        data_list.append(item)
+    return json.dumps({'dataList': data_list}, ensure_ascii=False, indent=2)
+
+def _normalize_bubble_file(content):
+    """
+    能按条目保存的气泡文本统一为条目合并后的格式
+
+    数据库中保存的文件内容与客户端用条目合并的内容逐字节相同，合并后可以用文件的校验和检查
+    """
+    rows = _split_bubble_rows(content)
+    return content if rows is None else _join_bubble_rows(rows, rows)
+
+def _md5(text):
+    return hashlib.md5(text.encode('utf-8')).hexdigest() if text is not None else None
+
+def _create_bubble_rows_table(cursor):
+    """创建按条目保存气泡文本的表格，条目的顺序单独保存，插入条目时其他条目不需要更新"""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {BUBBLE_ROWS_TABLE} (
+        file VARCHAR(64) NOT NULL,
+        entry_id VARCHAR(191) NOT NULL,
+        dlg MEDIUMTEXT,
+        extra MEDIUMTEXT,
+        deleted BOOLEAN NOT NULL DEFAULT FALSE,
+        updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+        PRIMARY KEY (file, entry_id),
+        INDEX idx_updated_at (updated_at)
+    ) CHARACTER SET utf8mb4
+    """)
+    # 旧版本的表格用 position 字段保存顺序，插入一个条目会修改之后所有条目
+    cursor.execute(f"SHOW COLUMNS FROM {BUBBLE_ROWS_TABLE} LIKE 'position'")
+    if cursor.fetchone():
+        cursor.execute(f"ALTER TABLE {BUBBLE_ROWS_TABLE} DROP COLUMN position")
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {BUBBLE_ORDER_TABLE} (
+        file VARCHAR(64) NOT NULL PRIMARY KEY,
+        entry_ids MEDIUMTEXT NOT NULL,
+        updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+    ) CHARACTER SET utf8mb4
+    """)
+
+def _upload_bubble_rows(cursor, contents):
+    """
+    只上传有变化的条目，删除的条目标记为 deleted，条目的顺序变化时更新顺序表
+
+    先下载每个条目内容的MD5，与本地的条目比较，不下载条目的内容
+    格式不能拆分为条目的文件删除它的条目，客户端改为下载这个文件
+    """
+    upserts = []
+    deletes = []
+    for file_name, content in contents.items():
+        rows = _split_bubble_rows(content)
+        if rows is None:
+            print(f"⚠️ {file_name} 的格式不能按条目保存，客户端将下载整个文件")
+            cursor.execute(f"DELETE FROM {BUBBLE_ROWS_TABLE} WHERE file = %s", (file_name,))
+            cursor.execute(f"DELETE FROM {BUBBLE_ORDER_TABLE} WHERE file = %s", (file_name,))
+            continue
+        
+        cursor.execute(f"SELECT entry_id, deleted, MD5(dlg) AS dlg_md5, MD5(extra) AS extra_md5 "
+                       f"FROM {BUBBLE_ROWS_TABLE} WHERE file = %s", (file_name,))
+        remote = {row['entry_id']: row for row in cursor.fetchall()}
+        for entry_id, (dlg, extra) in rows.items():
+            row = remote.get(entry_id)
+            if not row or row['deleted'] or row['dlg_md5'] != _md5(dlg) or row['extra_md5'] != _md5(extra):
+                upserts.append((file_name, entry_id, dlg, extra))
+        deletes += [(file_name, entry_id) for entry_id, row in remote.items()
+                    if entry_id not in rows and not row['deleted']]
+        
+        order = json.dumps(list(rows), ensure_ascii=False)
+        cursor.execute(f"SELECT MD5(entry_ids) AS order_md5 FROM {BUBBLE_ORDER_TABLE} WHERE file = %s", (file_name,))
+        result = cursor.fetchone()
+        if not result or result['order_md5'] != _md5(order):
+            cursor.execute(f"""
+            INSERT INTO {BUBBLE_ORDER_TABLE} (file, entry_ids, updated_at) VALUES (%s, %s, NOW(6))
+            ON DUPLICATE KEY UPDATE entry_ids = VALUES(entry_ids), updated_at = NOW(6)
+            """, (file_name, order))
+            print(f"更新 {file_name} 的条目顺序")
+    
+    if upserts:
+        cursor.executemany(f"""
+        INSERT INTO {BUBBLE_ROWS_TABLE} (file, entry_id, dlg, extra, deleted, updated_at)
+        VALUES (%s, %s, %s, %s, FALSE, NOW(6))
+        ON DUPLICATE KEY UPDATE dlg = VALUES(dlg), extra = VALUES(extra), deleted = FALSE, updated_at = NOW(6)
+        """, upserts)
+    if deletes:
+        cursor.executemany(f"UPDATE {BUBBLE_ROWS_TABLE} SET deleted = TRUE, updated_at = NOW(6) "
+                           f"WHERE file = %s AND entry_id = %s", deletes)
+    print(f"上传气泡条目: {len(upserts)} 条修改，{len(deletes)} 条删除")
+
+def _query_bubble_rows_since(connection, watermark=None):
+    """
+    在已有的连接上获取 watermark 之后修改过的条目（包括标记为删除的条目）
+
+    Args:
+        connection: 数据库连接
+        watermark: 上次同步时最新的 updated_at（datetime），为None时获取所有条目
+
+    Returns:
+        list: 条目列表，每个条目包含 file、entry_id、dlg、extra、deleted、updated_at
+    """
+    with connection.cursor() as cursor:
+        fields = "file, entry_id, dlg, extra, deleted, updated_at"
+        if watermark is None:
+            cursor.execute(f"SELECT {fields} FROM {BUBBLE_ROWS_TABLE} WHERE deleted = FALSE")
+        else:
+            # 同一次上传的条目修改时间相同，大于 watermark 的条目都是上次同步之后上传的；
+            # 漏掉的条目会让合并结果与文件的校验和不一致，客户端改为下载整个文件
+            cursor.execute(f"SELECT {fields} FROM {BUBBLE_ROWS_TABLE} WHERE updated_at > %s", (watermark,))
+        return cursor.fetchall()
+
+def get_bubble_rows_since(host, port, user, password, database, watermark=None):
+    """
+    获取 watermark 之后修改过的气泡条目
+    
+    Args:
+        host: MySQL服务器地址
+        port: 端口号
+        user: 用户名
+        password: 密码
+        database: 数据库名
+        watermark: 上次同步时最新的 updated_at（datetime），为None时获取所有条目
+        
+    Returns:
+        list: 条目列表，获取失败时返回None
+    """
+    try:
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
+        
+        return _query_bubble_rows_since(connection, watermark)
+        
+    except pymysql.Error as e:
+        print(f"MySQL错误: {e}")
+        return None
+    except Exception as e:
+        print(f"错误: {e}")
+        return None
+    finally:
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
+
+def _empty_bubble_rows_cache():
+    return {'watermark': None, 'orders': {}, 'files': {}}
+
+def _load_bubble_rows_cache():
+    """
+    读取本地的条目缓存
+
+    {'watermark': 最新的 updated_at, 'orders': {file: {'md5': ..., 'ids': [...]}}, 'files': {file: {entry_id: [dlg, extra]}}}
+    """
+    try:
+        with open(BUBBLE_ROWS_CACHE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if isinstance(cache.get('orders'), dict) and isinstance(cache.get('files'), dict):
+            return cache
+    except (OSError, ValueError, AttributeError):
+        pass
+    return _empty_bubble_rows_cache()
+
+def _save_bubble_rows_cache(cache):
+    try:
+        os.makedirs(BUBBLE_CACHE_DIR, exist_ok=True)
+        with open(BUBBLE_ROWS_CACHE + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(BUBBLE_ROWS_CACHE + '.tmp', BUBBLE_ROWS_CACHE)
+    except OSError as e:
+        print(f"保存本地气泡条目失败: {e}")
+
+def discard_bubble_rows_cache():
+    """删除本地的条目缓存，下次同步时重新下载所有条目"""
+    try:
+        os.remove(BUBBLE_ROWS_CACHE)
+    except FileNotFoundError:
+        pass
+
+def _sync_bubble_rows(connection):
+    """
+    把 watermark 之后修改过的条目合并到本地缓存，再按顺序表合并为JSON文件的内容
+
+    Returns:
+        dict: {文件名: 合并后的内容}，只包括服务器上有完整条目的文件
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"SHOW TABLES LIKE '{BUBBLE_ORDER_TABLE}'")
+        if not cursor.fetchone():
+            return {}
+        # 各文件顺序表的MD5和条目的最新修改时间，没有变化时不下载任何条目
+        cursor.execute(f"SELECT file, MD5(entry_ids) AS order_md5 FROM {BUBBLE_ORDER_TABLE}")
+        order_md5s = {row['file']: row['order_md5'] for row in cursor.fetchall()}
+        cursor.execute(f"SELECT MAX(updated_at) AS latest FROM {BUBBLE_ROWS_TABLE}")
+        latest = (cursor.fetchone() or {}).get('latest')
+    if not order_md5s or latest is None:
+        return {}
+    
+    cache = _load_bubble_rows_cache()
+    try:
+        watermark = datetime.fromisoformat(cache['watermark']) if cache['watermark'] else None
+    except (TypeError, ValueError):
+        watermark = None
+    # 服务器的条目比本地旧（表格被重建）时重新下载所有条目
+    if watermark is None or watermark > latest:
+        cache, watermark = _empty_bubble_rows_cache(), None
+    
+    # 更新顺序有变化的文件的顺序表
+    changed_orders = [file_name for file_name, md5 in order_md5s.items()
+                      if cache['orders'].get(file_name, {}).get('md5') != md5]
+    if changed_orders:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT file, entry_ids, MD5(entry_ids) AS order_md5 FROM {BUBBLE_ORDER_TABLE} "
+                           f"WHERE file IN ({', '.join(['%s'] * len(changed_orders))})", changed_orders)
+            for row in cursor.fetchall():
+                cache['orders'][row['file']] = {'md5': row['order_md5'], 'ids': json.loads(row['entry_ids'])}
+    for file_name in list(cache['orders']):
+        if file_name not in order_md5s:
+            del cache['orders'][file_name]
+    
+    def incomplete_files():
+        return [file_name for file_name, order in cache['orders'].items()
+                if any(entry_id not in cache['files'].get(file_name, {}) for entry_id in order['ids'])]
+    
+    changed = 0
+    if watermark is None or latest > watermark or incomplete_files():
+        for since in (watermark, None):
+            if since is None:
+                cache['files'] = {}
+            rows = _query_bubble_rows_since(connection, since)
+            for row in rows:
+                entries = cache['files'].setdefault(row['file'], {})
+                if row['deleted']:
+                    entries.pop(row['entry_id'], None)
+                else:
+                    entries[row['entry_id']] = [row['dlg'], row['extra']]
+            changed += len(rows)
+            if since is None or not incomplete_files():
+                break
+            print("⚠️ 本地气泡条目与服务器不一致，重新下载所有条目")
+        cache['watermark'] = latest.isoformat()
+        # 不在顺序表中的条目不再需要
+        for file_name in list(cache['files']):
+            ids = set(cache['orders'].get(file_name, {}).get('ids', ()))
+            cache['files'][file_name] = {entry_id: row for entry_id, row in cache['files'][file_name].items()
+                                         if entry_id in ids}
+    if changed or changed_orders:
+        _save_bubble_rows_cache(cache)
+    
+    missing = set(incomplete_files())
+    if missing:
+        print(f"⚠️ 气泡条目不完整: {', '.join(sorted(missing))}")
+    print(f"获取气泡条目成功，{changed} 条有变化")
+    return {file_name: _join_bubble_rows(order['ids'], cache['files'][file_name])
+            for file_name, order in cache['orders'].items() if file_name not in missing}
+
 def set_bubble_json_files(host, port, user, password, database, battle_speech_file, cultivation_file, mowe_file):
     """
     在faust_launcher表格中设置三个JSON文件的内容
+
+    同时写入每个文件的校验和与压缩后的内容，只更新内容有变化的文件
+    每条对话另外按条目保存到faust_bubble_rows表格，只上传有变化的条目
     
     Args:
         host: MySQL服务器地址
@@ -18,16 +377,8 @@ def set_bubble_json_files(host, port, user, password, database, battle_speech_fi
         mowe_file: BattleSpeechBubbleDlg_mowe.json文件内容
     """
     try:
-        # 连接MySQL数据库
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
         
         with connection.cursor() as cursor:
             # 检查表格是否存在
@@ -42,46 +393,79 @@ def set_bubble_json_files(host, port, user, password, database, battle_speech_fi
                     battle_speech_bubble LONGTEXT,
                     battle_speech_bubble_cultivation LONGTEXT,
                     battle_speech_bubble_mowe LONGTEXT,
+                    battle_speech_bubble_hash CHAR(64) AS (SHA2(battle_speech_bubble, 256)) STORED,
+                    battle_speech_bubble_z LONGBLOB,
+                    battle_speech_bubble_z_hash CHAR(64),
+                    battle_speech_bubble_cultivation_hash CHAR(64) AS (SHA2(battle_speech_bubble_cultivation, 256)) STORED,
+                    battle_speech_bubble_cultivation_z LONGBLOB,
+                    battle_speech_bubble_cultivation_z_hash CHAR(64),
+                    battle_speech_bubble_mowe_hash CHAR(64) AS (SHA2(battle_speech_bubble_mowe, 256)) STORED,
+                    battle_speech_bubble_mowe_z LONGBLOB,
+                    battle_speech_bubble_mowe_z_hash CHAR(64),
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
                 )
                 """
                 cursor.execute(create_table_query)
                 print("创建faust_launcher表格成功")
+            elif not _has_bubble_hash_columns(cursor):
+                _add_bubble_hash_columns(cursor)
+            _create_bubble_rows_table(cursor)
+            
+            # 创建表格之后开始事务，文件和条目一起更新
+            connection.begin()
+            
+            # 统一为条目合并后的格式，客户端合并条目后可以用校验和检查
+            contents = {column: _normalize_bubble_file(content) for (column, _), content
+                        in zip(BUBBLE_FILES, (battle_speech_file, cultivation_file, mowe_file))}
+            hashes = {column: _bubble_hash(content) for column, content in contents.items()}
             
             # 检查记录是否存在
-            cursor.execute("SELECT COUNT(*) as count FROM faust_launcher")
-            record_count = cursor.fetchone()['count'] # type: ignore
+            hash_columns = ', '.join(f"{column}_hash, {column}_z_hash" for column, _ in BUBBLE_FILES)
+            cursor.execute(f"SELECT {hash_columns} FROM faust_launcher WHERE id = 1")
+            record = cursor.fetchone()
+            
+            # 旧客户端仍然读取文本字段，文本字段和压缩内容一起更新；校验和由数据库计算
+            # 压缩内容已经过期（旧上传工具只更新了文本字段）时也重新上传
+            changed = [column for column in contents if not record
+                       or record[f"{column}_hash"] != hashes[column] or record[f"{column}_z_hash"] != hashes[column]]
+            values = []
+            for column in changed:
+                values += [contents[column],
+                           zlib.compress(contents[column].encode('utf-8'), BUBBLE_COMPRESS_LEVEL), hashes[column]]
+            names = [name for column in changed for name in (column, f"{column}_z", f"{column}_z_hash")]
             
-            if record_count == 0:
+            if not record:
                 # 插入新记录
-                insert_query = """
-                INSERT INTO faust_launcher (battle_speech_bubble, battle_speech_bubble_cultivation, battle_speech_bubble_mowe) 
-                VALUES (%s, %s, %s)
+                insert_query = f"""
+                INSERT INTO faust_launcher (id, {', '.join(names)}) 
+                VALUES (1, {', '.join(['%s'] * len(names))})
                 """
-                cursor.execute(insert_query, (battle_speech_file, cultivation_file, mowe_file))
+                cursor.execute(insert_query, values)
                 print("插入JSON文件记录成功")
-            else:
-                # 更新现有记录
-                update_query = """
+            elif changed:
+                # 只更新有变化的文件
+                update_query = f"""
                 UPDATE faust_launcher SET 
-                battle_speech_bubble = %s, 
-                battle_speech_bubble_cultivation = %s, 
-                battle_speech_bubble_mowe = %s 
+                {', '.join(f"{name} = %s" for name in names)} 
                 WHERE id = 1
                 """
-                cursor.execute(update_query, (battle_speech_file, cultivation_file, mowe_file))
-                print("更新JSON文件记录成功")
+                cursor.execute(update_query, values)
+                print(f"更新JSON文件记录成功，{len(changed)} 个文件有变化")
+            else:
+                print("JSON文件没有变化，不需要更新")
+            
+            # 按条目保存，新的客户端只下载有变化的条目
+            _upload_bubble_rows(cursor, {file_name: contents[column] for column, file_name in BUBBLE_FILES})
             
-            # 验证设置
-            cursor.execute("SELECT battle_speech_bubble, battle_speech_bubble_cultivation, battle_speech_bubble_mowe FROM faust_launcher WHERE id = 1")
+            # 验证设置（只读取校验和）
+            cursor.execute(f"SELECT {hash_columns} FROM faust_launcher WHERE id = 1")
             result = cursor.fetchone()
             
-            if result:
+            if result and all(result[f"{column}_hash"] == hashes[column] for column in hashes):
                 print(f"JSON文件设置成功")
-                print(f" - BattleSpeechBubbleDlg.json: {len(result['battle_speech_bubble'])} 字符")
-                print(f" - BattleSpeechBubbleDlg_Cultivation.json: {len(result['battle_speech_bubble_cultivation'])} 字符")
-                print(f" - BattleSpeechBubbleDlg_mowe.json: {len(result['battle_speech_bubble_mowe'])} 字符")
+                for column, file_name in BUBBLE_FILES:
+                    print(f" - {file_name}: {len(contents[column])} 字符")
         
         # 提交更改
         connection.commit()
@@ -95,9 +479,93 @@ def set_bubble_json_files(host, port, user, password, database, battle_speech_fi
         print(f"错误: {e}")
         return False
     finally:
-        # 确保连接关闭
-        if 'connection' in locals() and connection.open: # type: ignore
-            connection.close() # type: ignore
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
+
+def _query_bubble_json_files(connection):
+    """
+    在已有的连接上获取三个JSON文件的内容，不存在时返回(None, None, None)
+
+    先只查询校验和，本地保存的文件与校验和一致时直接使用。
+    有变化的文件先用按条目保存的气泡文本合并（只下载上次同步之后修改过的条目），
+    合并结果与校验和不一致或没有条目时下载这个文件的压缩内容
+    """
+    with connection.cursor() as cursor:
+        # 检查表格是否存在
+        cursor.execute("SHOW TABLES LIKE 'faust_launcher'")
+        table_exists = cursor.fetchone()
+        
+        if not table_exists:
+            print("⚠️ faust_launcher表格不存在")
+            return None, None, None
+        
+        contents = {}
+        remote_hashes = {column: None for column, _ in BUBBLE_FILES}
+        has_hash_columns = _has_bubble_hash_columns(cursor)
+        if has_hash_columns:
+            # 查询校验和
+            cursor.execute(f"SELECT {', '.join(f'{column}_hash' for column, _ in BUBBLE_FILES)} FROM faust_launcher WHERE id = 1")
+            result = cursor.fetchone()
+            if not result:
+                print("⚠️ JSON文件记录不存在")
+                return None, None, None
+            for column, file_name in BUBBLE_FILES:
+                remote_hashes[column] = result[f"{column}_hash"]
+                if remote_hashes[column]:
+                    cached = _read_bubble_cache(file_name, remote_hashes[column])
+                    if cached is not None:
+                        contents[column] = cached
+    
+    # 用条目合并有变化的文件，只使用与校验和一致的结果
+    if any(remote_hashes[column] and column not in contents for column, _ in BUBBLE_FILES):
+        rebuilt = _sync_bubble_rows(connection)
+        for column, file_name in BUBBLE_FILES:
+            if column in contents or not remote_hashes[column] or file_name not in rebuilt:
+                continue
+            if _bubble_hash(rebuilt[file_name]) == remote_hashes[column]:
+                contents[column] = rebuilt[file_name]
+                _write_bubble_cache(file_name, rebuilt[file_name])
+            else:
+                print(f"⚠️ {file_name} 按条目合并的内容与校验和不一致，下载整个文件")
+                discard_bubble_rows_cache()
+    
+    missing = [column for column, _ in BUBBLE_FILES if column not in contents]
+    result = {}
+    if missing:
+        with connection.cursor() as cursor:
+            if has_hash_columns:
+                # 压缩内容与文本字段不一致（旧的上传工具只更新了文本字段）时读取文本字段
+                fields = ', '.join(f"IF({column}_z_hash <=> {column}_hash, {column}_z, NULL) AS {column}_z, "
+                                   f"IF({column}_z_hash <=> {column}_hash, NULL, {column}) AS {column}"
+                                   for column in missing)
+            else:
+                # 服务器还没有校验和字段，下载完整的文本
+                fields = ', '.join(missing)
+            cursor.execute(f"SELECT {fields} FROM faust_launcher WHERE id = 1")
+            result = cursor.fetchone() or {}
+    
+    downloaded = 0
+    for column in missing:
+        blob = result.get(f"{column}_z")
+        content = zlib.decompress(blob).decode('utf-8') if blob is not None else result.get(column)
+        if not content:
+            continue
+        if remote_hashes[column] and _bubble_hash(content) != remote_hashes[column]:
+            print(f"⚠️ {column} 内容与校验和不一致")
+            return None, None, None
+        contents[column] = content
+        downloaded += len(blob) if blob is not None else len(content.encode('utf-8'))
+    
+    if all(contents.get(column) for column, _ in BUBBLE_FILES):
+        for column, file_name in BUBBLE_FILES:
+            if column in missing:
+                _write_bubble_cache(file_name, contents[column])
+        print(f"获取JSON文件成功，{len(missing)} 个文件下载整个文件，下载 {downloaded} bytes")
+        return tuple(contents[column] for column, _ in BUBBLE_FILES)
+    else:
+        print("⚠️ JSON文件字段为空或记录不存在")
+        return None, None, None
 
 def get_bubble_json_files(host, port, user, password, database):
     """
@@ -114,36 +582,10 @@ def get_bubble_json_files(host, port, user, password, database):
         tuple: (battle_speech_file, cultivation_file, mowe_file) 如果不存在则返回(None, None, None)
     """
     try:
-        # 连接MySQL数据库
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
         
-        with connection.cursor() as cursor:
-            # 检查表格是否存在
-            cursor.execute("SHOW TABLES LIKE 'faust_launcher'")
-            table_exists = cursor.fetchone()
-            
-            if not table_exists:
-                print("⚠️ faust_launcher表格不存在")
-                return None, None, None
-            
-            # 查询JSON文件字段
-            cursor.execute("SELECT battle_speech_bubble, battle_speech_bubble_cultivation, battle_speech_bubble_mowe FROM faust_launcher WHERE id = 1")
-            result = cursor.fetchone()
-            
-            if result and result['battle_speech_bubble'] and result['battle_speech_bubble_cultivation'] and result['battle_speech_bubble_mowe']:
-                print("获取JSON文件成功")
-                return result['battle_speech_bubble'], result['battle_speech_bubble_cultivation'], result['battle_speech_bubble_mowe']
-            else:
-                print("⚠️ JSON文件字段为空或记录不存在")
-                return None, None, None
+        return _query_bubble_json_files(connection)
         
     except pymysql.Error as e:
         print(f"MySQL错误: {e}")
@@ -152,9 +594,9 @@ def get_bubble_json_files(host, port, user, password, database):
         print(f"错误: {e}")
         return None, None, None
     finally:
-        # 确保连接关闭
-        if 'connection' in locals() and connection.open: # type: ignore
-            connection.close() # type: ignore
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
 
 def upload_bubble_files_from_temp(host, port, user, password, database, temp_dir=None):
     """
@@ -239,7 +681,21 @@ def download_bubble_files_to_game(host, port, user, password, database, game_pat
     """
     # 从数据库获取三个JSON文件内容
     print("正在从数据库获取JSON文件内容...")
-    battle_speech, cultivation, mowe = get_bubble_json_files(host, port, user, password, database)
+    bubble_files = get_bubble_json_files(host, port, user, password, database)
+    return save_bubble_files_to_game(bubble_files, game_path)
+
+def save_bubble_files_to_game(bubble_files, game_path):
+    """
+    把已经从数据库获取的三个JSON文件保存到游戏目录
+    
+    Args:
+        bubble_files: get_bubble_json_files 的返回值 (battle_speech_file, cultivation_file, mowe_file)
+        game_path: 游戏目录路径
+        
+    Returns:
+        bool: 保存是否成功
+    """
+    battle_speech, cultivation, mowe = bubble_files
     
     if not battle_speech or not cultivation or not mowe:
         print("无法从数据库获取JSON文件内容")
@@ -262,23 +718,18 @@ def download_bubble_files_to_game(host, port, user, password, database, game_pat
         # 确保目标目录存在
         os.makedirs(target_dir, exist_ok=True)
         
-        # 保存BattleSpeechBubbleDlg.json
-        battle_speech_path = os.path.join(target_dir, 'BattleSpeechBubbleDlg.json')
-        with open(battle_speech_path, 'w', encoding='utf-8') as f:
-            f.write(battle_speech)
-        print(f"保存 BattleSpeechBubbleDlg.json 成功")
-        
-        # 保存BattleSpeechBubbleDlg_Cultivation.json
-        cultivation_path = os.path.join(target_dir, 'BattleSpeechBubbleDlg_Cultivation.json')
-        with open(cultivation_path, 'w', encoding='utf-8') as f:
-            f.write(cultivation)
-        print(f"保存 BattleSpeechBubbleDlg_Cultivation.json 成功")
-        
-        # 保存BattleSpeechBubbleDlg_mowe.json
-        mowe_path = os.path.join(target_dir, 'BattleSpeechBubbleDlg_mowe.json')
-        with open(mowe_path, 'w', encoding='utf-8') as f:
-            f.write(mowe)
-        print(f"保存 BattleSpeechBubbleDlg_mowe.json 成功")
+        for file_name, content in zip([file_name for _, file_name in BUBBLE_FILES], bubble_files):
+            file_path = os.path.join(target_dir, file_name)
+            data = content.encode('utf-8')
+            # 内容相同时不重新写入
+            if os.path.exists(file_path) and os.path.getsize(file_path) == len(data):
+                with open(file_path, 'rb') as f:
+                    if f.read() == data:
+                        print(f"{file_name} 没有变化")
+                        continue
+            with open(file_path, 'wb') as f:
+                f.write(data)
+            print(f"保存 {file_name} 成功")
         
         print(f"JSON文件已成功保存到: {target_dir}")
         return True
@@ -319,16 +770,8 @@ def get_all_records(host, port, user, password, database):
         list: 所有记录的列表
     """
     try:
-        # 连接MySQL数据库
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
         
         with connection.cursor() as cursor:
             # 检查表格是否存在
@@ -353,9 +796,9 @@ def get_all_records(host, port, user, password, database):
         print(f"错误: {e}")
         return []
     finally:
-        # 确保连接关闭
-        if 'connection' in locals() and connection.open: # type: ignore
-            connection.close() # type: ignore
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
 
 def create_version_table(host, port, user, password, database):
     """
@@ -372,16 +815,8 @@ def create_version_table(host, port, user, password, database):
         bool: 创建是否成功
     """
     try:
-        # 连接MySQL数据库
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
         
         with connection.cursor() as cursor:
             # 检查表格是否存在
@@ -415,9 +850,9 @@ def create_version_table(host, port, user, password, database):
         print(f"错误: {e}")
         return False
     finally:
-        # 确保连接关闭
-        if 'connection' in locals() and connection.open: # type: ignore
-            connection.close() # type: ignore
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
 
 def add_version(host, port, user, password, database, version_name, bilibili_url, version_description, is_latest=False):
     """
@@ -438,18 +873,12 @@ def add_version(host, port, user, password, database, version_name, bilibili_url
         bool: 添加是否成功
     """
     try:
-        # 连接MySQL数据库
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
         
         with connection.cursor() as cursor:
+            # 连接池的连接默认自动提交，修改多条记录时使用事务
+            connection.begin()
             # 如果设置为最新版本，先取消其他版本的最新标记
             if is_latest:
                 cursor.execute("UPDATE faust_versions SET is_latest = FALSE WHERE is_latest = TRUE")
@@ -474,9 +903,9 @@ def add_version(host, port, user, password, database, version_name, bilibili_url
         print(f"错误: {e}")
         return False
     finally:
-        # 确保连接关闭
-        if 'connection' in locals() and connection.open: # type: ignore
-            connection.close() # type: ignore
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
 
 def update_version(host, port, user, password, database, version_id, version_name, bilibili_url, version_description, is_latest=False):
     """
@@ -498,18 +927,12 @@ def update_version(host, port, user, password, database, version_id, version_nam
         bool: 更新是否成功
     """
     try:
-        # 连接MySQL数据库
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
         
         with connection.cursor() as cursor:
+            # 连接池的连接默认自动提交，修改多条记录时使用事务
+            connection.begin()
             # 如果设置为最新版本，先取消其他版本的最新标记
             if is_latest:
                 cursor.execute("UPDATE faust_versions SET is_latest = FALSE WHERE is_latest = TRUE AND id != %s", (version_id,))
@@ -539,9 +962,9 @@ def update_version(host, port, user, password, database, version_id, version_nam
         print(f"错误: {e}")
         return False
     finally:
-        # 确保连接关闭
-        if 'connection' in locals() and connection.open: # type: ignore
-            connection.close() # type: ignore
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
 
 def delete_version(host, port, user, password, database, version_id):
     """
@@ -559,16 +982,8 @@ def delete_version(host, port, user, password, database, version_id):
         bool: 删除是否成功
     """
     try:
-        # 连接MySQL数据库
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
         
         with connection.cursor() as cursor:
             # 删除版本信息
@@ -588,9 +1003,9 @@ def delete_version(host, port, user, password, database, version_id):
         print(f"错误: {e}")
         return False
     finally:
-        # 确保连接关闭
-        if 'connection' in locals() and connection.open: # type: ignore
-            connection.close() # type: ignore
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
 
 def get_all_versions(host, port, user, password, database):
     """
@@ -607,16 +1022,8 @@ def get_all_versions(host, port, user, password, database):
         list: 所有版本信息的列表
     """
     try:
-        # 连接MySQL数据库
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
         
         with connection.cursor() as cursor:
             # 查询所有版本信息
@@ -633,9 +1040,22 @@ def get_all_versions(host, port, user, password, database):
         print(f"错误: {e}")
         return []
     finally:
-        # 确保连接关闭
-        if 'connection' in locals() and connection.open: # type: ignore
-            connection.close() # type: ignore
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
+
+def _query_latest_version(connection):
+    """在已有的连接上查询最新版本信息，不存在时返回None"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT * FROM faust_versions WHERE is_latest = TRUE ORDER BY created_at DESC LIMIT 1")
+        result = cursor.fetchone()
+        
+        if result:
+            print(f"获取最新版本信息: {result['version_name']}")
+            return result
+        else:
+            print("⚠️ 没有设置最新版本")
+            return None
 
 def get_latest_version(host, port, user, password, database):
     """
@@ -652,28 +1072,10 @@ def get_latest_version(host, port, user, password, database):
         dict: 最新版本信息，如果不存在则返回None
     """
     try:
-        # 连接MySQL数据库
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
         
-        with connection.cursor() as cursor:
-            # 查询最新版本信息
-            cursor.execute("SELECT * FROM faust_versions WHERE is_latest = TRUE ORDER BY created_at DESC LIMIT 1")
-            result = cursor.fetchone()
-            
-            if result:
-                print(f"获取最新版本信息: {result['version_name']}")
-                return result
-            else:
-                print("⚠️ 没有设置最新版本")
-                return None
+        return _query_latest_version(connection)
         
     except pymysql.Error as e:
         print(f"MySQL错误: {e}")
@@ -682,9 +1084,9 @@ def get_latest_version(host, port, user, password, database):
         print(f"错误: {e}")
         return None
     finally:
-        # 确保连接关闭
-        if 'connection' in locals() and connection.open: # type: ignore
-            connection.close() # type: ignore
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
 
 def get_version_by_id(host, port, user, password, database, version_id):
     """
@@ -702,16 +1104,8 @@ def get_version_by_id(host, port, user, password, database, version_id):
         dict: 版本信息，如果不存在则返回None
     """
     try:
-        # 连接MySQL数据库
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 从连接池取出连接
+        connection = get_pool(host, port, user, password, database).acquire()
         
         with connection.cursor() as cursor:
             # 根据ID查询版本信息
@@ -732,9 +1126,9 @@ def get_version_by_id(host, port, user, password, database, version_id):
         print(f"错误: {e}")
         return None
     finally:
-        # 确保连接关闭
-        if 'connection' in locals() and connection.open: # type: ignore
-            connection.close() # type: ignore
+        # 连接放回连接池
+        if 'connection' in locals():
+            get_pool(host, port, user, password, database).release(connection) # type: ignore
 
 # GUI界面类
 class VersionManagerGUI:
@@ -969,6 +1363,65 @@ def run_version_manager_gui():
     app = VersionManagerGUI(root, db_config)
     root.mainloop()
 
+class LaunchQueries:
+    """
+    启动时的数据库查询：在后台线程中用同一个连接依次查询最新版本信息和气泡文本
+
+    版本信息查询完成后 version_future 立即可用，不需要等待气泡文本下载完成
+    """
+
+    def __init__(self, include_bubbles: bool = False):
+        self.include_bubbles = include_bubbles
+        self.version_future = Future()
+        self.bubble_future = Future()
+        self.version_taken = False
+        self.bubble_taken = False
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            with get_pool(**db_config).connection() as connection:
+                self.version_future.set_result(_query_latest_version(connection))
+                if self.include_bubbles:
+                    self.bubble_future.set_result(_query_bubble_json_files(connection))
+        except Exception as e:
+            print(f"启动时查询数据库失败: {e}")
+        finally:
+            # 查询失败时返回与单独查询失败时相同的结果
+            if not self.version_future.done():
+                self.version_future.set_result(None)
+            if not self.bubble_future.done():
+                self.bubble_future.set_result((None, None, None))
+
+_launch_queries: LaunchQueries | None = None
+
+def start_launch_queries(include_bubbles=False) -> LaunchQueries:
+    """
+    开始启动时的数据库查询
+
+    Args:
+        include_bubbles: 是否同时获取气泡文本（启动后马上下载汉化时）
+    """
+    global _launch_queries
+    _launch_queries = LaunchQueries(include_bubbles)
+    return _launch_queries
+
+def take_launch_version_future() -> Future | None:
+    """取出启动时已经开始查询的最新版本信息，只能取出一次，之后检查更新时重新查询"""
+    queries = _launch_queries
+    if queries is None or queries.version_taken:
+        return None
+    queries.version_taken = True
+    return queries.version_future
+
+def take_launch_bubble_future() -> Future | None:
+    """取出启动时已经开始获取的气泡文本，只能取出一次，之后的更新重新查询"""
+    queries = _launch_queries
+    if queries is None or not queries.include_bubbles or queries.bubble_taken:
+        return None
+    queries.bubble_taken = True
+    return queries.bubble_future
+
 def check_new_version(current_version_name):
     """
     检测是否有新版本
@@ -987,8 +1440,12 @@ def check_new_version(current_version_name):
                latest_version_info: 最新版本信息字典，如果没有新版本则为None
     """
     try:
-        # 获取最新版本信息
-        latest_version = get_latest_version(**db_config)
+        # 获取最新版本信息，启动时的第一次检查直接使用启动时的查询结果
+        version_future = take_launch_version_future()
+        if version_future is not None:
+            latest_version = version_future.result()
+        else:
+            latest_version = get_latest_version(**db_config)
         
         if not latest_version:
             # 没有设置最新版本
@@ -1011,12 +1468,13 @@ def check_new_version(current_version_name):
         print(f"检测新版本时出错: {e}")
         return False, None
 
-def notify_new_version(current_version_name):
+def notify_new_version(current_version_name, latest_info=None):
     """
     检测并通知新版本（带GUI弹窗）
     
     Args:
         current_version_name: 当前版本名称
+        latest_info: 已经用 check_new_version 获取的新版本信息，不为None时不再重新检测
     """
     try:
         # 导入tkinter用于显示消息框
@@ -1024,7 +1482,10 @@ def notify_new_version(current_version_name):
         from tkinter import messagebox
         
         # 检测新版本
-        has_new_version, latest_info = check_new_version(current_version_name=current_version_name)
+        if latest_info is not None:
+            has_new_version = True
+        else:
+            has_new_version, latest_info = check_new_version(current_version_name=current_version_name)
         
         if has_new_version and latest_info:
             # 创建隐藏的根窗口
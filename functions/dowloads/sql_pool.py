@@ -0,0 +1,123 @@
+"""
+这个模块管理 MySQL 连接，避免每次查询都重新建立连接（TCP 和登录握手）。
+
+每组连接参数对应一个连接池，用完的连接放回池中供下一次查询使用。
+空闲一段时间的连接在取出时先 ping 检查，断开的连接直接丢弃并重新连接。
+连接和读写都有较短的超时，数据库无法访问时不会长时间卡住启动。
+连接使用自动提交，复用的连接不会读到旧的事务快照。
+
+函数：
+    - `get_pool(host, port, user, password, database)`: 获取连接参数对应的连接池。
+    - `ConnectionPool.acquire()` / `ConnectionPool.release(connection)`: 取出和放回连接。
+    - `ConnectionPool.connection()`: 取出连接的上下文管理器，结束时自动放回。
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+WRITE_TIMEOUT = 30
+# 连接池中最多保留的空闲连接数
+POOL_SIZE = 2
+# 空闲超过这个时间（秒）的连接取出时先 ping 检查
+HEALTH_CHECK_IDLE = 30
+# 空闲超过这个时间（秒）的连接直接关闭，服务器可能已经断开
+MAX_IDLE = 300
+
+
+class ConnectionPool:
+    """一组连接参数的 MySQL 连接池"""
+
+    def __init__(self, host, port, user, password, database):
+        self.params = dict(host=host, port=port, user=user, password=password, database=database)
+        self.lock = threading.Lock()
+        self.idle: List[Tuple[pymysql.connections.Connection, float]] = []
+
+    def _connect(self) -> pymysql.connections.Connection:
+        return pymysql.connect(
+            **self.params,
+            charset='utf8mb4',
+            cursorclass=pymysql.cursors.DictCursor,
+            autocommit=True,
+            connect_timeout=CONNECT_TIMEOUT,
+            read_timeout=READ_TIMEOUT,
+            write_timeout=WRITE_TIMEOUT,
+        )
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self) -> pymysql.connections.Connection:
+        """取出一个可用的连接，没有空闲连接时新建"""
+        while True:
+            with self.lock:
+                if not self.idle:
+                    break
+                connection, released_at = self.idle.pop()
+            idle_time = time.time() - released_at
+            if idle_time > MAX_IDLE or not connection.open:
+                self._close(connection)
+                continue
+            if idle_time > HEALTH_CHECK_IDLE:
+                try:
+                    connection.ping(reconnect=False)
+                except pymysql.Error:
+                    self._close(connection)
+                    continue
+            return connection
+        return self._connect()
+
+    def release(self, connection):
+        """放回连接，回滚没有提交的事务；连接已断开或空闲连接已满时关闭"""
+        if connection is None or not connection.open:
+            return
+        if connection.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+            try:
+                connection.rollback()
+            except pymysql.Error:
+                self._close(connection)
+                return
+        with self.lock:
+            if len(self.idle) < POOL_SIZE:
+                self.idle.append((connection, time.time()))
+                return
+        self._close(connection)
+
+    @contextmanager
+    def connection(self):
+        """取出连接，结束时放回连接池"""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection, _ in idle:
+            self._close(connection)
+
+
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(host, port, user, password, database) -> ConnectionPool:
+    """获取连接参数对应的连接池"""
+    key = (host, port, user, password, database)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(host, port, user, password, database)
+        return pool
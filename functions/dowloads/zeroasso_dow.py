@@ -1,17 +1,22 @@
 import os
 import requests
-import subprocess
 import tkinter as tk
 from tkinter import ttk
 import threading
+import queue
 import time
+from concurrent.futures import ThreadPoolExecutor
 from functions.dowloads.github_ulits import GitHubReleaseFetcher
-from functions.dowloads.dow_ulits import check_need_up_translate
+from functions.dowloads.dow_ulits import check_need_up_translate, get_installed_translate_version
+from functions.dowloads.http_ulits import download_file as download_file_fast
+from functions.dowloads.extract_ulits import extract_selective, forget_manifest
+from functions.dowloads.extract_backends import extract_archive
+from functions.dowloads.archive_store import get_archive_store
 from functions.settings_manager import get_settings_manager
 from functions.window_ulits import center_window
+from functions.launch_trace import trace_span
+from webFunc.DeltaPackage import apply_delta
 
-# 7-Zip可执行文件路径
-SEVEN_ZIP_PATH = r"7-Zip\7z.exe"
 settings_manager = get_settings_manager()
 
 class DownloadGUI:
@@ -232,8 +237,8 @@ class DownloadGUI:
         finally:
             self.is_downloading = False
 
-def get_github_release_url() -> tuple[str, str] | None:
-    """从GitHub Release获取7z文件下载链接"""
+def get_github_release_url() -> tuple[str, str, str] | None:
+    """从GitHub Release获取7z文件下载链接、版本名和SHA-256（GitHub没有提供摘要时为空）"""
     try:
         fetcher = GitHubReleaseFetcher(
             repo_owner="LocalizeLimbusCompany",
@@ -244,119 +249,48 @@ def get_github_release_url() -> tuple[str, str] | None:
         
         latest_release = fetcher.get_latest_release()
         if not latest_release:
-            return None, None # type: ignore
+            return None, None, '' # type: ignore
             
         # 查找7z文件
         windows_assets = latest_release.get_assets_by_extension(".7z")
         for asset in windows_assets:
             if "LimbusLocalize" in asset.name:
-                return asset.download_url, latest_release.name
+                return asset.download_url, latest_release.name, asset.sha256
                 
-        return None, None # type: ignore
+        return None, None, '' # type: ignore
     except Exception as e:
         print(f"获取GitHub Release失败: {e}")
-        return None, None # type: ignore
+        return None, None, '' # type: ignore
 
 
 # 保留原有的函数（用于命令行模式）
 def download_file(url, local_filename):
-    """下载文件并显示进度"""
+    """下载文件并显示进度（支持分段下载和断点续传）"""
+    def show_progress(downloaded_size, total_size):
+        # 显示下载进度
+        if total_size > 0:
+            percent = (downloaded_size / total_size) * 100
+            print(f"\r下载进度: {percent:.1f}% ({downloaded_size}/{total_size} bytes)", end='')
+
     try:
-        # 发送请求
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        # 获取文件大小
-        total_size = int(response.headers.get('content-length', 0))
-        block_size = 8192
-        
-        # 创建目录
-        os.makedirs(os.path.dirname(local_filename), exist_ok=True)
-        
-        # 下载文件
-        with open(local_filename, 'wb') as f:
-            downloaded_size = 0
-            for chunk in response.iter_content(chunk_size=block_size):
-                if chunk:
-                    f.write(chunk)
-                    downloaded_size += len(chunk)
-                    
-                    # 显示下载进度
-                    if total_size > 0:
-                        percent = (downloaded_size / total_size) * 100
-                        print(f"\r下载进度: {percent:.1f}% ({downloaded_size}/{total_size} bytes)", end='')
+        if not download_file_fast(url, local_filename, progress_callback=show_progress):
+            return False
         
         print("\n下载完成!")
         return True
         
-    except requests.exceptions.RequestException as e:
-        print(f"下载失败: {e}")
-        return False
     except Exception as e:
         print(f"下载过程中出现错误: {e}")
         return False
 
-def extract_with_7zip(archive_path, extract_path):
-    """使用系统7zip解压（直接使用本地7z.exe）"""
-    try:
-        # 检查7z.exe是否存在
-        if not os.path.exists(SEVEN_ZIP_PATH):
-            print(f"错误: 7-Zip可执行文件不存在: {SEVEN_ZIP_PATH}")
-            return False
-        
-        print(f"使用本地7-Zip解压: {SEVEN_ZIP_PATH}")
-        
-        # 确保目标目录存在
-        os.makedirs(extract_path, exist_ok=True)
-        
-        # 检查文件大小，确保下载完整
-        file_size = os.path.getsize(archive_path)
-        if file_size < 1000:  # 如果文件太小，可能下载不完整
-            print(f"警告: 压缩文件可能不完整，大小: {file_size} bytes")
-            return False
-        
-        # 使用7z.exe解压
-        result = subprocess.run([
-            SEVEN_ZIP_PATH, 
-            'x',           # 解压命令
-            archive_path,   # 压缩文件路径
-            f'-o{extract_path}',  # 输出目录
-            '-y',          # 确认所有操作
-            '-r'           # 递归处理子目录
-        ], capture_output=True, text=True, encoding='utf-8', creationflags=subprocess.CREATE_NO_WINDOW)
-        
-        if result.returncode == 0:
-            print("7-Zip解压成功!")
-            return True
-        else:
-            print(f"7-Zip解压失败，返回码: {result.returncode}")
-            print(f"错误输出: {result.stderr}")
-            return False
-            
-    except Exception as e:
-        print(f"7-Zip解压失败: {e}")
-        return False
-
-def extract_with_zipfile_backup(archive_path, extract_path):
-    """备用方案：使用Python内置zipfile"""
-    import zipfile
-    try:
-        print("尝试使用zipfile作为备用方案...")
-        
-        # 检查是否为zip格式
-        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_path)
-        print("zipfile解压成功!")
-        return True
-    except zipfile.BadZipFile:
-        print("文件不是zip格式，无法使用zipfile解压")
-        return False
-    except Exception as e:
-        print(f"zipfile解压失败: {e}")
-        return False
-
-def extract_7z_file(archive_path, extract_path):
-    """解压7z文件（主函数）"""
+def extract_7z_file(archive_path, extract_path, subtree='', compare_path=None, always=(), progress_callback=None):
+    """
+    解压7z文件（主函数）
+    
+    根据压缩包格式和测速结果选择解压后端（见 extract_backends），失败时换下一个后端。
+    指定 subtree 或 compare_path 时只解压压缩包中 subtree 目录下有变化的文件（见 extract_ulits），
+    无法读取文件列表时解压全部文件
+    """
     print(f"开始解压文件到: {extract_path}")
     
     # 检查文件是否存在
@@ -364,13 +298,20 @@ def extract_7z_file(archive_path, extract_path):
         print(f"错误: 压缩文件不存在: {archive_path}")
         return False
     
-    # 优先使用本地7-Zip
-    if extract_with_7zip(archive_path, extract_path):
-        return True
-    
-    # 如果7-Zip失败，尝试使用zipfile作为备用方案
-    print("7-Zip解压失败，尝试使用zipfile备用方案...")
-    return extract_with_zipfile_backup(archive_path, extract_path)
+    try:
+        if subtree or compare_path:
+            if extract_selective(archive_path, extract_path, subtree, compare_path, always,
+                                 progress_callback) is not None:
+                return True
+            print("选择性解压失败，解压全部文件...")
+        
+        if extract_archive(archive_path, extract_path, progress_callback=progress_callback):
+            print("解压成功!")
+            return True
+        return False
+    except Exception as e:
+        print(f"解压失败: {e}")
+        return False
 
 def create_config_file(game_path):
     """创建配置文件"""
@@ -442,81 +383,110 @@ def verify_download(file_path):
         print(f"文件验证失败: {e}")
         return False
     
-def download_file_with_gui(url, local_filename, gui, file_name):
-    """带GUI进度显示的下载文件函数"""
-    try:
-        # 更新GUI状态
-        gui.current_file_var.set(f"正在下载: {file_name}")
-        
-        # 发送请求
-        response = requests.get(url, stream=True, verify=False)
-        response.raise_for_status()
-        
-        # 获取文件大小
-        total_size = int(response.headers.get('content-length', 0))
-        if total_size == 0:
-            # 如果无法获取文件大小，使用默认值
-            total_size = 10 * 1024 * 1024  # 10MB作为默认值
-        
-        block_size = 8192
-        
-        # 创建目录
-        os.makedirs(os.path.dirname(local_filename), exist_ok=True)
-        
-        # 开始时间
+class DownloadProgress:
+    """
+    汇总多个同时下载的文件的进度，显示在同一个进度条上
+
+    各文件的已下载大小和总大小相加后计算百分比和速度，进度条平滑地向目标百分比移动。
+    回调来自多个下载线程，更新界面时加锁。
+    """
+
+    animation_speed = 0.15  # 动画速度系数，值越小越平滑
+
+    def __init__(self, gui):
+        self.gui = gui
+        self.lock = threading.Lock()
+        self.files = {}  # 文件名 -> [已下载字节数, 总字节数]
+        self.active = []
         start_time = time.time()
-        downloaded_size = 0
-        last_update_time = start_time
-        last_downloaded_size = 0
-        
+        self.last_update_time = start_time
+        self.last_downloaded_size = None
         # 平滑进度条相关变量
-        current_animated_percent = 0.0  # 当前动画显示的百分比
-        target_percent = 0.0  # 目标百分比
-        animation_speed = 0.15  # 动画速度系数，值越小越平滑
-        last_animation_time = start_time
-        
-        # 下载文件
-        with open(local_filename, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=block_size):
-                if not gui.is_downloading:
-                    return False
-                    
-                if chunk:
-                    speed = 0
-                    f.write(chunk)
-                    downloaded_size += len(chunk)
-                    
-                    # 计算实时下载速度（每秒更新）
-                    current_time = time.time()
-
-                    elapsed_time = current_time - last_update_time
-                    downloaded_since_last = downloaded_size - last_downloaded_size
-                    
-                    speed = downloaded_since_last / elapsed_time / 1024  # KB/s
-                    
-                    # 计算目标百分比
-                    target_percent = (downloaded_size / total_size) * 100
-                        
-                    # 平滑渐变效果：持续向目标百分比移动
-                    animation_elapsed = current_time - last_animation_time
-                    if animation_elapsed > 0.1:  # 每0.1秒更新一次动画
-                        if current_animated_percent < target_percent:
-                            # 使用缓动函数实现平滑过渡
-                            progress_diff = target_percent - current_animated_percent
-                            current_animated_percent += progress_diff * animation_speed
-                            
-                            # 确保不超过目标值
-                            if current_animated_percent > target_percent:
-                                current_animated_percent = target_percent
-                        
-                        # 显示下载进度（使用平滑后的百分比）
-                        gui.update_progress(current_animated_percent, downloaded_size, total_size, speed)
-                        last_animation_time = current_time
-                    
-                    last_update_time = current_time
-                    last_downloaded_size = downloaded_size
-        
-        # 下载完成后，平滑过渡到100%并停止震动
+        self.current_animated_percent = 0.0  # 当前动画显示的百分比
+        self.target_percent = 0.0  # 目标百分比
+        self.last_animation_time = start_time
+
+    @property
+    def downloaded_size(self) -> int:
+        return sum(downloaded for downloaded, total in self.files.values())
+
+    @property
+    def total_size(self) -> int:
+        return sum(total for downloaded, total in self.files.values())
+
+    def start(self, file_name: str):
+        """开始下载一个文件"""
+        with self.lock:
+            self.active.append(file_name)
+            self.files.setdefault(file_name, [0, 0])
+            self.gui.current_file_var.set(f"正在下载: {'、'.join(self.active)}")
+
+    def done(self, file_name: str):
+        """一个文件下载结束"""
+        with self.lock:
+            if file_name in self.active:
+                self.active.remove(file_name)
+            if self.active:
+                self.gui.current_file_var.set(f"正在下载: {'、'.join(self.active)}")
+
+    def discard(self, file_name: str):
+        """放弃一个文件（例如下载失败后改为下载其他文件），不再计入总进度"""
+        with self.lock:
+            if file_name in self.active:
+                self.active.remove(file_name)
+            self.files.pop(file_name, None)
+
+    def update(self, file_name: str, downloaded_size: int, total_size: int):
+        """更新一个文件的进度"""
+        with self.lock:
+            if total_size == 0:
+                # 如果无法获取文件大小，使用默认值
+                total_size = 10 * 1024 * 1024  # 10MB作为默认值
+            self.files[file_name] = [downloaded_size, total_size]
+            downloaded_size = self.downloaded_size
+            total_size = self.total_size
+
+            # 续传时从已下载的位置开始计算速度
+            if self.last_downloaded_size is None:
+                self.last_downloaded_size = downloaded_size
+
+            # 计算实时下载速度
+            current_time = time.time()
+
+            elapsed_time = max(current_time - self.last_update_time, 1e-6)
+            downloaded_since_last = downloaded_size - self.last_downloaded_size
+
+            speed = downloaded_since_last / elapsed_time / 1024  # KB/s
+
+            # 计算目标百分比
+            self.target_percent = (downloaded_size / total_size) * 100
+
+            # 平滑渐变效果：持续向目标百分比移动
+            animation_elapsed = current_time - self.last_animation_time
+            if animation_elapsed > 0.1:  # 每0.1秒更新一次动画
+                if self.current_animated_percent < self.target_percent:
+                    # 使用缓动函数实现平滑过渡
+                    progress_diff = self.target_percent - self.current_animated_percent
+                    self.current_animated_percent += progress_diff * self.animation_speed
+
+                    # 确保不超过目标值
+                    if self.current_animated_percent > self.target_percent:
+                        self.current_animated_percent = self.target_percent
+
+                # 显示下载进度（使用平滑后的百分比）
+                self.gui.update_progress(self.current_animated_percent, downloaded_size, total_size, speed)
+                self.last_animation_time = current_time
+
+            self.last_update_time = current_time
+            self.last_downloaded_size = downloaded_size
+
+    def finish(self):
+        """全部下载完成后，平滑过渡到100%"""
+        current_animated_percent = self.current_animated_percent
+        target_percent = self.target_percent
+        downloaded_size = self.downloaded_size
+        total_size = self.total_size
+
         final_animation_start = time.time()
         while current_animated_percent < 99.9:
             current_time = time.time()
@@ -525,34 +495,61 @@ def download_file_with_gui(url, local_filename, gui, file_name):
             # 平滑过渡到100%
             if current_animated_percent < target_percent:
                 progress_diff = target_percent - current_animated_percent
-                current_animated_percent += progress_diff * animation_speed * 2  # 加速完成
+                current_animated_percent += progress_diff * self.animation_speed * 2  # 加速完成
             else:
                 # 如果已经达到目标值，继续平滑到100%
                 progress_diff = 100 - current_animated_percent
-                current_animated_percent += progress_diff * animation_speed * 1.5
+                current_animated_percent += progress_diff * self.animation_speed * 1.5
             
             if current_animated_percent > 99.9:
                 current_animated_percent = 100
             
-            gui.update_progress(current_animated_percent, downloaded_size, total_size, 0)
+            self.gui.update_progress(current_animated_percent, downloaded_size, total_size, 0)
             time.sleep(0.01)  # 短暂延迟让动画更平滑
             
             # 防止无限循环
             if animation_elapsed > 2.0:  # 最多2秒完成动画
                 current_animated_percent = 100
                 break
-        
+        self.current_animated_percent = current_animated_percent
+
+def download_file_with_gui(url, local_filename, gui, file_name, expected_sha256='', progress=None):
+    """
+    带GUI进度显示的下载文件函数（支持分段下载和断点续传，提供SHA-256时边下载边校验）
+
+    同时下载多个文件时传入同一个 DownloadProgress，进度条显示所有文件的总进度，
+    由调用者在全部完成后调用 progress.finish()
+    """
+    own_progress = progress is None
+    if own_progress:
+        progress = DownloadProgress(gui)
+    try:
+        progress.start(file_name)
+
+        # 下载文件，服务器支持时多连接分段下载，连接中断时自动续传，取消下载时保留已下载的部分
+        if not download_file_fast(url, local_filename,
+                                  progress_callback=lambda downloaded, total: progress.update(file_name, downloaded, total),
+                                  should_continue=lambda: gui.is_downloading, verify=False,
+                                  expected_sha256=expected_sha256):
+            gui.current_file_var.set(f"❌ 下载失败: {file_name}")
+            return False
+
+        progress.done(file_name)
+        # 下载完成后，平滑过渡到100%
+        if own_progress:
+            progress.finish()
         return True
         
-    except requests.exceptions.RequestException as e:
-        gui.current_file_var.set(f"❌ 下载失败: {e}")
-        # print(e)
-        return False
     except Exception as e:
         gui.current_file_var.set(f"❌ 下载过程中出现错误: {e}")
         # print(e)
+        return False
 
-def get_dowload_path_ByNote() -> tuple[str, str] | None:
+def get_dowload_path_ByNote() -> tuple[str, str, str, dict] | None:
+    """
+    从镜像配置获取下载地址、版本号、SHA-256（旧的配置没有摘要时为空）
+    和增量包 {旧版本: {'direct', 'web', 'sha256', 'size'}}
+    """
     from webFunc import Note
     from json import loads
     note = Note("FaustLauncher", 'AutoTranslate')
@@ -561,16 +558,231 @@ def get_dowload_path_ByNote() -> tuple[str, str] | None:
     # print("获取到笔记内容:", note.note_content)
     note = loads(note.note_content)
     path = note['llc_download_mirror']['seven']['direct']
+    sha256 = note['llc_download_mirror']['seven'].get('sha256', '')
     version = note['llc_version']
+    deltas = note.get('llc_delta', {})
 
     if path:
         print(f"成功获取到下载地址: {path}")
-        return (path, version)
+        return (path, version, sha256, deltas)
     print("未获取到下载地址,失败...")
     return None
     
+class ExtractStage:
+    """
+    后台解压线程
+
+    下载完成的文件通过有界队列交给解压线程，下载线程不需要等待解压完成就可以继续下载下一个文件。
+    """
+
+    def __init__(self, extract_path: str, max_pending: int = 1, progress_callback=None):
+        self.extract_path = extract_path
+        self.progress_callback = progress_callback
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.success_count = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, archive_path: str, name: str, keep: bool = False, **options):
+        """
+        提交一个待解压的文件，队列已满时等待
+
+        Args:
+            keep: 解压后保留文件（压缩包仓库中的文件），否则作为临时文件删除
+            options: 传给 extract_7z_file
+        """
+        self.queue.put((archive_path, name, keep, options))
+
+    def run(self):
+        """依次解压队列中的文件，解压后清理临时文件"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            archive_path, name, keep, options = item
+            try:
+                with trace_span('extract.' + name, 'download', bytes=os.path.getsize(archive_path)):
+                    if extract_7z_file(archive_path, self.extract_path, progress_callback=self.progress_callback,
+                                       **options):
+                        self.success_count += 1
+            except Exception as e:
+                print(e)
+            finally:
+                # 清理临时文件
+                if not keep:
+                    cleanup_temp_files(archive_path)
+
+    def close(self) -> int:
+        """等待所有文件解压完成，返回解压成功的数量"""
+        self.queue.put(None)
+        self.thread.join()
+        return self.success_count
+
+def resolve_translation_url(gui, dowload_way) -> dict | None:
+    """
+    获取零协会汉化包的下载地址
+
+    Returns:
+        {'url', 'version', 'sha256', 'deltas'}，失败时返回 None；
+        deltas 为 {旧版本: 增量包信息}，只有镜像配置提供
+    """
+    if dowload_way == 1:
+        print("使用 GitHub Release 方式下载汉化文件...")
+
+        for timeout_counter in range(10):
+            with trace_span('download.resolve_url', 'download'):
+                dowload_url, name, sha256 = get_github_release_url() # type: ignore
+            if dowload_url:
+                print (f"获取到下载链接: {dowload_url}\n 零协汉化版本号: {name}")
+                return {'url': dowload_url, 'version': name, 'sha256': sha256, 'deltas': {}}
+            if not gui.is_downloading:
+                return None
+            gui.current_file_var.set(f"❌ 获取GitHub Release信息失败，准备重试...\n(剩余次数 {9 - timeout_counter})")
+            time.sleep(1)
+
+        gui.current_file_var.set("❌ 获取GitHub Release信息失败，已达最大重试次数")
+        return None
+
+    elif dowload_way == 0:
+        print("使用upfile下载汉化文件...")
+
+        with trace_span('download.resolve_url', 'download'):
+            result = get_dowload_path_ByNote()
+        if result:
+            dowload_url, version, sha256, deltas = result
+            print (f"获取到下载链接: {dowload_url}\n 零协汉化版本号: {version}")
+            return {'url': dowload_url, 'version': version, 'sha256': sha256, 'deltas': deltas}
+
+        gui.current_file_var.set("❌ 获取upfile下载地址失败")
+        return None
+
+    gui.current_file_var.set(f"❌ 未知的汉化下载方式: {dowload_way}")
+    return None
+
+def apply_translation_delta(resolved, gui, temp_dir, progress, target_dir) -> bool:
+    """
+    有从已安装版本到新版本的增量包时下载并应用到已安装的汉化文件
+
+    Returns:
+        是否更新成功，失败时由调用者下载完整的汉化包
+    """
+    installed_version = get_installed_translate_version(target_dir)
+    delta = resolved.get('deltas', {}).get(installed_version)
+    if not installed_version or not delta or not delta.get('direct'):
+        return False
+
+    print(f"使用增量更新: {installed_version} -> {resolved['version']}")
+    file_name = '零协会汉化增量包'
+    temp_file = os.path.join(temp_dir, 'LimbusLocalize_delta.zip')
+    try:
+        with trace_span('download.delta', 'download') as info:
+            if not download_file_with_gui(delta['direct'], temp_file, gui, file_name,
+                                          delta.get('sha256', ''), progress):
+                progress.discard(file_name)
+                return False
+            info['files'] = 1
+            info['bytes'] = os.path.getsize(temp_file)
+        # 已安装的气泡文本是从数据库下载的，不是旧版本汉化包中的文件，不检查；
+        # 更新后由 update_translation 再次写入数据库中的气泡文本
+        from functions.dowloads.sql_manager import BUBBLE_FILES
+        stats = apply_delta(temp_file, target_dir, installed_version, resolved['version'],
+                            unverified_paths=[file_name for _, file_name in BUBBLE_FILES])
+        print(f"增量更新完成: 更新 {stats['files']} 个文件，删除 {stats['removed']} 个文件")
+        return True
+    except Exception as e:
+        print(f"增量更新失败，改为下载完整的汉化包: {e}")
+        progress.discard(file_name)
+        return False
+    finally:
+        cleanup_temp_files(temp_file)
+        # 已安装的文件可能已经改变，之前的解压记录不再可信
+        forget_manifest(target_dir)
+
+def fetch_artifact(file_info, gui, temp_dir, progress, extract_stage, dowload_way) -> bool | None:
+    """
+    获取一个文件：获取下载地址、下载、校验后交给解压线程
+
+    汉化包有从已安装版本开始的增量包时只下载增量包，直接更新已安装的汉化文件
+
+    压缩包仓库中已有相同版本（和摘要）的文件时直接解压，不再下载；
+    下载完成的文件移入压缩包仓库，供之后重新安装或修复使用
+
+    Returns:
+        True: 文件已存在或已是最新版本，无需下载
+        False: 已交给解压线程（解压结果由解压线程统计）或下载失败
+        None: 获取下载地址失败
+    """
+    if not gui.is_downloading:
+        return False
+
+    # 检查字体文件是否已存在
+    if file_info['name'] == 'TTF 字体文件' and os.path.exists("Font/Context/ChineseFont.ttf"):
+        print("字体文件已存在, 无需下载.")
+        return True
+
+    if file_info['name'] == '零协会汉化包':
+        resolved = resolve_translation_url(gui, dowload_way)
+        if not resolved:
+            return None
+        file_info['url'] = resolved['url']
+        file_info['sha256'] = resolved['sha256']
+        file_info['version'] = resolved['version']
+
+        if not check_need_up_translate(resolved['version']):
+            print("当前已是最新汉化版本，无需更新。")
+            return True
+        print("检测到新版本，准备更新...")
+
+        target_dir = file_info['extract']['compare_path']
+        if apply_translation_delta(resolved, gui, temp_dir, progress, target_dir):
+            return True
+
+    extract_options = file_info.get('extract', {})
+    store = get_archive_store()
+    # 字体包没有版本号，使用下载地址区分
+    version = file_info.get('version') or file_info['url']
+    stored_file = store.lookup(file_info['temp_filename'], version, file_info.get('sha256', ''))
+    if stored_file:
+        extract_stage.submit(stored_file, file_info['temp_filename'], keep=True, **extract_options)
+        return False
+
+    temp_file = os.path.join(temp_dir, file_info['temp_filename'])
+
+    try:
+        # 下载文件
+        with trace_span('download.' + file_info['temp_filename'], 'download') as info:
+            if not download_file_with_gui(file_info['url'], temp_file, gui, file_info['name'],
+                                          file_info.get('sha256', ''), progress):
+                cleanup_temp_files(temp_file)
+                return False
+            info['files'] = 1
+            info['bytes'] = os.path.getsize(temp_file)
+
+        # 验证下载的文件（有SHA-256的文件已在下载时校验）
+        if not file_info.get('sha256') and not verify_download(temp_file):
+            cleanup_temp_files(temp_file)
+            return False
+
+        # 移入压缩包仓库后交给解压线程，其他文件继续下载
+        stored_file = store.put(temp_file, file_info['temp_filename'], version, file_info.get('sha256', ''))
+        if stored_file:
+            extract_stage.submit(stored_file, file_info['temp_filename'], keep=True, **extract_options)
+        else:
+            extract_stage.submit(temp_file, file_info['temp_filename'], **extract_options)
+        return False
+
+    except Exception as e:
+        print(e)
+        cleanup_temp_files(temp_file)
+        return False
+
 def download_and_extract_gui(gui, config_path: str = "") -> bool:
-    """带GUI的下载和解压主函数"""
+    """
+    带GUI的下载和解压主函数
+
+    各个文件的下载地址获取和下载同时进行，进度条显示总进度，
+    下载完成的文件依次交给解压线程，总用时取决于最慢的一个文件
+    """
     # 加载配置
     game_path = config_path
     
@@ -590,11 +802,7 @@ def download_and_extract_gui(gui, config_path: str = "") -> bool:
 
     # 获取下载链接
     gui.current_file_var.set("正在链接浮务器...")
-    dowload_url = ""
-    timeout_counter = 0
-    need_update_translate = True
 
-    
     # 定义要下载的文件列表
     download_files = [
         {
@@ -605,7 +813,14 @@ def download_and_extract_gui(gui, config_path: str = "") -> bool:
         {
             'name': '零协会汉化包',
             'url': '',  # URL将在后续代码中动态设置
-            'temp_filename': 'LimbusLocalize_latest.7z'
+            'temp_filename': 'LimbusLocalize_latest.7z',
+            'sha256': '',  # 发布方提供了摘要时下载后校验
+            # 只解压汉化文件夹中与 workshop/LLC_zh-CN 相比有变化的文件，版本信息总是解压
+            'extract': {
+                'subtree': 'LimbusCompany_Data/Lang/LLC_zh-CN',
+                'compare_path': 'workshop/LLC_zh-CN',
+                'always': ('info/version.json',),
+            }
         }
     ]
     
@@ -614,90 +829,39 @@ def download_and_extract_gui(gui, config_path: str = "") -> bool:
     os.makedirs(temp_dir, exist_ok=True)
     
     success_count = 0
+    resolve_failed = False
     dowload_way = settings_manager.get_setting('translate_download_way')
+    progress = DownloadProgress(gui)
     
-    for file_info in download_files:
-        if not gui.is_downloading:
-            break
-
-        # 检查字体文件是否已存在
-        if os.path.exists("Font/Context/ChineseFont.ttf") and \
-           file_info['name'] == 'TTF 字体文件':
-            print("字体文件已存在, 无需下载.")
-            success_count += 1
-            continue
-
-        if file_info['name'] == '零协会汉化包':
-
-            if dowload_way == 1:
-                print("使用 GitHub Release 方式下载汉化文件...")
-
-                while not dowload_url:
-                    if timeout_counter >= 10:
-                        gui.current_file_var.set("❌ 获取GitHub Release信息失败，已达最大重试次数")
-                        return False
-                    
-                    dowload_url, name = get_github_release_url() # type: ignore
-
-                    if not dowload_url:
-                        timeout_counter += 1
-                        gui.current_file_var.set(f"❌ 获取GitHub Release信息失败，准备重试...\n(剩余次数 {10 - timeout_counter})")
-                        time.sleep(1)
-                    else:
-                        print (f"获取到下载链接: {dowload_url}\n 零协汉化版本号: {name}")
-                        file_info['url'] = dowload_url
-                        if not check_need_up_translate(name):
-                            print("当前已是最新汉化版本，无需更新。")
-                            need_update_translate = False
-                        else:
-                            print("检测到新版本，准备更新...")
-
-            elif dowload_way == 0:
-                print("使用upfile下载汉化文件...")
-
-                result = get_dowload_path_ByNote()
-                if result:
-                    dowload_url, version = result
-                    print (f"获取到下载链接: {dowload_url}\n 零协汉化版本号: {version}")
-                    file_info['url'] = dowload_url
-                else:
-                    gui.current_file_var.set("❌ 获取upfile下载地址失败")
-                    return False
-
-                if not check_need_up_translate(version):
-                    print("当前已是最新汉化版本，无需更新。")
-                    need_update_translate = False
-                else:
-                    print("检测到新版本，准备更新...")
-
-        if not need_update_translate and \
-            file_info['name'] == '零协会汉化包':
-            success_count += 1
-            continue
-
-        temp_file = os.path.join(temp_dir, file_info['temp_filename'])
-        
-        try:
-            # 下载文件
-            if not download_file_with_gui(file_info['url'], temp_file, gui, file_info['name']):
-                continue
-            
-            # 验证下载的文件
-            if not verify_download(temp_file):
-                continue
-            
-            # 解压文件
-            if not extract_7z_file(temp_file, game_path):
-                continue
-            
-            success_count += 1
-            
-        except Exception as e:
-            print(e)
-        finally:
-            # 清理临时文件
-            cleanup_temp_files(temp_file)
-    
+    def on_extract_progress(done, total, name):
+        # 每解压 50 个文件更新一次状态，避免频繁刷新界面
+        if done % 50 == 0 or done == total:
+            gui.status_var.set(f"📦 解压中... {done}/{total}" if total else f"📦 解压中... {done}")
+
+    # 各个文件同时下载，下载完成的文件在解压线程中依次解压
+    extract_stage = ExtractStage(game_path, max_pending=len(download_files),
+                                 progress_callback=on_extract_progress)
+    try:
+        with ThreadPoolExecutor(max_workers=len(download_files)) as executor:
+            futures = [executor.submit(fetch_artifact, file_info, gui, temp_dir, progress,
+                                       extract_stage, dowload_way) for file_info in download_files]
+            for future in futures:
+                try:
+                    result = future.result()
+                    if result is None:
+                        resolve_failed = True
+                    elif result:
+                        success_count += 1
+                except Exception as e:
+                    print(e)
+        if progress.files:
+            progress.finish()
+    finally:
+        success_count += extract_stage.close()
+
+    if resolve_failed:
+        return False
+
     # 创建配置文件（只在至少一个文件处理成功时创建）
     if success_count > 0:
         create_config_file(game_path)
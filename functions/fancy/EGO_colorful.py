@@ -3,6 +3,7 @@ import glob
 from typing import Dict, Any
 from functions.fancy.dialog_colorful import apply_color_gradient_custom
 from functions.settings_manager import get_settings_manager
+from functions.fancy.pipeline import register_transform
 
 settings_manager = get_settings_manager()
 
@@ -35,6 +36,14 @@ def process_ego_json_files():
     
     return True
 
+def process_ego_data(data: Dict[str, Any]) -> bool:
+    """处理已加载的EGO技能数据，没有dataList字段时返回False"""
+    if 'dataList' in data and isinstance(data['dataList'], list):
+        for item in data['dataList']:
+            process_ego_item(item)
+        return True
+    return False
+
 def process_single_json_file(file_path: str) -> bool:
     """处理单个JSON文件"""
     try:
@@ -43,10 +52,7 @@ def process_single_json_file(file_path: str) -> bool:
             data = json.load(f)
         
         # 处理dataList中的每个字典
-        if 'dataList' in data and isinstance(data['dataList'], list):
-            for item in data['dataList']:
-                process_ego_item(item)
-            
+        if process_ego_data(data):
             # 保存修改后的数据
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
@@ -60,6 +66,20 @@ def process_single_json_file(file_path: str) -> bool:
         print(f"处理文件 {file_path} 时出错: {e}")
         return False
 
+def is_ego_json_file(relative_path: str) -> bool:
+    """判断是否为EGO技能JSON文件（只匹配汉化目录第一层）"""
+    return '/' not in relative_path and \
+        relative_path.startswith('Skills_Ego_Personality-') and relative_path.endswith('.json')
+
+@register_transform('ego_style', order=40,
+                    match=lambda path, context: is_ego_json_file(path),
+                    setting='enable_ego_style')
+def ego_style_transform(data: Dict[str, Any], relative_path: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    """流水线处理步骤：EGO名称美化"""
+    if not process_ego_data(data):
+        print(f"文件 {relative_path} 中没有找到dataList字段")
+    return data
+
 def process_ego_item(item: Dict[str, Any]):
     """处理单个EGO项目"""
     # 检查是否有levelList
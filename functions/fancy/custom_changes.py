@@ -0,0 +1,130 @@
+"""
+这个模块负责把 workshop/changes.json 中记录的自定义汉化修改应用到汉化文件。
+
+函数：
+    - `apply_changes_to_data(original_data, changes)`: 递归应用修改到数据。
+"""
+
+import os
+import json
+from functions.fancy.pipeline import register_transform
+
+CHANGES_FILE = "workshop/changes.json"
+LANG_DIR_NAME = "LLC_zh-CN"
+
+def apply_changes_to_data(original_data, changes):
+    """递归应用修改到数据 - 适配新的修改记录结构（包含id）"""
+
+    print(f"应用用户自定义json修改: {type(original_data)}")
+
+    if isinstance(original_data, dict) and isinstance(changes, dict):
+        result = {}
+        for key, value in original_data.items():
+            if key in changes:
+                # 如果changes中有对应的键，应用修改
+                if isinstance(value, (dict, list)) and isinstance(changes[key], (dict, list)):
+                    result[key] = apply_changes_to_data(value, changes[key])
+                else:
+                    result[key] = changes[key]
+            else:
+                result[key] = value
+        return result
+    elif isinstance(original_data, list) and isinstance(changes, list):
+        result = []
+        
+        # 检查是否是包含id的字典列表的特殊修改记录
+        if (len(original_data) > 0 and isinstance(original_data[0], dict) and 
+            'id' in original_data[0] and len(changes) > 0 and 
+            isinstance(changes[0], dict) and 'id' in changes[0]):
+            
+            # 对于包含id的字典列表，根据id进行匹配修改
+            original_dict = {item['id']: item for item in original_data if 'id' in item}
+            
+            for change_item in changes:
+                if isinstance(change_item, dict) and 'id' in change_item:
+                    change_id = change_item['id']
+                    
+                    if change_id in original_dict:
+                        # 找到对应的原始项
+                        original_item = original_dict[change_id]
+                        
+                        if 'action' in change_item:
+                            # 处理特殊操作
+                            if change_item['action'] == 'deleted':
+                                # 删除项，不添加到结果中
+                                continue
+                            elif change_item['action'] == 'added':
+                                # 新增项，直接添加到结果中
+                                result.append(change_item.get('changes', change_item))
+                                continue
+                        
+                        # 应用修改
+                        if 'changes' in change_item:
+                            # 有具体的修改内容
+                            modified_item = apply_changes_to_data(original_item, change_item['changes'])
+                            result.append(modified_item)
+                        else:
+                            # 没有具体修改内容，使用原始项
+                            result.append(original_item)
+                    else:
+                        # 新增项（id不在原始数据中）
+                        if 'action' in change_item and change_item['action'] == 'added':
+                            result.append(change_item.get('changes', change_item))
+                        else:
+                            # 未知情况，保留原始项
+                            result.append(original_dict.get(change_id, change_item))
+            
+            # 添加未被修改的原始项
+            for original_item in original_data:
+                if isinstance(original_item, dict) and 'id' in original_item:
+                    original_id = original_item['id']
+                    if original_id not in [item['id'] for item in changes if isinstance(item, dict) and 'id' in item]:
+                        result.append(original_item)
+                else:
+                    # 对于不包含id的项，直接添加
+                    result.append(original_item)
+            
+            return result
+        else:
+            # 对于普通的列表，使用原来的逻辑
+            for i, item in enumerate(original_data):
+                if i < len(changes):
+                    if isinstance(item, (dict, list)) and isinstance(changes[i], (dict, list)):
+                        result.append(apply_changes_to_data(item, changes[i]))
+                    else:
+                        result.append(changes[i])
+                else:
+                    result.append(item)
+            return result
+    else:
+        return original_data
+
+def load_changes(context: dict):
+    """读取 changes.json，按汉化目录内的相对路径整理修改记录"""
+    context['changes'] = {}
+
+    if not os.path.exists(CHANGES_FILE):
+        print("没有找到changes.json文件，跳过自定义汉化修改")
+        return
+
+    with open(CHANGES_FILE, 'r', encoding='utf-8') as f:
+        changes_data = json.load(f)
+
+    if not changes_data:
+        print("没有自定义汉化修改需要应用")
+        return
+
+    print(f"找到 {len(changes_data)} 个文件的修改记录")
+    for relative_path, file_changes in changes_data.items():
+        # changes.json 中的路径相对于 workshop 目录，例如 LLC_zh-CN\\xxx.json
+        relative_path = relative_path.replace('\\', '/')
+        if relative_path.startswith(LANG_DIR_NAME + '/'):
+            relative_path = relative_path[len(LANG_DIR_NAME) + 1:]
+        context['changes'][relative_path] = file_changes
+
+@register_transform('custom_changes', order=10,
+                    match=lambda path, context: path in context.get('changes', {}),
+                    prepare=load_changes, indent=4)
+def custom_changes_transform(data, relative_path: str, context: dict):
+    """应用自定义汉化修改"""
+    return apply_changes_to_data(data, context['changes'][relative_path])
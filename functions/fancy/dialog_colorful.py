@@ -2,12 +2,20 @@ import json
 import os
 import re
 from typing import List, Dict, Tuple
-from settings_manager import get_settings_manager
+from functions.settings_manager import get_settings_manager
 from functions.window_ulits import center_window
+from functions.fancy.pipeline import register_transform
 
 gradient_rate = get_settings_manager().get_setting('bubble_text_gradient_rate')
 game_path = get_settings_manager().get_setting('game_path')
 
+# 气泡文本 JSON 文件列表
+BUBBLE_JSON_FILES = [
+    'BattleSpeechBubbleDlg.json',
+    'BattleSpeechBubbleDlg_Cultivation.json',
+    'BattleSpeechBubbleDlg_mowe.json'
+]
+
 def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     """将十六进制颜色转换为RGB值"""
     hex_color = hex_color.lstrip('#')
@@ -474,6 +482,33 @@ def test_color_gradient(gradient_rate: float = 2.0):
         
         print("-" * 40)
 
+def process_bubble_data(data: Dict, gradient_rate: float = 2.0) -> int:
+    """处理已加载的气泡文本数据
+    Args:
+        data: JSON数据
+        gradient_rate: 渐变度，越大渐变越快（默认2.0）
+
+    Returns:
+        int: 被处理的条目数量
+    """
+    # 检查数据结构
+    if 'dataList' not in data or not isinstance(data['dataList'], list):
+        raise ValueError("格式不正确")
+    
+    processed_count = 0
+    
+    # 处理每个条目
+    for item in data['dataList']:
+        if 'dlg' in item and item['dlg']:
+            original_dlg = item['dlg']
+            processed_dlg = process_dlg_text(original_dlg, gradient_rate)
+            
+            if processed_dlg != original_dlg:
+                item['dlg'] = processed_dlg
+                processed_count += 1
+    
+    return processed_count
+
 def process_json_file(file_path: str, gradient_rate: float = 2.0) -> bool:
     """处理单个JSON文件
     Args:
@@ -485,23 +520,8 @@ def process_json_file(file_path: str, gradient_rate: float = 2.0) -> bool:
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
-        # 检查数据结构
-        if 'dataList' not in data or not isinstance(data['dataList'], list):
-            print(f"文件 {file_path} 格式不正确")
-            return False
-        
-        processed_count = 0
-        total_count = len(data['dataList'])
-        
-        # 处理每个条目
-        for item in data['dataList']:
-            if 'dlg' in item and item['dlg']:
-                original_dlg = item['dlg']
-                processed_dlg = process_dlg_text(original_dlg, gradient_rate)
-                
-                if processed_dlg != original_dlg:
-                    item['dlg'] = processed_dlg
-                    processed_count += 1
+        total_count = len(data.get('dataList', []))
+        processed_count = process_bubble_data(data, gradient_rate)
         
         # 保存处理后的文件
         with open(file_path, 'w', encoding='utf-8') as f:
@@ -515,6 +535,20 @@ def process_json_file(file_path: str, gradient_rate: float = 2.0) -> bool:
         print(f"处理文件 {file_path} 时出错: {e}")
         return False
 
+def prepare_gradient_rate(context: Dict):
+    """流水线准备：读取渐变系数（在主进程中读取，工作进程直接使用）"""
+    context['bubble_text_gradient_rate'] = get_settings_manager().get_setting('bubble_text_gradient_rate') or 0.5
+
+@register_transform('bubble_gradient', order=20,
+                    match=lambda path, context: path in BUBBLE_JSON_FILES,
+                    setting='enable_text_gradient',
+                    prepare=prepare_gradient_rate)
+def bubble_gradient_transform(data: Dict, relative_path: str, context: Dict) -> Dict:
+    """流水线处理步骤：气泡文本渐变色"""
+    processed_count = process_bubble_data(data, context['bubble_text_gradient_rate'])
+    print(f"  {relative_path}: 渐变处理了 {processed_count}/{len(data['dataList'])} 个条目")
+    return data
+
 def process_all_json_files(game_path: str, gradient_rate: float = 2.0) -> bool:
     """处理游戏目录下的所有JSON文件
     Args:
@@ -529,11 +563,7 @@ def process_all_json_files(game_path: str, gradient_rate: float = 2.0) -> bool:
         return False
     
     # 要处理的JSON文件列表
-    json_files = [
-        'BattleSpeechBubbleDlg.json',
-        'BattleSpeechBubbleDlg_Cultivation.json',
-        'BattleSpeechBubbleDlg_mowe.json'
-    ]
+    json_files = BUBBLE_JSON_FILES
     
     success_count = 0
     
@@ -563,11 +593,7 @@ def process_temp_json_files(gradient_rate: float = 2.0) -> bool:
         return False
     
     # 要处理的JSON文件列表
-    json_files = [
-        'BattleSpeechBubbleDlg.json',
-        'BattleSpeechBubbleDlg_Cultivation.json',
-        'BattleSpeechBubbleDlg_mowe.json'
-    ]
+    json_files = BUBBLE_JSON_FILES
     
     success_count = 0
     
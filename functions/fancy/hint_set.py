@@ -1,37 +1,63 @@
+import os
 import json
 import random
+from functions.fancy.pipeline import register_transform
 
-def simple_replace(battlehint_path:str):
-    """简单版本，直接替换BattleHint.json中的内容"""
-    
-    # 文件路径
-    loadingtext_path = r"config\loadingText.json"
-    
-    # 读取loadingText.json
-    with open(loadingtext_path, 'r', encoding='utf-8') as f:
+# 文件路径
+LOADING_TEXT_PATH = os.path.join("config", "loadingText.json")
+
+def load_loading_texts() -> list:
+    """读取loadingText.json中的Tip文本"""
+    with open(LOADING_TEXT_PATH, 'r', encoding='utf-8') as f:
         loading_data = json.load(f)
-    
-    loading_texts = loading_data["loadingTexts"]
-    
-    # 读取BattleHint.json
-    with open(battlehint_path, 'r', encoding='utf-8') as f:
-        battlehint_data = json.load(f)
-    
+
+    return loading_data["loadingTexts"]
+
+def replace_hints(battlehint_data: dict, loading_texts: list) -> int:
+    """替换已加载的BattleHint数据，返回替换的条目数量"""
     data_list = battlehint_data["dataList"]
-    
+
     # 随机选择要替换的条目（替换1/3的条目）
     num_replacements = max(1, len(data_list))
     indices_to_replace = random.sample(range(len(data_list)), num_replacements)
-    
+
     # 随机选择替换文本
     replacement_texts = random.sample(loading_texts, num_replacements)
-    
+
     # 替换内容
     for i, idx in enumerate(indices_to_replace):
         data_list[idx]["content"] = replacement_texts[i]
-    
+
+    return num_replacements
+
+def simple_replace(battlehint_path:str):
+    """简单版本，直接替换BattleHint.json中的内容"""
+
+    # 读取loadingText.json
+    loading_texts = load_loading_texts()
+
+    # 读取BattleHint.json
+    with open(battlehint_path, 'r', encoding='utf-8') as f:
+        battlehint_data = json.load(f)
+
+    num_replacements = replace_hints(battlehint_data, loading_texts)
+
     # 保存修改后的文件
     with open(battlehint_path, 'w', encoding='utf-8') as f:
         json.dump(battlehint_data, f, ensure_ascii=False, indent=2)
-    
-    print(f"成功替换了 {num_replacements} 个 Tip 的内容！")
\ No newline at end of file
+
+    print(f"成功替换了 {num_replacements} 个 Tip 的内容！")
+
+def prepare_loading_texts(context: dict):
+    """流水线准备：只读取一次loadingText.json"""
+    context['loading_texts'] = load_loading_texts()
+
+@register_transform('special_tip', order=60,
+                    match=lambda path, context: path == 'BattleHint.json',
+                    setting='enable_speical_tip',
+                    prepare=prepare_loading_texts, cacheable=False)
+def special_tip_transform(battlehint_data: dict, relative_path: str, context: dict) -> dict:
+    """流水线处理步骤：零协会私活Tip"""
+    num_replacements = replace_hints(battlehint_data, context['loading_texts'])
+    print(f"成功替换了 {num_replacements} 个 Tip 的内容！")
+    return battlehint_data
@@ -0,0 +1,432 @@
+"""
+这个模块实现汉化文件的单次处理流水线。
+
+每个 JSON 文件只读取、解析一次，依次交给所有匹配的处理步骤（transform），
+最后只序列化、写入一次。各个美化功能通过 `register_transform` 注册为处理步骤。
+文件之间互不影响，默认使用进程池在多个 CPU 核心上并行处理。
+进程池的工作进程使用 spawn 方式启动，并以 `functions.fancy.pipeline_worker` 作为主模块，
+不会重新导入 main.py 和界面相关的模块。
+
+函数：
+    - `register_transform(...)`: 注册处理步骤的装饰器。
+    - `plan_pipeline(root_dir)`: 找出需要处理的文件。
+    - `run_pipeline(root_dir)`: 对汉化目录执行所有启用的处理步骤。
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import threading
+import importlib.util
+import multiprocessing
+from contextlib import contextmanager, redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from functions.settings_manager import get_settings_manager
+from functions.launch_trace import trace_span, add_trace_event
+
+
+@dataclass
+class Transform:
+    """处理步骤信息"""
+    name: str
+    order: int
+    match: Callable[[str, Dict[str, Any]], bool]
+    apply: Callable[[Any, str, Dict[str, Any]], Any]
+    setting: Optional[str] = None
+    prepare: Optional[Callable[[Dict[str, Any]], None]] = None
+    indent: int = 2
+    ensure_ascii: bool = False
+    cacheable: bool = True
+
+
+@dataclass
+class PipelinePlan:
+    """处理计划：启用的处理步骤、上下文以及 [(相对路径, 处理步骤名称列表)]"""
+    transforms: List[Transform]
+    context: Dict[str, Any]
+    tasks: List[Tuple[str, List[str]]]
+
+
+_transforms: Dict[str, Transform] = {}
+_builtin_loaded = False
+
+# 进程池工作进程代替 main.py 导入的主模块
+WORKER_MAIN_MODULE = 'functions.fancy.pipeline_worker'
+
+# 内置处理步骤所在的模块
+BUILTIN_TRANSFORM_MODULES = [
+    'functions.fancy.custom_changes',
+    'functions.fancy.dialog_colorful',
+    'functions.fancy.user_name',
+    'functions.fancy.EGO_colorful',
+    'functions.fancy.skill_info',
+    'functions.fancy.hint_set',
+]
+
+
+def register_transform(name: str, order: int, match: Callable[[str, Dict[str, Any]], bool],
+                       setting: Optional[str] = None,
+                       prepare: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       indent: int = 2, ensure_ascii: bool = False, cacheable: bool = True):
+    """
+    注册处理步骤的装饰器
+
+    Args:
+        name: 处理步骤名称
+        order: 执行顺序，越小越先执行
+        match: 判断是否处理某个文件的函数 match(相对路径, context)，相对路径使用 '/' 分隔
+        setting: 控制是否启用的设置项，为 None 时始终启用
+        prepare: 流水线开始前调用一次的准备函数 prepare(context)，可以往 context 中放入共享数据
+        indent, ensure_ascii: 写入文件时的 JSON 格式，文件使用最后一个执行的处理步骤的格式
+        cacheable: 结果是否可以放入构建缓存，结果随机的处理步骤为 False，每次启动重新执行
+
+    被装饰的函数形如 func(data, relative_path, context)，返回处理后的数据
+    """
+    def decorator(func: Callable[[Any, str, Dict[str, Any]], Any]):
+        _transforms[name] = Transform(name=name, order=order, match=match, apply=func,
+                                      setting=setting, prepare=prepare,
+                                      indent=indent, ensure_ascii=ensure_ascii, cacheable=cacheable)
+        return func
+    return decorator
+
+
+def load_builtin_transforms():
+    """导入内置处理步骤模块，完成注册"""
+    global _builtin_loaded
+    if _builtin_loaded:
+        return
+    import importlib
+    for module_name in BUILTIN_TRANSFORM_MODULES:
+        importlib.import_module(module_name)
+    _builtin_loaded = True
+
+
+def get_enabled_transforms(cacheable: Optional[bool] = None) -> List[Transform]:
+    """按顺序返回当前设置下启用的处理步骤，指定 cacheable 时只返回结果可以（或不可以）缓存的处理步骤"""
+    load_builtin_transforms()
+    settings_manager = get_settings_manager()
+    enabled = [transform for transform in _transforms.values()
+               if (transform.setting is None or settings_manager.get_setting(transform.setting))
+               and (cacheable is None or transform.cacheable == cacheable)]
+    return sorted(enabled, key=lambda transform: transform.order)
+
+
+def build_context(transforms: List[Transform]) -> Dict[str, Any]:
+    """创建流水线上下文，并调用各处理步骤的准备函数"""
+    context: Dict[str, Any] = {}
+    for transform in transforms:
+        if transform.prepare:
+            try:
+                transform.prepare(context)
+            except Exception as e:
+                print(f"处理步骤 {transform.name} 准备失败: {e}")
+    return context
+
+
+def list_json_files(root_dir: str) -> List[str]:
+    """列出目录下所有 JSON 文件的相对路径（使用 '/' 分隔）"""
+    json_files = []
+    for root, dirs, files in os.walk(root_dir):
+        for file in files:
+            if file.endswith('.json'):
+                relative_path = os.path.relpath(os.path.join(root, file), root_dir)
+                json_files.append(relative_path.replace(os.sep, '/'))
+    return sorted(json_files)
+
+
+def process_file(file_path: str, relative_path: str, transforms: List[Transform],
+                 context: Dict[str, Any], timings: Optional[List[Tuple[str, float, float]]] = None,
+                 output_path: Optional[str] = None) -> List[str]:
+    """
+    读取单个文件，依次执行处理步骤后写回
+
+    处理步骤可能已经修改了一部分数据才出错，这时从原文件重新开始，跳过出错的处理步骤；
+    没有成功执行的处理步骤时不写入（output_path 不是原文件时复制原文件）。
+
+    Args:
+        timings: 传入列表时，记录每个处理步骤的 (名称, 开始时间, 耗时)
+        output_path: 写入的文件路径，为 None 时写回原文件
+
+    Returns:
+        list: 实际执行的处理步骤名称
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    failed = set()
+    while True:
+        data = json.loads(text)
+        applied: List[Transform] = []
+        for transform in transforms:
+            if transform.name in failed:
+                continue
+            start = time.time()
+            try:
+                data = transform.apply(data, relative_path, context)
+                applied.append(transform)
+            except Exception as e:
+                print(f"处理步骤 {transform.name} 处理 {relative_path} 时出错: {e}")
+                failed.add(transform.name)
+            if timings is not None:
+                timings.append((transform.name, start, time.time() - start))
+            if transform.name in failed:
+                break
+        else:
+            break
+
+    if output_path is not None:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if not applied:
+        if output_path is not None:
+            shutil.copy2(file_path, output_path)
+        return []
+
+    last = applied[-1]
+    with open(output_path or file_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=last.ensure_ascii, indent=last.indent)
+
+    return [transform.name for transform in applied]
+
+
+class _TaskOutput(io.TextIOBase):
+    """
+    线程中处理文件时代替 sys.stdout：正在处理文件的线程的输出写入各自的缓冲区，其余线程照常输出
+
+    redirect_stdout 会替换整个进程的 sys.stdout，多个线程同时使用时会互相覆盖。
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def _target(self):
+        buffer = getattr(self.local, 'buffer', None)
+        return self.stream if buffer is None else buffer
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+
+@contextmanager
+def _capture_output(output: io.StringIO):
+    """收集当前任务的输出"""
+    stdout = sys.stdout
+    if isinstance(stdout, _TaskOutput):
+        stdout.local.buffer = output
+        try:
+            yield
+        finally:
+            stdout.local.buffer = None
+    else:
+        # 工作进程中只有这个线程在输出
+        with redirect_stdout(output):
+            yield
+
+
+@contextmanager
+def _worker_main_module():
+    """
+    启动进程池工作进程时把主模块换成 pipeline_worker
+
+    spawn 方式启动的工作进程会先导入父进程的主模块；主模块有 __spec__ 时按模块名导入，
+    所以这里临时给 main.py 设置 pipeline_worker 的 __spec__。打包后的程序由 main.py 最前面的
+    freeze_support 处理，不需要替换。
+    """
+    main_module = sys.modules.get('__main__')
+    if main_module is None or getattr(sys, 'frozen', False) or getattr(main_module, '__spec__', None) is not None:
+        yield
+        return
+    main_module.__spec__ = importlib.util.find_spec(WORKER_MAIN_MODULE)
+    try:
+        yield
+    finally:
+        main_module.__spec__ = None
+
+
+def _process_file_worker(root_dir: str, relative_path: str, transform_names: List[str],
+                         context: Dict[str, Any], source_dir: Optional[str] = None
+                         ) -> Tuple[str, List[str], Optional[str], str, Dict[str, Any]]:
+    """
+    工作进程/线程中处理单个文件，输出和耗时会被收集后交回主进程
+
+    指定 source_dir 时从 source_dir 读取文件，处理结果写入 root_dir
+
+    Returns:
+        tuple: (相对路径, 实际执行的处理步骤, 错误信息, 输出内容, 耗时信息)
+    """
+    load_builtin_transforms()
+    output = io.StringIO()
+    applied: List[str] = []
+    error = None
+    timings: List[Tuple[str, float, float]] = []
+    output_path = os.path.join(root_dir, relative_path)
+    start = time.time()
+    with _capture_output(output):
+        try:
+            transforms = [_transforms[name] for name in transform_names]
+            if source_dir:
+                applied = process_file(os.path.join(source_dir, relative_path), relative_path, transforms, context,
+                                       timings, output_path)
+            else:
+                applied = process_file(output_path, relative_path, transforms, context, timings)
+        except Exception as e:
+            error = str(e)
+            if source_dir:
+                # 处理失败时保留原文件
+                try:
+                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                    shutil.copy2(os.path.join(source_dir, relative_path), output_path)
+                except Exception:
+                    pass
+    timing = {
+        'start': start,
+        'duration': time.time() - start,
+        'pid': os.getpid(),
+        'tid': threading.get_ident(),
+        'transforms': timings,
+    }
+    return relative_path, applied, error, output.getvalue(), timing
+
+
+def _trace_file(relative_path: str, timing: Dict[str, Any]):
+    """把工作进程/线程中测量的耗时加入启动耗时记录"""
+    add_trace_event('pipeline.file', timing['start'], timing['duration'], 'pipeline',
+                    {'path': relative_path, 'files': 1}, timing['pid'], timing['tid'])
+    for name, start, duration in timing['transforms']:
+        add_trace_event(f'transform.{name}', start, duration, 'pipeline',
+                        {'path': relative_path, 'files': 1}, timing['pid'], timing['tid'])
+
+
+def get_worker_count(task_count: int) -> int:
+    """根据设置和任务数量计算并行数量，设置为 0 时使用全部 CPU 核心"""
+    workers = get_settings_manager().get_setting('transform_workers') or 0
+    if workers <= 0: # type: ignore
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, task_count)) # type: ignore
+
+
+def plan_pipeline(root_dir: str, cacheable: Optional[bool] = None) -> PipelinePlan:
+    """
+    找出启用的处理步骤和需要处理的文件，并调用各处理步骤的准备函数
+
+    Args:
+        root_dir: 汉化目录（LLC_zh-CN）
+        cacheable: 指定时只包含结果可以（或不可以）缓存的处理步骤
+
+    Returns:
+        PipelinePlan: 处理计划
+    """
+    transforms = get_enabled_transforms(cacheable)
+    if not transforms:
+        return PipelinePlan([], {}, [])
+
+    print(f"启用的汉化处理步骤: {', '.join(transform.name for transform in transforms)}")
+    with trace_span('pipeline.prepare'):
+        context = build_context(transforms)
+
+    tasks = []
+    for relative_path in list_json_files(root_dir):
+        matched = [transform.name for transform in transforms if transform.match(relative_path, context)]
+        if matched:
+            tasks.append((relative_path, matched))
+
+    return PipelinePlan(transforms, context, tasks)
+
+
+def run_pipeline(root_dir: str, workers: Optional[int] = None, use_processes: Optional[bool] = None,
+                 source_dir: Optional[str] = None, plan: Optional[PipelinePlan] = None) -> bool:
+    """
+    对汉化目录执行所有启用的处理步骤
+
+    Args:
+        root_dir: 汉化目录（LLC_zh-CN）
+        workers: 并行数量，为 None 时读取设置 transform_workers
+        use_processes: 是否使用进程池，为 None 时读取设置 transform_use_process_pool，否则使用线程池
+        source_dir: 指定时从这个目录读取文件，处理结果写入 root_dir（其余文件需要调用者复制）
+        plan: 已经生成的处理计划，为 None 时调用 plan_pipeline 生成
+
+    Returns:
+        bool: 是否全部文件处理成功
+    """
+    input_dir = source_dir or root_dir
+    if not os.path.exists(input_dir):
+        print(f"目标目录不存在: {input_dir}")
+        return False
+
+    if plan is None:
+        plan = plan_pipeline(input_dir)
+    if not plan.transforms:
+        print("没有启用的汉化处理步骤")
+        return True
+
+    context = plan.context
+    tasks = plan.tasks
+    if not tasks:
+        print("没有需要处理的汉化文件")
+        return True
+
+    if workers is None:
+        workers = get_worker_count(len(tasks))
+    if use_processes is None:
+        use_processes = bool(get_settings_manager().get_setting('transform_use_process_pool'))
+
+    success = True
+    finished_count = 0
+    errors = []
+
+    task_output = None
+    if workers <= 1 or not use_processes:
+        # 在线程中处理时按线程收集输出，不替换全局的 sys.stdout
+        task_output = _TaskOutput(sys.stdout)
+        sys.stdout = task_output
+
+    if workers <= 1:
+        results = (_process_file_worker(root_dir, relative_path, names, context, source_dir)
+                   for relative_path, names in tasks)
+        executor = None
+    else:
+        print(f"使用{'进程池' if use_processes else '线程池'}（{workers} 个并行）处理 {len(tasks)} 个文件...")
+        if use_processes:
+            # spawn 方式在各个平台上行为一致，也不会复制父进程中其他线程持有的锁
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+        # 工作进程在提交任务时启动
+        with _worker_main_module():
+            futures = [executor.submit(_process_file_worker, root_dir, relative_path, names, context, source_dir)
+                       for relative_path, names in tasks]
+        results = (future.result() for future in as_completed(futures))
+
+    try:
+        for relative_path, applied, error, output, timing in results:
+            finished_count += 1
+            _trace_file(relative_path, timing)
+            if output.strip():
+                print(output.rstrip('\n'))
+            if error:
+                success = False
+                errors.append((relative_path, error))
+                print(f"[{finished_count}/{len(tasks)}] 处理文件 {relative_path} 时出错: {error}")
+            else:
+                print(f"[{finished_count}/{len(tasks)}] 已处理 {relative_path}: {', '.join(applied)}")
+    finally:
+        if executor:
+            executor.shutdown()
+        if task_output is not None and sys.stdout is task_output:
+            sys.stdout = task_output.stream
+
+    print(f"汉化处理完成: 共处理 {len(tasks) - len(errors)}/{len(tasks)} 个文件")
+    for relative_path, error in errors:
+        print(f"  处理失败: {relative_path} ({error})")
+    return success
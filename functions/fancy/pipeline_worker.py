@@ -0,0 +1,10 @@
+"""
+这个模块是处理流水线进程池工作进程的主模块。
+
+spawn 方式启动的工作进程会先导入父进程的主模块，流水线启动工作进程时用这个模块代替 main.py，
+工作进程不会导入 tkinter、PIL 和界面相关的模块。这里只提前注册内置处理步骤。
+"""
+
+from functions.fancy.pipeline import load_builtin_transforms
+
+load_builtin_transforms()
@@ -1,5 +1,6 @@
 import json
 import os
+from functions.fancy.pipeline import register_transform
 
 
 def handle_skill_info(skill_name:str) -> str:
@@ -151,5 +152,16 @@ def handle_skill(translate_pack_path) -> None:
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(skill_content, f, ensure_ascii=False, indent=4)
 
+def is_skill_json_file(relative_path: str) -> bool:
+    """判断是否为技能JSON文件（与 get_skill_files 一致，只匹配汉化目录第一层的 Skill*.json）"""
+    return '/' not in relative_path and relative_path.startswith('Skill') and relative_path.endswith('.json')
+
+@register_transform('skill_style', order=50,
+                    match=lambda path, context: is_skill_json_file(path),
+                    setting='enable_skill_style', indent=4)
+def skill_style_transform(skill_content: dict, relative_path: str, context: dict) -> dict:
+    """流水线处理步骤：技能描述美化"""
+    return handle_skill_strcture(skill_content)
+
 if __name__ == '__main__':
     handle_skill("workshop")
\ No newline at end of file
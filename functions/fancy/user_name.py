@@ -0,0 +1,21 @@
+from functions.settings_manager import get_settings_manager
+from functions.fancy.pipeline import register_transform
+
+def set_user_name_data(datalist: dict, user_name: str) -> dict:
+    """设置用户名称到已加载的 UserInfo_Friends 数据中"""
+    for data in datalist['dataList']:
+        if data['id'] == 'Uid_Copy':
+            data['content'] = f'{user_name}'
+    return datalist
+
+def prepare_user_name(context: dict):
+    """流水线准备：读取用户名称"""
+    context['user_name'] = get_settings_manager().get_setting('user_name')
+
+@register_transform('user_name', order=30,
+                    match=lambda path, context: path == 'UserInfo_Friends.json',
+                    setting='enable_show_user_name',
+                    prepare=prepare_user_name, indent=4, ensure_ascii=True)
+def user_name_transform(datalist: dict, relative_path: str, context: dict) -> dict:
+    """流水线处理步骤：在个人车票上显示用户名称"""
+    return set_user_name_data(datalist, context['user_name'])
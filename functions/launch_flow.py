@@ -0,0 +1,212 @@
+"""
+这个模块包含更新汉化和启动游戏的完整流程，不依赖主界面。
+
+主界面中的“下载汉化”“启动游戏”和命令行模式（Steam 通过 launcher.vbs 启动）共用这里的函数。
+命令行模式使用 `run_headless`，不会创建主界面，只导入下载、部署和启动相关的模块，
+下载时只显示一个小的进度窗口。
+
+函数：
+    - `update_translation(parent)`: 下载汉化和气泡文本，并整理到 workshop/LLC_zh-CN。
+    - `prepare_and_launch(game_path)`: 处理并部署汉化，然后启动游戏。
+    - `run_headless()`: 命令行模式入口。
+"""
+
+import os
+import shutil
+import threading
+from time import sleep
+from functions.settings_manager import get_settings_manager
+from functions.launch_trace import trace_span, reset_trace, finish_trace
+
+WORKSHOP_PATH = 'workshop'
+WORKSHOP_LANG_PATH = 'workshop/LLC_zh-CN'
+
+
+def update_translation(parent, dowload_path: str = WORKSHOP_PATH) -> bool:
+    """
+    下载翻译和气泡文本，有新版本时复制到 workshop/LLC_zh-CN
+
+    Args:
+        parent: 下载进度窗口的父窗口
+        dowload_path: 下载和解压目录
+
+    Returns:
+        bool: 汉化是否有更新
+    """
+    from functions.build_cache import copy_tree_counted
+    from functions.dowloads.bubble_dow import fetch_bubble_files_async, save_bubble_files
+
+    # 气泡文本在下载汉化的同时从数据库获取，解压完成后再写入
+    bubble_future = fetch_bubble_files_async()
+
+    # 1. 下载翻译
+    print("开始下载翻译...")
+    from functions.dowloads.zeroasso_dow import main_gui as download_translation
+    with trace_span('download.translation', 'download'):
+        gui = download_translation(parent, dowload_path)
+
+        while gui.is_downloading:
+            sleep(0.1)
+    print("翻译下载完成")
+
+    # 2. 下载气泡
+    print("开始下载气泡...")
+    with trace_span('download.bubble', 'download'):
+        save_bubble_files(bubble_future, dowload_path)
+    print("气泡下载完成")
+
+    # 检查是否需要更新汉化
+    from functions.dowloads.dow_ulits import check_need_up_translate
+    need_update = check_need_up_translate()
+
+    # 把 'workshop\LimbusCompany_Data\Lang\LLC_zh-CN' 复制到 'workshop' 文件夹 并删除 LimbusCompany_Data 文件夹
+    if need_update:
+        print("检测到新的汉化版本，准备更新汉化文件...")
+        if os.path.exists(dowload_path + '/LimbusCompany_Data/Lang/LLC_zh-CN'):
+            with trace_span('copy.LLC_zh-CN') as info:
+                info.update(copy_tree_counted(dowload_path + '/LimbusCompany_Data/Lang/LLC_zh-CN', WORKSHOP_LANG_PATH))
+            # 复制完成后才记录已解压的文件，下次只解压有变化的文件
+            from functions.dowloads.extract_ulits import commit_manifest
+            commit_manifest(WORKSHOP_LANG_PATH)
+            print("文件夹复制完成")
+        else:
+            print("错误: 未找到 workshop 下的 LLC_zh-CN 文件夹")
+    else:
+        print("当前汉化已是最新版本，无需更新")
+        # 没有复制完整的汉化时（已是最新版本或已用增量包更新）只复制数据库中的气泡文本
+        from functions.dowloads.sql_manager import BUBBLE_FILES
+        bubble_dir = os.path.join(dowload_path, 'LimbusCompany_Data', 'Lang', 'LLC_zh-CN')
+        with trace_span('copy.bubble'):
+            for _, file_name in BUBBLE_FILES:
+                if os.path.exists(os.path.join(bubble_dir, file_name)) and os.path.isdir(WORKSHOP_LANG_PATH):
+                    shutil.copyfile(os.path.join(bubble_dir, file_name), os.path.join(WORKSHOP_LANG_PATH, file_name))
+
+    # 删除 LimbusCompany_Data 文件夹
+    print("开始删除 LimbusCompany_Data 文件夹...")
+    with trace_span('cleanup.LimbusCompany_Data'):
+        shutil.rmtree(os.path.join(dowload_path, 'LimbusCompany_Data'), ignore_errors=True)
+    print("LimbusCompany_Data 文件夹删除完成")
+
+    if not os.path.exists('Font/Context/ChineseFont.ttf'):
+        with trace_span('copy.font') as info:
+            info.update(copy_tree_counted('Font', WORKSHOP_LANG_PATH))
+        print("字体文件复制完成")
+
+    print("汉化下载及处理全部完成！")
+    return need_update
+
+
+def prepare_and_launch(game_path: str) -> bool:
+    """
+    处理汉化文件、部署到游戏目录并启动游戏，结束时保存启动耗时记录
+
+    Args:
+        game_path: 游戏目录
+
+    Returns:
+        bool: 是否成功启动游戏
+    """
+    # 处理汉化文件（自定义汉化修改、气泡渐变色、用户名称、EGO/技能美化、私活Tip、字体）
+    # 输入没有变化时直接使用缓存的处理结果
+    from functions.build_cache import get_or_build
+    from functions.deploy_manager import deploy_tree
+
+    print("开始处理汉化文件...")
+    try:
+        with trace_span('run_game.build'):
+            build_dir = get_or_build(WORKSHOP_LANG_PATH, 'Font')
+    except Exception as e:
+        print(f"处理汉化文件时出错: {e}")
+        finish_trace()
+        return False
+
+    # 增量部署处理好的 LLC_zh-CN 文件夹到游戏目录下的 LimbusCompany_Data/Lang 文件夹 下
+    # 先在 workshop/deploy_staging 中准备好变化的文件再写入，被覆盖的文件保留在 workshop/deploy_previous
+    print(f"开始复制 workshop 下的 LLC_zh-CN 文件夹到游戏目录下的 {game_path}")
+    try:
+        with trace_span('run_game.deploy') as info:
+            stats = deploy_tree(build_dir, os.path.join(game_path, 'LimbusCompany_Data/Lang/LLC_zh-CN'))
+            info.update(files=stats['copied'], bytes=stats['bytes'], skipped=stats['skipped'], removed=stats['removed'])
+        print("汉化复制完成")
+    except Exception as e:
+        print(f"效用汉化复制文件夹时出错: {e}")
+        finish_trace()
+        return False
+
+    from functions.dowloads.zeroasso_dow import create_config_file
+    with trace_span('run_game.create_config'):
+        create_config_file(game_path)
+
+    # 载入mod并启动游戏
+    print("开始载入mod并启动游戏...")
+    from functions.load_mod import main as load_mod_and_launch
+    with trace_span('run_game.launch'):
+        launched = load_mod_and_launch(game_path + '/LimbusCompany.exe')
+
+    finish_trace()
+    return bool(launched)
+
+
+def run_headless() -> bool:
+    """
+    命令行模式：不创建主界面，更新汉化后直接启动游戏，完成后退出程序
+
+    只创建一个隐藏的 Tk 根窗口，用来显示下载进度窗口和提示。和主界面一样检查启动器的新版本，
+    出错或者没有启动游戏时弹窗提示，并以非 0 的退出码退出。
+
+    Returns:
+        bool: 未配置游戏路径时返回 False，由调用者打开主界面让用户选择；否则不会返回
+    """
+    settings_manager = get_settings_manager()
+    game_path = settings_manager.get_setting('game_path')
+    if not game_path or not os.path.exists(game_path): # type: ignore
+        print("错误: 未配置游戏路径，打开主界面")
+        return False
+
+    import tkinter as tk
+    from tkinter import messagebox
+    from functions.dowloads.sql_manager import start_launch_queries, check_new_version, notify_new_version
+    root = tk.Tk()
+    root.withdraw()
+
+    # 版本检查和气泡文本在后台用同一个数据库连接查询
+    version_info = settings_manager.get_setting('version_info')
+    start_launch_queries(include_bubbles=True)
+    result = {}
+
+    def run():
+        try:
+            reset_trace()
+            print("汉化下载中...")
+            update_translation(root)
+            result['launched'] = prepare_and_launch(game_path) # type: ignore
+        except Exception as e:
+            print(f"启动器模式执行出错: {e}")
+            result['error'] = e
+            finish_trace()
+        # 游戏启动之后再检查启动器的新版本，不推迟启动
+        result['version'] = check_new_version(version_info)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+
+    def wait_finished():
+        if worker.is_alive():
+            root.after(100, wait_finished)
+            return
+        # 弹窗在主线程中显示
+        has_update, latest_info = result.get('version', (False, None))
+        if has_update:
+            print(f"启动器的新版本已经发布: {latest_info['version_name']}") # type: ignore
+            notify_new_version(version_info, latest_info)
+        if 'error' in result:
+            messagebox.showerror("错误", f"更新汉化或启动游戏时出错: {result['error']}\n\n"
+                                 "请打开启动器主界面查看详细信息", parent=root)
+        elif not result.get('launched'):
+            messagebox.showerror("错误", "处理汉化或启动游戏失败，请打开启动器主界面查看详细信息", parent=root)
+        print("启动器模式执行完成，程序退出")
+        os._exit(0 if result.get('launched') else 1)
+
+    root.after(100, wait_finished)
+    root.mainloop()
+    os._exit(1)
@@ -0,0 +1,178 @@
+"""
+这个模块记录启动过程中每个阶段的耗时。
+
+各个阶段用 `trace_span` 包起来，记录开始时间、耗时以及字节数、文件数等附加信息。
+启动流程结束时调用 `finish_trace`，把记录导出为 Chrome trace 格式的 workshop/trace.json
+（可以在 chrome://tracing 或 https://ui.perfetto.dev 中打开），并在终端中打印汇总表格。
+
+是否记录由设置 enable_launch_trace 控制，关闭后所有函数都不做任何事。
+
+函数：
+    - `trace_span(name, **args)`: 记录一个阶段的上下文管理器。
+    - `add_trace_event(...)`: 添加在其他进程或线程中测量好的阶段。
+    - `finish_trace()`: 导出 trace.json 并打印汇总表格。
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from functions.settings_manager import get_settings_manager
+
+TRACE_PATH = "workshop/trace.json"
+
+# 汇总表格中会累加的附加信息
+SUMMARY_COUNTERS = ['files', 'bytes']
+
+
+class LaunchTracer:
+    """启动耗时记录器"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events: List[Dict[str, Any]] = []
+        self.origin = time.time()
+
+    def reset(self):
+        """清空记录，重新开始计时"""
+        with self.lock:
+            self.events = []
+            self.origin = time.time()
+
+    def add_event(self, name: str, start: float, duration: float, category: str = 'launch',
+                  args: Optional[Dict[str, Any]] = None, pid: Optional[int] = None, tid: Optional[int] = None):
+        """
+        添加一个已经测量好的阶段
+
+        Args:
+            name: 阶段名称
+            start: 开始时间（time.time()）
+            duration: 耗时（秒）
+            category: 分类
+            args: 附加信息
+            pid: 进程 ID，默认为当前进程
+            tid: 线程 ID，默认为当前线程
+        """
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((start - self.origin) * 1_000_000),
+            'dur': round(duration * 1_000_000),
+            'pid': pid if pid is not None else os.getpid(),
+            'tid': tid if tid is not None else threading.get_ident(),
+            'args': args or {},
+        }
+        with self.lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, category: str = 'launch', **args):
+        """记录 with 块的耗时，可以在块内修改返回的字典补充附加信息"""
+        start = time.time()
+        try:
+            yield args
+        finally:
+            self.add_event(name, start, time.time() - start, category, args)
+
+    def export(self, trace_path: str = TRACE_PATH):
+        """导出 Chrome trace 格式的 JSON 文件"""
+        with self.lock:
+            events = list(self.events)
+        os.makedirs(os.path.dirname(trace_path) or '.', exist_ok=True)
+        with open(trace_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """按阶段名称汇总，按第一次出现的顺序返回"""
+        with self.lock:
+            events = sorted(self.events, key=lambda event: event['ts'])
+        rows: Dict[str, Dict[str, Any]] = {}
+        for event in events:
+            row = rows.setdefault(event['name'], {'name': event['name'], 'count': 0, 'total': 0.0,
+                                                  'max': 0.0, 'files': 0, 'bytes': 0})
+            duration = event['dur'] / 1000
+            row['count'] += 1
+            row['total'] += duration
+            row['max'] = max(row['max'], duration)
+            for counter in SUMMARY_COUNTERS:
+                value = event['args'].get(counter)
+                if isinstance(value, (int, float)):
+                    row[counter] += value
+        return list(rows.values())
+
+    def print_summary(self):
+        """在终端中打印汇总表格"""
+        rows = self.summary()
+        if not rows:
+            return
+        name_width = max(len('阶段'), max(len(row['name']) for row in rows))
+        print("=" * (name_width + 55))
+        print(f"{'阶段':<{name_width - 2}}  {'次数':>4}  {'总耗时(ms)':>9}  {'最长(ms)':>8}  {'文件':>6}  {'大小(MB)':>7}")
+        print("-" * (name_width + 55))
+        for row in rows:
+            files = str(row['files']) if row['files'] else '-'
+            size = f"{row['bytes'] / 1024 / 1024:.1f}" if row['bytes'] else '-'
+            print(f"{row['name']:<{name_width}}  {row['count']:>6}  {row['total']:>12.1f}  {row['max']:>10.1f}  "
+                  f"{files:>8}  {size:>9}")
+        print("=" * (name_width + 55))
+
+
+_tracer = None
+
+
+def get_tracer() -> LaunchTracer:
+    """获取全局启动耗时记录器"""
+    global _tracer
+    if _tracer is None:
+        _tracer = LaunchTracer()
+    return _tracer
+
+
+def is_trace_enabled() -> bool:
+    """是否开启了启动耗时记录"""
+    return bool(get_settings_manager().get_setting('enable_launch_trace'))
+
+
+@contextmanager
+def trace_span(name: str, category: str = 'launch', **args):
+    """
+    记录一个阶段的耗时
+
+    用法：
+        with trace_span('deploy') as info:
+            stats = deploy_tree(...)
+            info['files'] = stats['copied']
+    """
+    if not is_trace_enabled():
+        yield args
+        return
+    with get_tracer().span(name, category, **args) as span_args:
+        yield span_args
+
+
+def add_trace_event(name: str, start: float, duration: float, category: str = 'launch',
+                    args: Optional[Dict[str, Any]] = None, pid: Optional[int] = None, tid: Optional[int] = None):
+    """添加在其他进程或线程中测量好的阶段"""
+    if is_trace_enabled():
+        get_tracer().add_event(name, start, duration, category, args, pid, tid)
+
+
+def reset_trace():
+    """清空记录，开始新的启动流程"""
+    get_tracer().reset()
+
+
+def finish_trace(trace_path: str = TRACE_PATH):
+    """导出 trace.json 并打印汇总表格"""
+    if not is_trace_enabled():
+        return
+    tracer = get_tracer()
+    try:
+        tracer.export(trace_path)
+        tracer.print_summary()
+        print(f"启动耗时记录已保存到: {trace_path}")
+    except Exception as e:
+        print(f"保存启动耗时记录失败: {e}")
@@ -1,4 +1,4 @@
-import requests
+from webFunc.HttpClient import request
 from functions.settings_manager import get_settings_manager
 
 
@@ -10,6 +10,7 @@ class AITranslator:
 
     def translate(self, text: str):
         text = self.prompt.replace("{text}", text)
-        sess = requests.get(f'https://api.sizhi.com/chat?appid={self.appid}&userid={self.userid}&spoken={text}')
+        sess = request('GET', 'https://api.sizhi.com/chat', http2=True,
+                       params={'appid': self.appid, 'userid': self.userid, 'spoken': text})
         answer = sess.json()
         return answer
\ No newline at end of file
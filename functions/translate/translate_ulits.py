@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import requests
+from webFunc.HttpClient import request
 import random
 from hashlib import md5
 import time
@@ -54,7 +55,8 @@ class BaiduTranslatorFixed:
             }
             
             # 发送请求
-            response = requests.post(self.url, data=payload, headers=headers, timeout=30)
+            # 批量翻译时共用连接
+            response = request('POST', self.url, http2=True, data=payload, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -1,8 +1,21 @@
+import sys
+from multiprocessing import freeze_support
+
+if __name__ == "__main__":
+    # 打包后使用进程池处理汉化文件时需要，放在最前面，避免工作进程导入界面相关的模块
+    # 不打包运行时工作进程以 functions.fancy.pipeline_worker 作为主模块，不会导入这个文件
+    freeze_support()
+
+    # 命令行模式（Steam 通过 launcher.vbs 启动）不创建主界面，直接更新汉化并启动游戏
+    # 未配置游戏路径时继续打开主界面
+    if len(sys.argv) > 1:
+        from functions.launch_flow import run_headless
+        run_headless()
+
 import tkinter as tk
 from tkinter import ttk, font
 import os
 import random
-import sys
 import json
 from PIL import Image, ImageTk, ImageFilter
 import pymysql
@@ -11,7 +24,7 @@ from functions.pages.settings_page import init_settings_page
 from functions.settings_manager import get_settings_manager
 from functions.pages.loading_info import create_simple_splash
 from functions.window_ulits import center_window
-from functions.dowloads.sql_manager import check_new_version, notify_new_version
+from functions.dowloads.sql_manager import check_new_version, notify_new_version, start_launch_queries
 from functions.sound_ulits import play_sound
 
 # 添加自定义汉化工具导入
@@ -906,6 +919,14 @@ class FaustLauncherApp:
     def check_settings(self):
         global config_path, settings_manager
         version_info = settings_manager.get_setting("version_info")
+        # 有命令行参数或者没有汉化时启动后马上下载汉化
+        auto_dowload = len(sys.argv) > 1 or not os.path.exists("workshop/LLC_zh-CN")
+        # 版本检查和气泡文本在后台用同一个数据库连接查询
+        start_launch_queries(include_bubbles=auto_dowload)
+
+        # 上一次汉化部署在写入游戏目录的中途被结束时回滚，游戏不会使用新旧混合的文件
+        from functions.deploy_manager import recover_deploy
+        recover_deploy()
 
         if not settings_manager.get_setting("game_path"):
             print("错误: 未配置游戏路径")
@@ -917,9 +938,6 @@ class FaustLauncherApp:
                 settings_manager.save_settings()
                 self.settings_page.refresh_all_displays()
 
-                has_update, latest_info = check_new_version(version_info)
-                notify_new_version(latest_info)
-
             else:
                 print("错误: 未选择游戏文件")
                 os._exit(-1)
@@ -928,7 +946,7 @@ class FaustLauncherApp:
         has_update, latest_info = check_new_version(version_info)
         if has_update:
             print(f"启动器的新版本已经发布: {latest_info['version_name']}") # type: ignore
-            notify_new_version(latest_info)
+            notify_new_version(version_info, latest_info)
 
         else:
             print("当前启动器已是最新版本")
@@ -936,7 +954,7 @@ class FaustLauncherApp:
         config_path = settings_manager.get_setting("game_path")
 
         # 检查是否有命令行参数
-        if len(sys.argv) > 1 or not os.path.exists("workshop/LLC_zh-CN"):
+        if auto_dowload:
             from threading import Thread
             # 有命令行参数，进入命令行模式
             Thread(target=handle_dowload).start()
@@ -1011,73 +1029,26 @@ def handle_dowload(need_run_game=False):
     """命令行模式：执行下载翻译、下载气泡、载入mod并启动游戏"""
     
     global dowloading, root, config_path
-    import threading
-    from time import sleep
+    from functions.launch_flow import update_translation
+    from functions.launch_trace import reset_trace, finish_trace
 
     if dowloading:
         return
     dowloading = True
+    reset_trace()
 
     print("汉化下载中...")
     
     # 导入并执行各个功能模块
     try:
-        # 检测 workshop 下是否有 LLC_zh-CN 文件夹
-        workshop_path = 'workshop/LLC_zh-CN'
-        dowload_path = 'workshop'
-
-        # 1. 下载翻译
-        print("开始下载翻译...")
-        sys.path.append('functions')
-        from functions.dowloads.zeroasso_dow import main_gui as download_translation
-        gui = download_translation(root, dowload_path) # type: ignore
-        dt = threading.Thread(target=gui.root.mainloop)
-
-        while gui.is_downloading:
-            sleep(1)
-        
-        del dt
-        print("翻译下载完成")
-        
-        # 2. 下载气泡
-        print("开始下载气泡...")
-        from functions.dowloads.bubble_dow import main as download_bubble
-        download_bubble(dowload_path) # type: ignore
-        print("气泡下载完成")
-
-        # 检查是否需要更新汉化
-        from functions.dowloads.dow_ulits import check_need_up_translate
-        need_update = check_need_up_translate()
-
-        # 把 'workshop\LimbusCompany_Data\Lang\LLC_zh-CN' 复制到游戏目录下的 'workshop' 文件夹 并删除 LimbusCompany_Data 文件夹
-        import shutil
-
-        if need_update:
-            print("检测到新的汉化版本，准备更新汉化文件...")
-            if os.path.exists(dowload_path + '/LimbusCompany_Data/Lang/LLC_zh-CN'): # type: ignore
-                shutil.copytree(dowload_path + '/LimbusCompany_Data/Lang/LLC_zh-CN', workshop_path, dirs_exist_ok=True) # type: ignore
-                print("文件夹复制完成")
-            else:
-                print("错误: 未找到 workshop 下的 LLC_zh-CN 文件夹")
-        else:
-            print("当前汉化已是最新版本，无需更新")
-
-        # 删除 LimbusCompany_Data 文件夹
-        print("开始删除 LimbusCompany_Data 文件夹...")
-        shutil.rmtree(os.path.join(dowload_path, 'LimbusCompany_Data'), ignore_errors=True) # type: ignore
-        print("LimbusCompany_Data 文件夹删除完成")
-
-        if not os.path.exists('Font/Context/ChineseFont.ttf'):
-            shutil.copytree('Font', 'workshop/LLC_zh-CN', dirs_exist_ok=True) # type: ignore
-            print("字体文件复制完成")
-
-        print("汉化下载及处理全部完成！")
+        update_translation(root, 'workshop')
 
         if len(sys.argv) > 1 or need_run_game:
             # 关闭窗口
             # root.withdraw()
             pass
         else:
+            finish_trace()
             dowloading = False
             return
         
@@ -1086,6 +1057,7 @@ def handle_dowload(need_run_game=False):
         
     except Exception as e:
         print(f"下载过程中出错: {e}")
+        finish_trace()
         return
     
     print("启动器模式执行完成，程序退出")
@@ -1095,210 +1067,15 @@ def handle_dowload(need_run_game=False):
 
 def run_game():
     global config_path, settings_manager
-    # 复制 workshop 下的 LLC_zh-CN 文件夹到游戏目录下的 LimbusCompany_Data/Lang 文件夹 下
-    import shutil
-    # 尝试删除原有的 LimbusCompany_Data/Lang/LLC_zh-CN 文件夹
-    if os.path.exists(os.path.join(config_path, 'LimbusCompany_Data/Lang/LLC_zh-CN')): # type: ignore
-        print("删除原有的 LimbusCompany_Data/Lang/LLC_zh-CN 文件夹")
-        shutil.rmtree(os.path.join(config_path, 'LimbusCompany_Data/Lang/LLC_zh-CN'), ignore_errors=True) # type: ignore
+    from functions.launch_flow import prepare_and_launch
+    from functions.launch_trace import reset_trace
 
-    print(f"开始复制 workshop 下的 LLC_zh-CN 文件夹到游戏目录下的 {config_path}")
-    try:
-        shutil.copytree('workshop/LLC_zh-CN', os.path.join(config_path, 'LimbusCompany_Data/Lang/LLC_zh-CN'), dirs_exist_ok=True) # type: ignore
-        print("汉化复制完成")
-    except Exception as e:
-        print(f"效用汉化复制文件夹时出错: {e}")
-        return
+    # 单独启动游戏时重新开始计时，下载后启动时接着下载阶段记录
+    if not dowloading:
+        reset_trace()
 
-    # 根据 workshop/changes.json 更新 LimbusCompany_Data/Lang/LLC_zh-CN 里的数据
-    print("开始应用自定义汉化修改...")
-    try:
-        # 检查changes.json文件是否存在
-        changes_file = "workshop/changes.json"
-        if os.path.exists(changes_file):
-            # 加载changes.json
-            with open(changes_file, 'r', encoding='utf-8') as f:
-                changes_data = json.load(f)
-            
-            if changes_data:
-                print(f"找到 {len(changes_data)} 个文件的修改记录")
-                
-                # 遍历changes.json中的每个文件修改记录
-                for relative_path, file_changes in changes_data.items():
-                    # 构建完整的文件路径
-                    workshop_file_path = os.path.join("workshop", relative_path)
-                    game_file_path = os.path.join(config_path, "LimbusCompany_Data", "Lang", relative_path) # type: ignore
-                    
-                    # 检查游戏目录中的文件是否存在
-                    if os.path.exists(game_file_path):
-                        print(f"应用修改到: {relative_path}")
-                        
-                        # 读取游戏目录中的原始文件
-                        with open(game_file_path, 'r', encoding='utf-8') as f:
-                            original_data = json.load(f)
-                        
-                        # 应用修改
-                        modified_data = apply_changes_to_data(original_data, file_changes)
-                        
-                        # 保存修改后的文件
-                        with open(game_file_path, 'w', encoding='utf-8') as f:
-                            json.dump(modified_data, f, ensure_ascii=False, indent=4)
-                        
-                        print(f"文件 {relative_path} 修改已应用")
-                    else:
-                        print(f"警告: 游戏目录中未找到文件 {relative_path}")
-            else:
-                print("没有自定义汉化修改需要应用")
-        else:
-            print("没有找到changes.json文件，跳过自定义汉化修改")
-    except Exception as e:
-        print(f"应用自定义汉化修改时出错: {e}")
-    
-    # 气泡渐变色处理
-    if settings_manager.get_setting('enable_text_gradient'):
-        from functions.fancy.dialog_colorful import main as handle_colorful
-        handle_colorful()
-        print("气泡渐变色处理完成")
-
-    # 复制字体文件夹到汉化目录下
-    print("开始复制字体文件夹到汉化目录下...")
-    try:
-        if os.path.exists(config_path + '/LimbusCompany_Data/Lang/LLC_zh-CN/Font'): # type: ignore
-            # 创建Font文件夹
-            os.makedirs(config_path + '/LimbusCompany_Data/Lang/LLC_zh-CN/Font', exist_ok=True) # type: ignore
-
-        shutil.copytree('Font', config_path + '/LimbusCompany_Data/Lang/LLC_zh-CN/Font', dirs_exist_ok=True) # type: ignore
-        print("字体文件夹复制完成")
-    except Exception as e:
-        print(f"复制字体文件夹时出错: {e}")
-        return
-
-    from functions.dowloads.zeroasso_dow import create_config_file
-    create_config_file(settings_manager.get_setting('game_path'))
-
-    # 是否设置用户名称
-    if settings_manager.get_setting('enable_show_user_name'):
-        set_user_name()
-
-    # 是否进行 EGO 样式美化
-    if settings_manager.get_setting('enable_ego_style'):
-        from functions.fancy.EGO_colorful import main as apply_ego_style
-        apply_ego_style()
-
-    # 技能描述美化
-    if settings_manager.get_setting('enable_skill_style'):
-        from functions.fancy.skill_info import handle_skill
-        handle_skill(config_path + '/LimbusCompany_Data/Lang/LLC_zh-CN/') # type: ignore
-
-    if settings_manager.get_setting('enable_speical_tip'):
-        from functions.fancy.hint_set import simple_replace
-        simple_replace(config_path + '/LimbusCompany_Data/Lang/LLC_zh-CN/BattleHint.json') # type: ignore
-
-    # 载入mod并启动游戏
-    print("开始载入mod并启动游戏...")
-    from functions.load_mod import main as load_mod_and_launch
-    load_mod_and_launch(config_path + '/LimbusCompany.exe') # type: ignore
-
-    os._exit(0)
-
-def set_user_name():
-    """设置用户名称到 UserInfo_Friends.json 中"""
-    global settings_manager, config_path
-    user_name = settings_manager.get_setting('user_name')
-    from json import dump, load
-    datalist = load(open(f'{config_path}/LimbusCompany_Data/Lang/LLC_zh-CN/UserInfo_Friends.json','r',encoding='utf-8'))
-    for data in datalist['dataList']:
-        if data['id'] == 'Uid_Copy':
-            data['content'] = f'{user_name}'
-    dump(datalist, indent=4, fp=open(f'{config_path}/LimbusCompany_Data/Lang/LLC_zh-CN/UserInfo_Friends.json','w',encoding='utf-8'))
-
-# 应用changes.json修改的辅助函数
-def apply_changes_to_data(original_data, changes):
-    """递归应用修改到数据 - 适配新的修改记录结构（包含id）"""
-
-    print(f"应用用户自定义json修改: {type(original_data)}")
-
-    if isinstance(original_data, dict) and isinstance(changes, dict):
-        result = {}
-        for key, value in original_data.items():
-            if key in changes:
-                # 如果changes中有对应的键，应用修改
-                if isinstance(value, (dict, list)) and isinstance(changes[key], (dict, list)):
-                    result[key] = apply_changes_to_data(value, changes[key])
-                else:
-                    result[key] = changes[key]
-            else:
-                result[key] = value
-        return result
-    elif isinstance(original_data, list) and isinstance(changes, list):
-        result = []
-        
-        # 检查是否是包含id的字典列表的特殊修改记录
-        if (len(original_data) > 0 and isinstance(original_data[0], dict) and 
-            'id' in original_data[0] and len(changes) > 0 and 
-            isinstance(changes[0], dict) and 'id' in changes[0]):
-            
-            # 对于包含id的字典列表，根据id进行匹配修改
-            original_dict = {item['id']: item for item in original_data if 'id' in item}
-            
-            for change_item in changes:
-                if isinstance(change_item, dict) and 'id' in change_item:
-                    change_id = change_item['id']
-                    
-                    if change_id in original_dict:
-                        # 找到对应的原始项
-                        original_item = original_dict[change_id]
-                        
-                        if 'action' in change_item:
-                            # 处理特殊操作
-                            if change_item['action'] == 'deleted':
-                                # 删除项，不添加到结果中
-                                continue
-                            elif change_item['action'] == 'added':
-                                # 新增项，直接添加到结果中
-                                result.append(change_item.get('changes', change_item))
-                                continue
-                        
-                        # 应用修改
-                        if 'changes' in change_item:
-                            # 有具体的修改内容
-                            modified_item = apply_changes_to_data(original_item, change_item['changes'])
-                            result.append(modified_item)
-                        else:
-                            # 没有具体修改内容，使用原始项
-                            result.append(original_item)
-                    else:
-                        # 新增项（id不在原始数据中）
-                        if 'action' in change_item and change_item['action'] == 'added':
-                            result.append(change_item.get('changes', change_item))
-                        else:
-                            # 未知情况，保留原始项
-                            result.append(original_dict.get(change_id, change_item))
-            
-            # 添加未被修改的原始项
-            for original_item in original_data:
-                if isinstance(original_item, dict) and 'id' in original_item:
-                    original_id = original_item['id']
-                    if original_id not in [item['id'] for item in changes if isinstance(item, dict) and 'id' in item]:
-                        result.append(original_item)
-                else:
-                    # 对于不包含id的项，直接添加
-                    result.append(original_item)
-            
-            return result
-        else:
-            # 对于普通的列表，使用原来的逻辑
-            for i, item in enumerate(original_data):
-                if i < len(changes):
-                    if isinstance(item, (dict, list)) and isinstance(changes[i], (dict, list)):
-                        result.append(apply_changes_to_data(item, changes[i]))
-                    else:
-                        result.append(changes[i])
-                else:
-                    result.append(item)
-            return result
-    else:
-        return original_data
+    if prepare_and_launch(config_path):
+        os._exit(0)
 
 def main():
     """主函数"""
@@ -0,0 +1,115 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from webFunc import AsyncRace
+
+
+class _Response:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class _FakeProxies:
+    """按地址控制延迟和结果的代理替身，记录每个请求的开始时间和是否被取消"""
+
+    def __init__(self, proxies):
+        self.proxies = proxies
+        self.started = {}
+        self.cancelled = set()
+        self.origin = time.monotonic()
+
+    async def get(self, url, params=None, headers=None, timeout=None):
+        self.started[url] = time.monotonic() - self.origin
+        delay, ok = self.proxies[url]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.add(url)
+            raise
+        if not ok:
+            return _Response(502, None)
+        return _Response(200, {'proxy': url})
+
+
+def _race(monkeypatch, proxies, stagger):
+    client = _FakeProxies(proxies)
+    monkeypatch.setattr(AsyncRace, '_get_client', lambda verify: client)
+    reports = []
+    result = asyncio.run(AsyncRace._race(list(proxies), None, None, True, 5, stagger,
+                                         lambda index, ok, latency: reports.append((index, ok))))
+    return result, reports, client
+
+
+def test_fast_failure_starts_next_proxy_without_stagger(monkeypatch):
+    start = time.monotonic()
+    result, reports, client = _race(monkeypatch, {'fail': (0.05, False), 'slow': (0.3, True)}, stagger=2.0)
+
+    assert result == (1, {'proxy': 'slow'})
+    assert client.started['slow'] < 1.0
+    assert time.monotonic() - start < 1.5
+    assert reports == [(0, False), (1, True)]
+
+
+def test_losers_are_cancelled_and_not_reported(monkeypatch):
+    result, reports, client = _race(monkeypatch, {'hang': (5, True), 'fast': (0.05, True), 'late': (5, True)},
+                                    stagger=0.05)
+
+    assert result == (1, {'proxy': 'fast'})
+    assert reports == [(1, True)]
+    assert 'hang' in client.cancelled
+    # 第三个请求可能在第二个成功前已经启动，启动了就必须被取消
+    assert 'late' not in client.started or 'late' in client.cancelled
+
+
+def test_all_proxies_failing_returns_none(monkeypatch):
+    result, reports, client = _race(monkeypatch, {'a': (0.01, False), 'b': (0.02, False), 'c': (0, False)},
+                                    stagger=0.05)
+
+    assert result is None
+    assert sorted(reports) == [(0, False), (1, False), (2, False)]
+    assert not client.cancelled
+
+
+class _DelayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        delay, status = self.server.behaviour # type: ignore
+        time.sleep(delay)
+        body = json.dumps({'port': self.server.server_address[1]}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_race_json_with_local_proxies():
+    pytest.importorskip('httpx')
+    servers = []
+    for behaviour in ((0.01, 502), (0.05, 200), (3, 200)):
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), _DelayHandler)
+        httpd.behaviour = behaviour # type: ignore
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+    try:
+        urls = [f'http://127.0.0.1:{httpd.server_address[1]}/' for httpd in servers]
+        reports = []
+        result = AsyncRace.race_json(urls, stagger=1.0, report=lambda *args: reports.append(args[:2]))
+
+        assert result == (1, {'port': servers[1].server_address[1]})
+        assert reports == [(0, False), (1, True)]
+    finally:
+        for httpd in servers:
+            httpd.shutdown()
+            httpd.server_close()
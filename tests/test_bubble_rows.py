@@ -0,0 +1,218 @@
+import os
+import re
+import json
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('pymysql')
+from functions.dowloads import sql_manager
+from functions.dowloads.sql_manager import (
+    _upload_bubble_rows, _sync_bubble_rows, _normalize_bubble_file, _bubble_hash,
+    BUBBLE_ROWS_TABLE, BUBBLE_ORDER_TABLE,
+)
+
+
+def _md5(text):
+    return hashlib.md5(text.encode('utf-8')).hexdigest() if text is not None else None
+
+
+def _bubble_file(*entries):
+    return json.dumps({'dataList': [{'id': entry_id, 'dlg': dlg} for entry_id, dlg in entries]},
+                      ensure_ascii=False, indent=4)
+
+
+class FakeBubbleTables:
+    """按条目保存气泡文本的两个表格的替身，只执行上传和同步用到的语句"""
+
+    def __init__(self):
+        self.rows = {}
+        self.orders = {}
+        self.clock = datetime(2026, 1, 1)
+        self.fetched_rows = 0
+
+    def now(self):
+        self.clock += timedelta(microseconds=1500)
+        return self.clock
+
+    def execute(self, sql, args):
+        sql = ' '.join(sql.split())
+        if sql == f"SHOW TABLES LIKE '{BUBBLE_ORDER_TABLE}'":
+            return [{'table': BUBBLE_ORDER_TABLE}]
+        if sql.startswith(f"DELETE FROM {BUBBLE_ROWS_TABLE} WHERE file"):
+            self.rows = {key: row for key, row in self.rows.items() if key[0] != args[0]}
+            return []
+        if sql.startswith(f"DELETE FROM {BUBBLE_ORDER_TABLE} WHERE file"):
+            self.orders.pop(args[0], None)
+            return []
+        if sql.startswith("SELECT entry_id, deleted, MD5(dlg)"):
+            return [{'entry_id': entry_id, 'deleted': row['deleted'], 'dlg_md5': _md5(row['dlg']),
+                     'extra_md5': _md5(row['extra'])}
+                    for (file_name, entry_id), row in self.rows.items() if file_name == args[0]]
+        if sql.startswith("SELECT MD5(entry_ids) AS order_md5"):
+            return [{'order_md5': _md5(self.orders[args[0]])}] if args[0] in self.orders else []
+        if sql.startswith(f"INSERT INTO {BUBBLE_ORDER_TABLE}"):
+            self.orders[args[0]] = args[1]
+            return []
+        if sql.startswith(f"SELECT file, MD5(entry_ids) AS order_md5 FROM {BUBBLE_ORDER_TABLE}"):
+            return [{'file': file_name, 'order_md5': _md5(ids)} for file_name, ids in self.orders.items()]
+        if sql.startswith("SELECT MAX(updated_at)"):
+            return [{'latest': max((row['updated_at'] for row in self.rows.values()), default=None)}]
+        if sql.startswith("SELECT file, entry_ids"):
+            return [{'file': file_name, 'entry_ids': self.orders[file_name], 'order_md5': _md5(self.orders[file_name])}
+                    for file_name in args if file_name in self.orders]
+        if sql.startswith("SELECT file, entry_id, dlg, extra, deleted, updated_at"):
+            if 'updated_at > %s' in sql:
+                rows = [row for row in self.rows.values() if row['updated_at'] > args[0]]
+            else:
+                rows = [row for row in self.rows.values() if not row['deleted']]
+            self.fetched_rows += len(rows)
+            return [dict(row) for row in rows]
+        raise AssertionError(f"未知的语句: {sql}")
+
+    def executemany(self, sql, args_list):
+        sql = ' '.join(sql.split())
+        now = self.now()
+        for args in args_list:
+            if sql.startswith(f"INSERT INTO {BUBBLE_ROWS_TABLE}"):
+                file_name, entry_id, dlg, extra = args
+                self.rows[(file_name, entry_id)] = {'file': file_name, 'entry_id': entry_id, 'dlg': dlg,
+                                                    'extra': extra, 'deleted': 0, 'updated_at': now}
+            elif re.match(f"UPDATE {BUBBLE_ROWS_TABLE} SET deleted = TRUE", sql):
+                row = self.rows[tuple(args)]
+                row['deleted'], row['updated_at'] = 1, now
+            else:
+                raise AssertionError(f"未知的语句: {sql}")
+
+
+class FakeCursor:
+    def __init__(self, tables):
+        self.tables = tables
+        self.result = []
+        self.upserts = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, args=None):
+        self.result = self.tables.execute(sql, args)
+
+    def executemany(self, sql, args_list):
+        if 'INSERT INTO' in sql:
+            self.upserts += len(args_list)
+        self.tables.executemany(sql, args_list)
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def cursor(self):
+        return FakeCursor(self.tables)
+
+
+@pytest.fixture
+def tables(monkeypatch, tmp_path):
+    monkeypatch.setattr(sql_manager, 'BUBBLE_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(sql_manager, 'BUBBLE_ROWS_CACHE', str(tmp_path / 'rows.json'))
+    return FakeBubbleTables()
+
+
+def _upload(tables, contents):
+    cursor = FakeCursor(tables)
+    _upload_bubble_rows(cursor, {name: _normalize_bubble_file(content) for name, content in contents.items()})
+    return cursor.upserts
+
+
+def _sync(tables):
+    before = tables.fetched_rows
+    rebuilt = _sync_bubble_rows(FakeConnection(tables))
+    return rebuilt, tables.fetched_rows - before
+
+
+def test_insert_near_top_only_moves_one_entry(tables):
+    entries = [(i, f"台词{i}") for i in range(100)]
+    original = _bubble_file(*entries)
+    assert _upload(tables, {'a.json': original}) == 100
+    rebuilt, fetched = _sync(tables)
+    assert fetched == 100
+    assert _bubble_hash(rebuilt['a.json']) == _bubble_hash(_normalize_bubble_file(original))
+
+    edited = _bubble_file(entries[0], (1000, "新台词"), *entries[1:])
+    assert _upload(tables, {'a.json': edited}) == 1
+    rebuilt, fetched = _sync(tables)
+    assert fetched == 1
+    assert rebuilt['a.json'] == _normalize_bubble_file(edited)
+
+    # 没有修改时不下载任何条目
+    rebuilt, fetched = _sync(tables)
+    assert fetched == 0
+    assert rebuilt['a.json'] == _normalize_bubble_file(edited)
+
+
+def test_removed_entries_are_dropped(tables):
+    _upload(tables, {'a.json': _bubble_file((1, "a"), (2, "b"), (3, "c"))})
+    _sync(tables)
+
+    _upload(tables, {'a.json': _bubble_file((1, "a"), (3, "c"))})
+    rebuilt, fetched = _sync(tables)
+
+    assert fetched == 1
+    assert rebuilt['a.json'] == _normalize_bubble_file(_bubble_file((1, "a"), (3, "c")))
+
+
+def test_unsplittable_file_only_drops_its_own_rows(tables):
+    _upload(tables, {'a.json': _bubble_file((1, "a")), 'b.json': _bubble_file((2, "b"))})
+    _sync(tables)
+
+    _upload(tables, {'a.json': _bubble_file((1, "a")), 'b.json': '{"dataList": [{"id": 1}, {"id": 1}]}'})
+    rebuilt, _ = _sync(tables)
+
+    assert set(rebuilt) == {'a.json'}
+    assert ('a.json', '1') in tables.rows
+    assert 'b.json' not in tables.orders
+
+
+def test_rebuild_mismatch_falls_back_to_whole_file(tables, monkeypatch):
+    content = _bubble_file((1, "a"), (2, "b"))
+    _upload(tables, {'BattleSpeechBubbleDlg.json': content})
+    # 条目被篡改，合并结果与文件的校验和不一致
+    tables.rows[('BattleSpeechBubbleDlg.json', '2')]['dlg'] = "x"
+
+    expected = _normalize_bubble_file(content)
+    downloads = []
+
+    class Launcher(FakeCursor):
+        def execute(self, sql, args=None):
+            sql = ' '.join(sql.split())
+            if sql == "SHOW TABLES LIKE 'faust_launcher'" or 'LIKE \'battle_speech_bubble_z_hash\'' in sql:
+                self.result = [{'x': 1}]
+            elif sql.startswith("SELECT battle_speech_bubble_hash"):
+                self.result = [{f"{column}_hash": _bubble_hash(expected) for column, _ in sql_manager.BUBBLE_FILES}]
+            elif sql.startswith("SELECT IF("):
+                downloads.append(sql)
+                self.result = [{**{f"{column}_z": None for column, _ in sql_manager.BUBBLE_FILES},
+                                **{column: expected for column, _ in sql_manager.BUBBLE_FILES}}]
+            else:
+                super().execute(sql, args)
+
+    class Connection(FakeConnection):
+        def cursor(self):
+            return Launcher(self.tables)
+
+    result = sql_manager._query_bubble_json_files(Connection(tables))
+
+    assert result == (expected, expected, expected)
+    # 合并失败的文件下载整个文件，本地的条目缓存被删除，下次重新下载所有条目
+    assert 'IF(battle_speech_bubble_z_hash <=> battle_speech_bubble_hash' in downloads[0]
+    assert not os.path.exists(sql_manager.BUBBLE_ROWS_CACHE)
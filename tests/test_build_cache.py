@@ -0,0 +1,53 @@
+import itertools
+import json
+import os
+
+import pytest
+
+from functions import build_cache
+from functions.fancy import pipeline
+
+
+@pytest.fixture
+def transforms(monkeypatch):
+    registry = {}
+    monkeypatch.setattr(pipeline, '_transforms', registry)
+    monkeypatch.setattr(pipeline, '_builtin_loaded', True)
+    counter = itertools.count(1)
+
+    def styled(data, relative_path, context):
+        data['styled'] = True
+        return data
+
+    def random_tip(data, relative_path, context):
+        data.setdefault('tips', []).append(next(counter))
+        return data
+
+    match = lambda path, context: path == 'BattleHint.json'
+    registry['style'] = pipeline.Transform('style', 10, match, styled)
+    registry['tip'] = pipeline.Transform('tip', 60, match, random_tip, cacheable=False)
+    return registry
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_random_step_runs_after_cache_restore(tmp_path, transforms):
+    source = tmp_path / 'LLC_zh-CN'
+    source.mkdir()
+    (source / 'BattleHint.json').write_text('{"dataList": []}', encoding='utf-8')
+    cache_dir = str(tmp_path / 'build_cache')
+    font_dir = str(tmp_path / 'Font')
+
+    lang_dir = build_cache.get_or_build(str(source), font_dir, cache_dir)
+    assert _read(os.path.join(lang_dir, 'BattleHint.json')) == {'dataList': [], 'styled': True, 'tips': [1]}
+
+    # 缓存命中时从缓存版本重新执行，不叠加在上一次的结果上
+    assert build_cache.get_or_build(str(source), font_dir, cache_dir) == lang_dir
+    assert _read(os.path.join(lang_dir, 'BattleHint.json')) == {'dataList': [], 'styled': True, 'tips': [2]}
+
+    del transforms['tip']
+    build_cache.get_or_build(str(source), font_dir, cache_dir)
+    assert _read(os.path.join(lang_dir, 'BattleHint.json')) == {'dataList': [], 'styled': True}
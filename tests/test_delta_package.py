@@ -0,0 +1,51 @@
+import json
+import zipfile
+
+import pytest
+
+from webFunc.DeltaPackage import build_delta, apply_delta, DeltaError, LLC_SUBTREE, VERSION_FILE
+
+BUBBLE = 'BattleSpeechBubbleDlg.json'
+
+
+def _pack(path, version, files):
+    with zipfile.ZipFile(path, 'w') as zip_ref:
+        zip_ref.writestr(f'{LLC_SUBTREE}/{VERSION_FILE}', json.dumps({'version': version}))
+        for name, content in files.items():
+            zip_ref.writestr(f'{LLC_SUBTREE}/{name}', content)
+
+
+@pytest.fixture
+def delta(tmp_path):
+    old, new, out = tmp_path / 'old.zip', tmp_path / 'new.zip', tmp_path / 'delta.zip'
+    _pack(old, '1', {'Skills.json': 'old skills', BUBBLE: 'old bubble', 'Removed.json': 'gone'})
+    _pack(new, '2', {'Skills.json': 'new skills', BUBBLE: 'new bubble'})
+    build_delta(str(old), str(new), str(out), '1', '2')
+
+    installed = tmp_path / 'LLC_zh-CN'
+    with zipfile.ZipFile(old) as zip_ref:
+        for info in zip_ref.infolist():
+            target = installed / info.filename[len(LLC_SUBTREE) + 1:]
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(zip_ref.read(info))
+    # 已安装的气泡文本被数据库中的版本替换
+    (installed / BUBBLE).write_text('bubble from database')
+    return out, installed
+
+
+def test_replaced_bubble_file_fails_base_check(delta):
+    out, installed = delta
+    with pytest.raises(DeltaError):
+        apply_delta(str(out), str(installed), '1', '2')
+    assert (installed / 'Skills.json').read_text() == 'old skills'
+
+
+def test_unverified_bubble_file_is_overwritten(delta):
+    out, installed = delta
+    stats = apply_delta(str(out), str(installed), '1', '2', unverified_paths=[BUBBLE])
+
+    assert stats == {'files': 3, 'removed': 1}
+    assert (installed / 'Skills.json').read_text() == 'new skills'
+    assert (installed / BUBBLE).read_text() == 'new bubble'
+    assert not (installed / 'Removed.json').exists()
+    assert json.loads((installed / VERSION_FILE).read_text()) == {'version': '2'}
@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+from functions import deploy_manager
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    source = tmp_path / 'workshop' / 'LLC_zh-CN'
+    target = tmp_path / 'game' / 'Lang' / 'LLC_zh-CN'
+    monkeypatch.setattr(deploy_manager, 'DEPLOY_STAGING_DIR', str(tmp_path / 'workshop' / 'deploy_staging'))
+    source.mkdir(parents=True)
+    (source / 'a.json').write_text('a1', encoding='utf-8')
+    (source / 'b.json').write_text('b1', encoding='utf-8')
+    manifest = str(tmp_path / 'workshop' / 'deploy_manifest.json')
+    previous = str(tmp_path / 'workshop' / 'deploy_previous')
+    return str(source), str(target), manifest, previous
+
+
+def _deploy(paths):
+    source, target, manifest, previous = paths
+    stats = deploy_manager.prepare_staging(source, target, manifest, deploy_manager.DEPLOY_STAGING_DIR)
+    if stats['staged']:
+        deploy_manager.commit_staging(target, manifest, deploy_manager.DEPLOY_STAGING_DIR, previous)
+    return stats
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_deploy_keeps_game_lang_dir_clean_and_rolls_back(paths):
+    source, target, manifest, previous = paths
+    assert _deploy(paths)['copied'] == 2
+
+    with open(os.path.join(source, 'a.json'), 'w', encoding='utf-8') as f:
+        f.write('a2')
+    os.remove(os.path.join(source, 'b.json'))
+    with open(os.path.join(source, 'c.json'), 'w', encoding='utf-8') as f:
+        f.write('c2')
+    stats = _deploy(paths)
+    assert (stats['copied'], stats['skipped'], stats['removed']) == (2, 0, 1)
+
+    assert sorted(os.listdir(os.path.dirname(target))) == ['LLC_zh-CN']
+    assert sorted(os.listdir(target)) == ['a.json', 'c.json']
+    # 上一个版本是独立的副本
+    assert os.stat(os.path.join(previous, 'files', 'a.json')).st_ino != os.stat(os.path.join(target, 'a.json')).st_ino
+
+    assert deploy_manager.rollback_deploy(target, manifest, previous)
+    assert sorted(os.listdir(target)) == ['a.json', 'b.json']
+    assert _read(os.path.join(target, 'a.json')) == 'a1'
+    # 回滚后的清单与游戏目录一致，再次部署只复制变化的文件
+    stats = _deploy(paths)
+    assert (stats['copied'], stats['removed']) == (2, 1)
+    assert sorted(os.listdir(target)) == ['a.json', 'c.json']
+
+
+def test_failed_commit_restores_previous_files(paths, monkeypatch):
+    source, target, manifest, previous = paths
+    _deploy(paths)
+    for name in ('a.json', 'b.json'):
+        with open(os.path.join(source, name), 'w', encoding='utf-8') as f:
+            f.write(name + ' new')
+
+    moved = []
+
+    def failing_move(source_path, target_path):
+        if moved:
+            raise OSError('disk full')
+        moved.append(target_path)
+        os.replace(source_path, target_path)
+
+    monkeypatch.setattr(deploy_manager, '_move_file', failing_move)
+    with pytest.raises(OSError):
+        _deploy(paths)
+
+    assert _read(os.path.join(target, 'a.json')) == 'a1'
+    assert _read(os.path.join(target, 'b.json')) == 'b1'
+    assert deploy_manager.load_manifest(manifest) is not None
+
+
+def test_first_deploy_removes_files_missing_from_build(paths):
+    source, target, manifest, previous = paths
+    os.makedirs(target)
+    with open(os.path.join(target, 'stale.json'), 'w', encoding='utf-8') as f:
+        f.write('old')
+
+    stats = _deploy(paths)
+    assert (stats['copied'], stats['removed']) == (2, 1)
+    assert sorted(os.listdir(target)) == ['a.json', 'b.json']
+
+
+def test_interrupted_commit_is_rolled_back_on_recovery(paths, monkeypatch):
+    source, target, manifest, previous = paths
+    _deploy(paths)
+    for name in ('a.json', 'b.json'):
+        with open(os.path.join(source, name), 'w', encoding='utf-8') as f:
+            f.write(name + ' new')
+
+    class Killed(BaseException):
+        pass
+
+    moved = []
+
+    def killed_move(source_path, target_path):
+        # 模拟写入第二个文件前进程被结束：不会执行 except Exception 中的回滚
+        if moved:
+            raise Killed()
+        moved.append(target_path)
+        os.replace(source_path, target_path)
+
+    monkeypatch.setattr(deploy_manager, '_move_file', killed_move)
+    with pytest.raises(Killed):
+        _deploy(paths)
+    contents = [_read(os.path.join(target, name)) for name in ('a.json', 'b.json')]
+    assert sum(content.endswith(' new') for content in contents) == 1
+
+    assert deploy_manager.recover_deploy(manifest, previous)
+    assert _read(os.path.join(target, 'a.json')) == 'a1'
+    assert _read(os.path.join(target, 'b.json')) == 'b1'
+    assert not deploy_manager.recover_deploy(manifest, previous)
+
+    # 回滚后清单与游戏目录一致，再次部署会写入新版本
+    monkeypatch.undo()
+    monkeypatch.setattr(deploy_manager, 'DEPLOY_STAGING_DIR', os.path.join(os.path.dirname(previous), 'deploy_staging'))
+    assert _deploy(paths)['copied'] == 2
+    assert _read(os.path.join(target, 'b.json')) == 'b.json new'
@@ -0,0 +1,59 @@
+import os
+import shutil
+import zipfile
+
+import pytest
+
+from functions.dowloads import extract_ulits
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(extract_ulits, 'EXTRACT_MANIFEST_PATH', str(tmp_path / 'extract_manifest.json'))
+    monkeypatch.setattr(extract_ulits, '_pending_manifests', {})
+    archive_path = tmp_path / 'LLC_zh-CN.zip'
+    with zipfile.ZipFile(archive_path, 'w') as zip_ref:
+        zip_ref.writestr('Lang/LLC_zh-CN/a.json', '{"a": 1}')
+        zip_ref.writestr('Lang/LLC_zh-CN/b.json', '{"b": 2}')
+    return str(archive_path)
+
+
+def _extract_and_copy(archive_path, tmp_path, copy=True):
+    extract_path = str(tmp_path / 'download')
+    compare_path = str(tmp_path / 'LLC_zh-CN')
+    stats = extract_ulits.extract_selective(archive_path, extract_path, 'Lang/LLC_zh-CN', compare_path)
+    if copy:
+        if os.path.exists(os.path.join(extract_path, 'Lang/LLC_zh-CN')):
+            shutil.copytree(os.path.join(extract_path, 'Lang/LLC_zh-CN'), compare_path, dirs_exist_ok=True)
+        extract_ulits.commit_manifest(compare_path)
+    shutil.rmtree(extract_path, ignore_errors=True)
+    return stats, compare_path
+
+
+def test_manifest_recorded_only_after_copy(archive, tmp_path):
+    stats, compare_path = _extract_and_copy(archive, tmp_path, copy=False)
+    assert stats['extracted'] == 2
+    assert os.path.abspath(compare_path) not in extract_ulits._load_manifest()
+
+    stats, compare_path = _extract_and_copy(archive, tmp_path)
+    assert stats['extracted'] == 2
+    recorded = extract_ulits._load_manifest()[os.path.abspath(compare_path)]
+    assert sorted(recorded) == ['a.json', 'b.json']
+    assert all(len(entry) == 3 for entry in recorded.values())
+
+    stats, _ = _extract_and_copy(archive, tmp_path)
+    assert stats == {'extracted': 0, 'skipped': 2, 'total': 2}
+
+
+def test_same_size_edit_after_record_is_extracted(archive, tmp_path):
+    _, compare_path = _extract_and_copy(archive, tmp_path)
+    edited = os.path.join(compare_path, 'a.json')
+    with open(edited, 'w') as f:
+        f.write('{"a": 9}')
+    stat = os.stat(edited)
+    os.utime(edited, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    stats, _ = _extract_and_copy(archive, tmp_path)
+    assert stats['extracted'] == 1
+    with open(edited) as f:
+        assert f.read() == '{"a": 1}'
@@ -0,0 +1,133 @@
+import os
+import json
+import socket
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from functions.dowloads import http_ulits
+from functions.dowloads.http_ulits import download_resumable, PART_SUFFIX, META_SUFFIX
+
+PAYLOAD = os.urandom(300 * 1024)
+PAYLOAD_SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """支持 Range/If-Range 的文件服务器，cuts 中的每一项让一次响应在发送这么多字节后断开连接"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers)) # type: ignore
+        data = server.payload # type: ignore
+        start = 0
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if range_header and (if_range is None or if_range == server.etag): # type: ignore
+            start = int(range_header.split('=', 1)[1].rstrip('-'))
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(data)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', server.etag) # type: ignore
+        self.end_headers()
+        if server.cuts: # type: ignore
+            # 发送一部分后断开连接
+            self.wfile.write(body[:server.cuts.pop(0)]) # type: ignore
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    httpd.payload = PAYLOAD # type: ignore
+    httpd.etag = '"v1"' # type: ignore
+    httpd.cuts = [] # type: ignore
+    httpd.requests = [] # type: ignore
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f'http://127.0.0.1:{httpd.server_address[1]}/pack.zip' # type: ignore
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(http_ulits, 'RETRY_DELAY', 0)
+
+
+def _download(server, target, **kwargs):
+    with requests.Session() as session:
+        return download_resumable(server.url, str(target), session=session, **kwargs)
+
+
+def test_resume_after_connection_cut(server, tmp_path):
+    server.cuts = [100 * 1024]
+    target = tmp_path / 'pack.zip'
+
+    assert _download(server, target, expected_sha256=PAYLOAD_SHA256)
+
+    assert target.read_bytes() == PAYLOAD
+    assert len(server.requests) == 2
+    first, second = server.requests
+    assert 'Range' not in first
+    offset = int(second['Range'].split('=', 1)[1].rstrip('-'))
+    assert 0 < offset <= 100 * 1024
+    assert second['If-Range'] == '"v1"'
+    assert not os.path.exists(str(target) + PART_SUFFIX)
+    assert not os.path.exists(str(target) + META_SUFFIX)
+
+
+def test_changed_etag_restarts_from_zero(server, tmp_path):
+    target = tmp_path / 'pack.zip'
+    # 上次下载的是旧版本的文件
+    (tmp_path / ('pack.zip' + PART_SUFFIX)).write_bytes(b'x' * 1000)
+    (tmp_path / ('pack.zip' + META_SUFFIX)).write_text(json.dumps(
+        {'url': server.url, 'etag': '"v0"', 'last_modified': '', 'size': len(PAYLOAD)}))
+
+    assert _download(server, target, expected_sha256=PAYLOAD_SHA256)
+
+    assert target.read_bytes() == PAYLOAD
+    assert server.requests[0]['If-Range'] == '"v0"'
+
+
+def test_complete_part_is_finished_on_416(server, tmp_path):
+    target = tmp_path / 'pack.zip'
+    (tmp_path / ('pack.zip' + PART_SUFFIX)).write_bytes(PAYLOAD)
+    (tmp_path / ('pack.zip' + META_SUFFIX)).write_text(json.dumps(
+        {'url': server.url, 'etag': '"v1"', 'last_modified': '', 'size': len(PAYLOAD)}))
+
+    assert _download(server, target, expected_sha256=PAYLOAD_SHA256)
+
+    assert target.read_bytes() == PAYLOAD
+    assert len(server.requests) == 1
+    assert server.requests[0]['Range'] == f'bytes={len(PAYLOAD)}-'
+
+
+def test_sha256_mismatch_deletes_download(server, tmp_path):
+    server.cuts = [50 * 1024]
+    target = tmp_path / 'pack.zip'
+
+    assert not _download(server, target, expected_sha256='0' * 64)
+
+    assert not target.exists()
+    assert not os.path.exists(str(target) + PART_SUFFIX)
+    assert not os.path.exists(str(target) + META_SUFFIX)
@@ -0,0 +1,44 @@
+import json
+
+from functions.fancy.pipeline import Transform, process_file
+
+
+def _transform(name, apply, indent=2):
+    return Transform(name=name, order=0, match=lambda path, context: True, apply=apply, indent=indent)
+
+
+def _add(key):
+    def apply(data, relative_path, context):
+        data[key] = True
+        return data
+    return apply
+
+
+def _break_halfway(data, relative_path, context):
+    data['partial'] = True
+    raise ValueError('broken')
+
+
+def test_failed_transform_leaves_no_partial_changes(tmp_path):
+    file_path = tmp_path / 'Skill.json'
+    file_path.write_text('{"dataList": []}', encoding='utf-8')
+
+    transforms = [_transform('first', _add('first')), _transform('broken', _break_halfway),
+                  _transform('last', _add('last'), indent=4)]
+    assert process_file(str(file_path), 'Skill.json', transforms, {}) == ['first', 'last']
+
+    text = file_path.read_text(encoding='utf-8')
+    assert json.loads(text) == {'dataList': [], 'first': True, 'last': True}
+    assert text == json.dumps(json.loads(text), ensure_ascii=False, indent=4)
+
+
+def test_nothing_written_when_every_transform_fails(tmp_path):
+    source = tmp_path / 'source.json'
+    source.write_text('{"a":  1}', encoding='utf-8')
+    output = tmp_path / 'build' / 'source.json'
+
+    assert process_file(str(source), 'source.json', [_transform('broken', _break_halfway)], {}) == []
+    assert source.read_text(encoding='utf-8') == '{"a":  1}'
+
+    process_file(str(source), 'source.json', [_transform('broken', _break_halfway)], {}, output_path=str(output))
+    assert output.read_text(encoding='utf-8') == '{"a":  1}'
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from functions.fancy import pipeline
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_thread_pool_keeps_each_task_output_and_stdout(tmp_path, monkeypatch):
+    def noisy(data, relative_path, context):
+        for _ in range(3):
+            print(f"处理 {relative_path}")
+            time.sleep(0.001)
+        return data
+
+    monkeypatch.setattr(pipeline, '_transforms', {'noisy': pipeline.Transform('noisy', 10, lambda *args: True, noisy)})
+    monkeypatch.setattr(pipeline, '_builtin_loaded', True)
+    names = [f'{index}.json' for index in range(16)]
+    for name in names:
+        (tmp_path / name).write_text('{}', encoding='utf-8')
+    plan = pipeline.PipelinePlan(list(pipeline._transforms.values()), {}, [(name, ['noisy']) for name in names])
+
+    lines = []
+    stdout = sys.stdout
+
+    class Collector:
+        def write(self, text):
+            lines.extend(line for line in text.split('\n') if line)
+
+        def flush(self):
+            pass
+
+    sys.stdout = collector = Collector()
+    try:
+        assert pipeline.run_pipeline(str(tmp_path), workers=4, use_processes=False, plan=plan)
+        assert sys.stdout is collector
+    finally:
+        sys.stdout = stdout
+
+    for index, line in enumerate(lines):
+        if '已处理 ' in line:
+            relative_path = line.split('已处理 ')[1].split(':')[0]
+            assert lines[index - 3:index] == [f"处理 {relative_path}"] * 3
+
+
+def test_process_workers_do_not_import_main_module(tmp_path):
+    marker = tmp_path / 'imports.txt'
+    script = tmp_path / 'heavy_main.py'
+    script.write_text(textwrap.dedent(f'''
+        import sys
+        sys.path.insert(0, {REPO_ROOT!r})
+        with open({str(marker)!r}, 'a') as f:
+            f.write(__name__ + '\\n')
+
+        if __name__ == '__main__':
+            from functions.fancy import pipeline
+            pipeline.load_builtin_transforms()
+            transform = pipeline._transforms['custom_changes']
+            changes = {{name: {{'content': 'changed'}} for name in ('a.json', 'b.json')}}
+            plan = pipeline.PipelinePlan([transform], {{'changes': changes}},
+                                         [(name, ['custom_changes']) for name in changes])
+            sys.exit(0 if pipeline.run_pipeline({str(tmp_path / 'lang')!r}, workers=2, use_processes=True,
+                                                plan=plan) else 1)
+    '''), encoding='utf-8')
+    (tmp_path / 'lang').mkdir()
+    for name in ('a.json', 'b.json'):
+        (tmp_path / 'lang' / name).write_text('{"content": "original"}', encoding='utf-8')
+
+    subprocess.run([sys.executable, str(script)], cwd=REPO_ROOT, check=True, timeout=120)
+
+    assert marker.read_text().split() == ['__main__']
+    for name in ('a.json', 'b.json'):
+        assert json.loads((tmp_path / 'lang' / name).read_text(encoding='utf-8')) == {'content': 'changed'}
@@ -0,0 +1,60 @@
+import json
+import os
+import threading
+
+from webFunc import GithubDownload
+from webFunc.GithubDownload import ProxyScoreboard
+
+
+def test_records_are_saved_once_per_batch(tmp_path, monkeypatch):
+    path = tmp_path / 'proxy_scores.json'
+    scoreboard = ProxyScoreboard(str(path))
+    writes = []
+    real_replace = GithubDownload.os.replace
+    monkeypatch.setattr(GithubDownload.os, 'replace', lambda *args: (writes.append(args), real_replace(*args)))
+
+    scoreboard.record_success('https://a/', 0.5)
+    scoreboard.record_failure('https://b/')
+    assert not path.exists()
+
+    scoreboard.save()
+    scoreboard.save()
+    assert len(writes) == 1
+    assert set(json.loads(path.read_text(encoding='utf-8'))['scores']) == {'https://a/', 'https://b/'}
+
+
+def test_concurrent_saves_do_not_collide(tmp_path, capsys):
+    path = tmp_path / 'proxy_scores.json'
+    scoreboard = ProxyScoreboard(str(path))
+
+    def worker(index):
+        for _ in range(20):
+            scoreboard.record_success(f'https://{index}/', 0.1)
+            scoreboard.save()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert '保存代理评分失败' not in capsys.readouterr().out
+    scores = json.loads(path.read_text(encoding='utf-8'))['scores']
+    assert len(scores) == 8 and all(entry['successes'] == 20 for entry in scores.values())
+
+
+def test_managers_share_one_scoreboard_per_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'proxy_scores.json')
+    monkeypatch.setattr(GithubDownload, '_scoreboards', {})
+    monkeypatch.setattr(GithubDownload.ProxyManager, '_initialize_proxies', lambda self: None)
+
+    first = GithubDownload.ProxyManager(path)
+    second = GithubDownload.ProxyManager(path)
+    assert first.scoreboard is second.scoreboard
+
+    first.record_success('https://a/', 0.5)
+    second.record_failure('https://b/')
+    second.save()
+    first.save()
+    assert set(json.loads(open(path, encoding='utf-8').read())['scores']) == {'https://a/', 'https://b/'}
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
@@ -0,0 +1,85 @@
+import os
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from webFunc import SegmentedDownload
+from webFunc.SegmentedDownload import download_segmented
+
+PAYLOAD = os.urandom(4 * 1024 * 1024 + 12345)
+PAYLOAD_SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        start, end = 0, len(PAYLOAD) - 1
+        range_header = self.headers.get('Range')
+        if range_header:
+            first, last = range_header.split('=', 1)[1].split('-')
+            start, end = int(first), int(last) if last else len(PAYLOAD) - 1
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(PAYLOAD)}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(PAYLOAD[start:end + 1])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/pack.zip'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def file_reads(monkeypatch):
+    reads = []
+    original = SegmentedDownload.hash_file
+
+    def hash_file(path, hasher=None, start=0, end=None):
+        reads.append((start, end))
+        return original(path, hasher, start, end)
+
+    monkeypatch.setattr(SegmentedDownload, 'hash_file', hash_file)
+    return reads
+
+
+def test_parallel_segments_are_hashed_without_reading_the_file(url, tmp_path, file_reads):
+    target = tmp_path / 'pack.zip'
+    with requests.Session() as session:
+        assert download_segmented([url], str(target), connections=4, session=session,
+                                  expected_sha256=PAYLOAD_SHA256)
+
+    assert target.read_bytes() == PAYLOAD
+    assert file_reads == []
+
+
+def test_segments_over_the_buffer_are_read_back(url, tmp_path, file_reads, monkeypatch):
+    monkeypatch.setattr(SegmentedDownload, 'HASH_BUFFER_SIZE', 256 * 1024)
+    target = tmp_path / 'pack.zip'
+    with requests.Session() as session:
+        assert download_segmented([url], str(target), connections=4, session=session,
+                                  expected_sha256=PAYLOAD_SHA256)
+
+    assert target.read_bytes() == PAYLOAD
+
+
+def test_wrong_digest_deletes_the_download(url, tmp_path):
+    target = tmp_path / 'pack.zip'
+    with requests.Session() as session:
+        assert not download_segmented([url], str(target), connections=4, session=session,
+                                      expected_sha256='0' * 64)
+
+    assert not os.path.exists(str(target))
+    assert not os.path.exists(str(target) + SegmentedDownload.PART_SUFFIX)
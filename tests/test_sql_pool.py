@@ -0,0 +1,183 @@
+import pytest
+
+pymysql = pytest.importorskip('pymysql')
+from pymysql.constants import SERVER_STATUS
+
+from functions.dowloads import sql_pool, sql_manager
+
+LATEST_VERSION = {
+    'version_name': 'v2.0',
+    'bilibili_url': 'https://example.com',
+    'version_description': '',
+    'created_at': None,
+}
+BUBBLES = {
+    'battle_speech_bubble': '{"dataList": [{"id": 1, "dlg": "a"}]}',
+    'battle_speech_bubble_cultivation': '{"dataList": [{"id": 2, "dlg": "b"}]}',
+    'battle_speech_bubble_mowe': '{"dataList": [{"id": 3, "dlg": "c"}]}',
+}
+
+
+class FakeMySQL:
+    """MySQL 的替身：只回答启动时用到的查询，记录每次连接和查询"""
+
+    def __init__(self):
+        self.connections = []
+        self.alive = True
+
+    def connect(self, **params):
+        connection = FakeConnection(self, params)
+        self.connections.append(connection)
+        return connection
+
+    def answer(self, sql):
+        if sql.startswith("SELECT * FROM faust_versions"):
+            return [LATEST_VERSION]
+        if sql == "SHOW TABLES LIKE 'faust_launcher'":
+            return [{'table': 'faust_launcher'}]
+        if sql.startswith("SELECT battle_speech_bubble, "):
+            return [dict(BUBBLES)]
+        # 没有按条目保存的表格，也没有校验和字段
+        return []
+
+    @property
+    def queries(self):
+        return [sql for connection in self.connections for sql in connection.queries]
+
+
+class FakeConnection:
+    def __init__(self, server, params):
+        self.server = server
+        self.params = params
+        self.open = True
+        self.server_status = 0
+        self.pings = 0
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def ping(self, reconnect=False):
+        if not self.server.alive:
+            raise pymysql.err.OperationalError(2013, 'Lost connection')
+        self.pings += 1
+
+    def begin(self):
+        self.server_status |= SERVER_STATUS.SERVER_STATUS_IN_TRANS
+
+    def commit(self):
+        self.server_status &= ~SERVER_STATUS.SERVER_STATUS_IN_TRANS
+
+    rollback = commit
+
+    def close(self):
+        self.open = False
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, args=None):
+        sql = ' '.join(sql.split())
+        self.connection.queries.append(sql)
+        self.rows = self.connection.server.answer(sql)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    server = FakeMySQL()
+    monkeypatch.setattr(sql_pool.pymysql, 'connect', server.connect)
+    monkeypatch.setattr(sql_pool, '_pools', {})
+    monkeypatch.setattr(sql_manager, '_launch_queries', None)
+    monkeypatch.setattr(sql_manager, 'BUBBLE_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(sql_manager, 'BUBBLE_ROWS_CACHE', str(tmp_path / 'rows.json'))
+    return server
+
+
+def _pool():
+    return sql_pool.get_pool(**sql_manager.db_config)
+
+
+def test_pool_reuses_connections(server):
+    pool = _pool()
+    assert _pool() is pool
+
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    assert len(server.connections) == 1
+    assert server.connections[0].params['autocommit'] is True
+    assert server.connections[0].params['connect_timeout'] == sql_pool.CONNECT_TIMEOUT
+
+    # 没有提交的事务在放回时回滚
+    first.begin()
+    pool.release(first)
+    assert not first.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS
+
+    # 最多保留 POOL_SIZE 个空闲连接
+    connections = [pool.acquire() for _ in range(sql_pool.POOL_SIZE + 1)]
+    for connection in connections:
+        pool.release(connection)
+    assert len(pool.idle) == sql_pool.POOL_SIZE
+    assert sum(not connection.open for connection in connections) == 1
+
+
+def test_pool_checks_idle_connections(server, monkeypatch):
+    pool = _pool()
+    connection = pool.acquire()
+    pool.release(connection)
+
+    now = sql_pool.time.time()
+    monkeypatch.setattr(sql_pool.time, 'time', lambda: now + sql_pool.HEALTH_CHECK_IDLE + 1)
+    assert pool.acquire() is connection
+    assert connection.pings == 1
+
+    # ping 失败的连接被丢弃，重新连接
+    pool.release(connection)
+    server.alive = False
+    monkeypatch.setattr(sql_pool.time, 'time', lambda: now + 2 * sql_pool.HEALTH_CHECK_IDLE + 2)
+    replacement = pool.acquire()
+    assert replacement is not connection
+    assert not connection.open
+    assert len(server.connections) == 2
+
+
+def test_launch_queries_share_one_connection(server):
+    sql_manager.start_launch_queries(include_bubbles=True)
+
+    has_update, latest_info = sql_manager.check_new_version('v1.0')
+    bubble_future = sql_manager.take_launch_bubble_future()
+
+    assert has_update and latest_info['version_name'] == 'v2.0' # type: ignore
+    assert bubble_future is not None
+    assert bubble_future.result() == tuple(BUBBLES.values())
+    assert len(server.connections) == 1
+    assert sum(sql.startswith("SELECT * FROM faust_versions") for sql in server.queries) == 1
+
+    # 启动时的结果只使用一次，之后的检查和气泡下载重新查询，复用连接池中的连接
+    assert sql_manager.take_launch_bubble_future() is None
+    assert sql_manager.check_new_version('v2.0') == (False, None)
+    assert sum(sql.startswith("SELECT * FROM faust_versions") for sql in server.queries) == 2
+    assert len(server.connections) == 1
+
+
+def test_launch_queries_without_bubbles(server):
+    sql_manager.start_launch_queries(include_bubbles=False)
+
+    assert sql_manager.check_new_version('v2.0') == (False, None)
+    assert sql_manager.take_launch_bubble_future() is None
+    assert not any('faust_launcher' in sql for sql in server.queries)
@@ -0,0 +1,138 @@
+"""
+这个模块用 httpx 异步请求让多个代理竞速，获取同一个 JSON 接口。
+
+请求按优先级每隔一段时间启动一个，前一个请求失败时立即启动下一个；
+第一个成功的请求返回后取消其余请求，被取消的请求不计入代理评分。
+所有请求在同一个后台事件循环中执行，共用一个 httpx.AsyncClient 的连接池。
+没有安装 httpx 时 `is_available()` 返回 False，调用者改用线程池请求。
+
+函数：
+    - `is_available()`: 是否可以使用异步竞速请求。
+    - `race_json(urls, params, headers)`: 竞速请求，返回第一个成功的地址序号和 JSON 数据。
+"""
+
+import time
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# 错开启动的间隔（秒）：前一个请求在这段时间内没有结果时才启动下一个
+RACE_STAGGER = 0.3
+RACE_MAX_CONNECTIONS = 20
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_clients: Dict[bool, Any] = {}
+_lock = threading.Lock()
+
+
+def is_available() -> bool:
+    """是否安装了 httpx，可以使用异步竞速请求"""
+    return httpx is not None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """获取后台事件循环，所有竞速请求在同一个循环中执行，共用连接池"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+        return _loop
+
+
+def _get_client(verify: bool):
+    """获取共用的 httpx.AsyncClient（在后台事件循环中调用）"""
+    client = _clients.get(verify)
+    if client is None:
+        client = httpx.AsyncClient( # type: ignore
+            verify=verify,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=RACE_MAX_CONNECTIONS), # type: ignore
+        )
+        _clients[verify] = client
+    return client
+
+
+async def _fetch_json(client, index: int, url: str, params, headers, timeout: float):
+    """请求一个地址，返回 (序号, 是否成功, 数据, 用时)"""
+    start = time.time()
+    try:
+        response = await client.get(url, params=params, headers=headers, timeout=timeout)
+        if response.status_code != 200:
+            print(f"代理 {url} 返回状态码: {response.status_code}")
+            return index, False, None, time.time() - start
+        return index, True, response.json(), time.time() - start
+    except Exception as e:
+        print(f"请求失败 {url}: {e}")
+        return index, False, None, time.time() - start
+
+
+async def _race(urls: List[str], params, headers, verify: bool, timeout: float, stagger: float,
+                report: Optional[Callable[[int, bool, float], None]]) -> Optional[Tuple[int, Any]]:
+    """
+    错开启动各个请求，第一个成功的请求返回后取消其他请求
+
+    前一个请求失败时立即启动下一个，不等待错开间隔。
+    """
+    client = _get_client(verify)
+    pending = set()
+    next_index = 0
+
+    try:
+        while next_index < len(urls) or pending:
+            if next_index < len(urls):
+                pending.add(asyncio.ensure_future(
+                    _fetch_json(client, next_index, urls[next_index], params, headers, timeout)))
+                next_index += 1
+            wait_timeout = stagger if next_index < len(urls) else None
+
+            done, pending = await asyncio.wait(pending, timeout=wait_timeout,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, ok, data, latency = task.result()
+                if report:
+                    report(index, ok, latency)
+                if ok:
+                    return index, data
+        return None
+    finally:
+        # 取消还在进行的请求，连接会被关闭而不是在后台继续下载
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def race_json(urls: List[str], params: Optional[Dict[str, Any]] = None,
+              headers: Optional[Dict[str, str]] = None, verify: bool = True,
+              timeout: float = 8, stagger: float = RACE_STAGGER,
+              report: Optional[Callable[[int, bool, float], None]] = None) -> Optional[Tuple[int, Any]]:
+    """
+    对同一个接口的多个地址（例如不同的代理）竞速请求 JSON
+
+    地址按顺序每隔 stagger 秒启动一个，第一个成功的请求返回后其余请求会被取消。
+
+    Args:
+        urls: 按优先级排列的请求地址
+        params: 查询参数
+        headers: 请求头
+        verify: 是否验证 HTTPS 证书
+        timeout: 单个请求的超时时间（秒）
+        stagger: 错开启动的间隔（秒）
+        report: 每个请求完成后回调 report(序号, 是否成功, 用时秒数)，被取消的请求不回调
+
+    Returns:
+        (成功地址的序号, JSON 数据)，全部失败时返回 None
+    """
+    if not is_available():
+        raise RuntimeError("未安装 httpx，无法使用异步竞速请求")
+    if not urls:
+        return None
+    future = asyncio.run_coroutine_threadsafe(
+        _race(urls, params, headers, verify, timeout, stagger, report), _get_loop())
+    return future.result()
@@ -0,0 +1,185 @@
+import os
+import json
+import zipfile
+import hashlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# 增量包格式：zip 压缩包，delta.json 记录文件清单，files/ 下保存新增和修改的文件
+# delta.json = {
+#     "format": 1, "from": 旧版本, "to": 新版本,
+#     "files": {相对路径: {"sha256": 新文件摘要, "base": 旧文件摘要（新增的文件为 null）}},
+#     "removed": {相对路径: 旧文件摘要}
+# }
+DELTA_FORMAT = 1
+MANIFEST_NAME = 'delta.json'
+FILES_DIR = 'files/'
+LLC_SUBTREE = 'LimbusCompany_Data/Lang/LLC_zh-CN'
+# 版本信息最后写入，应用中断时已安装版本保持不变，下次重新应用
+VERSION_FILE = 'info/version.json'
+CHUNK_SIZE = 1024 * 1024
+
+
+class DeltaError(Exception):
+    """增量包无法应用"""
+
+
+def _sha256_file(path: str) -> Optional[str]:
+    """计算磁盘上文件的 SHA-256，文件不存在时返回 None"""
+    hasher = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            while chunk := f.read(CHUNK_SIZE):
+                hasher.update(chunk)
+    except FileNotFoundError:
+        return None
+    return hasher.hexdigest()
+
+
+def tree_hashes(archive_path: str, subtree: str = LLC_SUBTREE) -> Dict[str, Tuple[str, str]]:
+    """
+    计算 zip 压缩包中某个目录下每个文件的 SHA-256
+
+    Returns:
+        {相对于 subtree 的路径: (SHA-256, 压缩包中的文件名)}
+    """
+    prefix = subtree.strip('/') + '/' if subtree else ''
+    hashes = {}
+    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            path = info.filename.replace('\\', '/')
+            if info.is_dir() or not path.startswith(prefix):
+                continue
+            hasher = hashlib.sha256()
+            with zip_ref.open(info) as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    hasher.update(chunk)
+            hashes[path[len(prefix):]] = (hasher.hexdigest(), info.filename)
+    return hashes
+
+
+def build_delta(old_archive: str, new_archive: str, output_path: str,
+                from_version: str, to_version: str, subtree: str = LLC_SUBTREE) -> Dict[str, Any]:
+    """
+    比较两个版本的 zip 汉化包，生成增量包
+
+    Args:
+        old_archive: 旧版本的 zip 压缩包
+        new_archive: 新版本的 zip 压缩包
+        output_path: 增量包保存路径
+        from_version: 旧版本号
+        to_version: 新版本号
+        subtree: 比较压缩包中的这个目录
+
+    Returns:
+        {'files': 新增和修改的文件数, 'removed': 删除的文件数, 'size': 增量包大小}
+    """
+    old_hashes = tree_hashes(old_archive, subtree)
+    new_hashes = tree_hashes(new_archive, subtree)
+
+    files = {}
+    for path, (digest, _) in new_hashes.items():
+        base = old_hashes.get(path, (None, ''))[0]
+        if digest != base:
+            files[path] = {'sha256': digest, 'base': base}
+    removed = {path: digest for path, (digest, _) in old_hashes.items() if path not in new_hashes}
+
+    manifest = {
+        'format': DELTA_FORMAT,
+        'from': from_version,
+        'to': to_version,
+        'files': files,
+        'removed': removed,
+    }
+    with zipfile.ZipFile(new_archive, 'r') as source, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as output:
+        output.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=1))
+        for path in files:
+            with source.open(new_hashes[path][1]) as src, output.open(FILES_DIR + path, 'w') as dst:
+                while chunk := src.read(CHUNK_SIZE):
+                    dst.write(chunk)
+
+    return {'files': len(files), 'removed': len(removed), 'size': os.path.getsize(output_path)}
+
+
+def _target_path(target_dir: str, path: str) -> str:
+    """增量包中的路径对应的磁盘路径，路径跳出目标目录时抛出 DeltaError"""
+    root = os.path.abspath(target_dir)
+    full_path = os.path.abspath(os.path.join(root, path))
+    if not full_path.startswith(root + os.sep):
+        raise DeltaError(f"不安全的路径: {path}")
+    return full_path
+
+
+def _extract_checked(zip_ref: zipfile.ZipFile, manifest: Dict[str, Any], target_dir: str, path: str):
+    """把增量包中的一个文件写入目标目录，先写临时文件，校验后替换"""
+    full_path = _target_path(target_dir, path)
+    temp_path = full_path + '.delta'
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    hasher = hashlib.sha256()
+    with zip_ref.open(FILES_DIR + path) as src, open(temp_path, 'wb') as dst:
+        while chunk := src.read(CHUNK_SIZE):
+            hasher.update(chunk)
+            dst.write(chunk)
+    if hasher.hexdigest() != manifest['files'][path]['sha256']:
+        os.remove(temp_path)
+        raise DeltaError(f"增量包中的文件已损坏: {path}")
+    os.replace(temp_path, full_path)
+
+
+def apply_delta(delta_path: str, target_dir: str, from_version: str, to_version: str = '',
+                unverified_paths: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    把增量包应用到已安装的汉化文件目录
+
+    先检查所有要修改和删除的文件与增量包记录的旧文件一致（已经是新文件的视为已应用），
+    再写入新文件、删除旧版本中不再存在的文件，版本信息最后写入。
+
+    Args:
+        delta_path: 增量包路径
+        target_dir: 已安装的汉化文件目录（例如 workshop/LLC_zh-CN）
+        from_version: 已安装的版本，必须与增量包的旧版本一致
+        to_version: 预期的新版本，为空时不检查
+        unverified_paths: 安装后会被替换的文件（例如从数据库下载的气泡文本），不检查旧文件，直接写入或删除
+
+    Returns:
+        {'files': 写入的文件数, 'removed': 删除的文件数}
+
+    Raises:
+        DeltaError: 增量包与已安装的文件不匹配
+    """
+    with zipfile.ZipFile(delta_path, 'r') as zip_ref:
+        manifest = json.loads(zip_ref.read(MANIFEST_NAME).decode('utf-8'))
+        if manifest.get('format') != DELTA_FORMAT:
+            raise DeltaError(f"不支持的增量包格式: {manifest.get('format')}")
+        if manifest['from'] != from_version or (to_version and manifest['to'] != to_version):
+            raise DeltaError(f"增量包版本 {manifest['from']} -> {manifest['to']} 与已安装的版本 {from_version} 不匹配")
+
+        # 检查已安装的文件
+        unverified = set(unverified_paths)
+        pending = []
+        for path, entry in manifest['files'].items():
+            current = _sha256_file(_target_path(target_dir, path))
+            if current == entry['sha256']:
+                continue
+            if entry['base'] is not None and current != entry['base'] and path not in unverified:
+                raise DeltaError(f"已安装的文件与旧版本不一致: {path}")
+            pending.append(path)
+        removed = []
+        for path, digest in manifest['removed'].items():
+            current = _sha256_file(_target_path(target_dir, path))
+            if current is None:
+                continue
+            if current != digest and path not in unverified:
+                raise DeltaError(f"已安装的文件与旧版本不一致: {path}")
+            removed.append(path)
+
+        # 写入新文件并删除旧文件，版本信息最后写入
+        for path in pending:
+            if path != VERSION_FILE:
+                _extract_checked(zip_ref, manifest, target_dir, path)
+        for path in removed:
+            os.remove(_target_path(target_dir, path))
+        if VERSION_FILE in pending:
+            _extract_checked(zip_ref, manifest, target_dir, VERSION_FILE)
+
+    return {'files': len(pending), 'removed': len(removed)}
@@ -1,13 +1,48 @@
-import requests
 import time
 from pathlib import Path
+from .HttpClient import new_session
+
+CHUNK_SIZE = 256 * 1024
+
+
+class UploadStream:
+    """
+    按块读取的上传数据，上传时不把整个文件读入内存
+
+    requests 通过 __len__ 设置 Content-Length，发送时反复调用 read() 读取数据
+    """
+
+    def __init__(self, source, size, progress_callback=None):
+        """
+        Args:
+            source: 有 read(n) 方法的数据来源（文件、网络响应等）
+            size: 数据总大小
+            progress_callback: 进度回调 progress_callback(已上传字节数, 总字节数)
+        """
+        self.source = source
+        self.size = size
+        self.sent = 0
+        self.progress_callback = progress_callback
+
+    def __len__(self):
+        return self.size
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = CHUNK_SIZE
+        data = self.source.read(min(n, self.size - self.sent))
+        if data:
+            self.sent += len(data)
+            if self.progress_callback:
+                self.progress_callback(self.sent, self.size)
+        return data
+
 
 class UpFileClient:
     def __init__(self):
         self.base_url = "https://upfile.live"
-        self.session = requests.Session()
         # 设置请求头
-        self.session.headers.update({
+        self.session = new_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36',
             'X-Requested-With': 'XMLHttpRequest',
             'Origin': self.base_url,
@@ -15,6 +50,8 @@ class UpFileClient:
             'Accept': 'application/json, text/javascript, */*; q=0.01',
             'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
         })
+        # 上传数据只能读取一次，上传请求不自动重试
+        self.upload_session = new_session(retry=False)
 
     def get_upload_link(self, file_name):
         """获取上传链接"""
@@ -34,23 +71,21 @@ class UpFileClient:
         else:
             raise Exception(f"HTTP错误: {response.status_code}")
 
-    def upload_file(self, upload_url, file_path):
-        """实际上传文件到云存储"""
-        file_name = Path(file_path).name
-        
-        with open(file_path, 'rb') as file:
-            file_content = file.read()
-        
+    def upload_file(self, upload_url, source, file_name, file_size, progress_callback=None):
+        """实际上传文件到云存储，从 source 按块读取数据"""
         headers = {
             'Content-Type': 'application/octet-stream',
             'Content-Disposition': f'attachment; filename="{file_name}"'
         }
         
         # 注意：这里使用PUT方法
-        response = requests.put(upload_url, data=file_content, headers=headers)
+        body = UploadStream(source, file_size, progress_callback)
+        response = self.upload_session.put(upload_url, data=body, headers=headers)
         
         # 云存储通常返回204或200，但没有响应体是正常的
         if response.status_code in [200, 204]:
+            if body.sent != file_size:
+                raise Exception(f"上传数据不完整: {body.sent}/{file_size} bytes")
             return True
         else:
             raise Exception(f"文件上传失败: {response.status_code}")
@@ -92,8 +127,8 @@ class UpFileClient:
         else:
             raise Exception(f"HTTP错误: {response.status_code}")
 
-    def download_file(self, file_id, save_path=None):
-        """下载文件"""
+    def download_file(self, file_id, save_path=None, progress_callback=None):
+        """下载文件，边下载边写入，progress_callback(已下载字节数, 总字节数)"""
         try:
             # 1. 获取文件信息
             file_info = self.get_file_info(file_id)
@@ -107,11 +142,17 @@ class UpFileClient:
             # 2. 获取下载重定向链接
             download_url = f"{self.base_url}/download/{file_id}/"
 
-            response = self.session.get(download_url, allow_redirects=True)
-            
-            if response.status_code == 200:
+            with self.session.get(download_url, allow_redirects=True, stream=True) as response:
+                if response.status_code != 200:
+                    raise Exception(f"下载失败，状态码: {response.status_code}")
+                total = int(response.headers.get('Content-Length') or 0)
+                downloaded = 0
                 with open(save_path, 'wb') as file:
-                    file.write(response.content)
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        file.write(chunk)
+                        downloaded += len(chunk)
+                        if progress_callback:
+                            progress_callback(downloaded, total)
                 
                 file_size = Path(save_path).stat().st_size
                 
@@ -121,8 +162,6 @@ class UpFileClient:
                     'file_size': file_size,
                     'file_name': file_name
                 }
-            else:
-                raise Exception(f"下载失败，状态码: {response.status_code}")
                 
         except Exception as e:
             return {
@@ -157,13 +196,31 @@ class UpFileClient:
                 'error': str(e)
             }
 
-    def upload(self, file_path, log_function=print):
+    def upload(self, file_path, log_function=print, progress_callback=None):
         """主上传方法"""
         try:
             file_path_obj = Path(file_path)
-            file_name = file_path_obj.name
-            file_size = file_path_obj.stat().st_size
-            
+            with open(file_path_obj, 'rb') as file:
+                return self.upload_stream(file, file_path_obj.name, file_path_obj.stat().st_size,
+                                          log_function, progress_callback)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def upload_stream(self, source, file_name, file_size, log_function=print, progress_callback=None):
+        """
+        从数据流上传文件，例如直接把网络响应转存到网盘，不写入临时文件
+
+        Args:
+            source: 有 read(n) 方法的数据来源
+            file_name: 文件名
+            file_size: 文件大小，必须与读取到的数据一致
+            log_function: 日志输出函数
+            progress_callback: 进度回调 progress_callback(已上传字节数, 总字节数)
+        """
+        try:
             log_function(f"开始上传文件: {file_name} ({file_size} bytes)")
             
             # 1. 获取上传链接
@@ -175,7 +232,7 @@ class UpFileClient:
             
             # 2. 上传文件到云存储
             log_function("步骤2: 上传文件到云存储...")
-            self.upload_file(upload_url, file_path)
+            self.upload_file(upload_url, source, file_name, file_size, progress_callback)
             log_function("文件上传成功")
             
             # 3. 确认上传
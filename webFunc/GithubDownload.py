@@ -1,12 +1,17 @@
+import os
+import json
 import requests
 import warnings
 import time
+import tempfile
 import threading
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from dataclasses import dataclass
-from copy import deepcopy
 from contextlib import contextmanager, suppress
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from .SegmentedDownload import download_segmented, download_single
+from .AsyncRace import race_json, is_available as is_async_race_available
+from .HttpClient import get_session, new_session
 
 
 @dataclass
@@ -18,6 +23,12 @@ class ReleaseAsset:
     content_type: str
     download_count: int
     proxys: 'ProxyManager'
+    digest: str = ''  # GitHub提供的文件摘要，格式为 "sha256:<hex>"，旧的release没有
+    
+    @property
+    def sha256(self) -> str:
+        """文件的SHA-256，没有时返回空字符串"""
+        return self.digest[len('sha256:'):] if self.digest.startswith('sha256:') else ''
     
     @property
     def formatted_size(self) -> str:
@@ -32,6 +43,59 @@ class ReleaseAsset:
             size_bytes /= 1024
             i += 1
         return f"{size_bytes:.2f} {size_names[i]}"
+    
+    def get_download_urls(self) -> List[str]:
+        """获取下载地址列表：按代理优先级排列，最后是直连地址"""
+        urls = [f"{proxy}{self.download_url}" for proxy in self.proxys.get_proxies()] if self.proxys else []
+        urls.append(self.download_url)
+        return urls
+    
+    def download(self, local_filename: str, connections: int = 4,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 should_continue: Optional[Callable[[], bool]] = None,
+                 verify: bool = True) -> bool:
+        """
+        下载资源文件
+        
+        服务器支持Range请求时使用多连接分段下载，各段分散到前几个代理上；
+        否则依次尝试各个地址单连接下载。GitHub提供了文件摘要时校验SHA-256
+        
+        Args:
+            local_filename: 保存路径
+            connections: 同时下载的连接数
+            progress_callback: 进度回调 progress_callback(已下载字节数, 总字节数)
+            should_continue: 返回 False 时取消下载
+            verify: 是否验证 HTTPS 证书
+        """
+        urls = self.get_download_urls()
+        try:
+            result = download_segmented(urls[:max(1, connections)], local_filename, connections,
+                                        progress_callback, should_continue,
+                                        verify=verify, expected_size=self.size, report=self._report,
+                                        expected_sha256=self.sha256)
+            if result is not None:
+                return result
+            
+            for url in urls:
+                if download_single(url, local_filename, progress_callback, verify=verify, report=self._report,
+                                   expected_sha256=self.sha256):
+                    return True
+            return False
+        finally:
+            # 各段的结果记录在内存中，下载结束后保存一次
+            if self.proxys:
+                self.proxys.save()
+    
+    def _report(self, url: str, ok: bool, size: int, duration: float):
+        """把每个代理的下载速度和失败记录到代理评分中"""
+        if not self.proxys or url == self.download_url:
+            return
+        proxy_url = url[:-len(self.download_url)]
+        if ok:
+            self.proxys.record_success(proxy_url, None, size, duration)
+        elif size == 0:
+            # 已经下载了部分数据的中断不算作代理失败
+            self.proxys.record_failure(proxy_url)
 
 
 @dataclass
@@ -70,31 +134,218 @@ class ReleaseInfo:
         return f"https://github.com/{self.repo_owner}/{self.repo_name}/archive/refs/tags/{self.tag_name}.tar.gz"
 
 
+# 代理评分记录文件
+PROXY_SCOREBOARD_PATH = "workshop/proxy_scores.json"
+# 代理列表的有效期（秒），过期后在后台刷新
+PROXY_LIST_TTL = 6 * 60 * 60
+# 指数加权平均的权重，越大越看重最近的结果
+PROXY_EWMA_ALPHA = 0.3
+# 没有记录的代理按这个延迟估计（秒）
+PROXY_DEFAULT_LATENCY = 3.0
+# 连续失败后的冷却时间（秒），每多失败一次翻倍
+PROXY_COOLDOWN_BASE = 60
+PROXY_COOLDOWN_MAX = 60 * 60
+DEFAULT_PROXY = "https://gh-proxy.org/"
+
+
+class ProxyScoreboard:
+    """
+    代理评分记录
+    
+    记录每个代理的延迟、下载速度和失败率（指数加权平均），保存在磁盘上供下次启动使用。
+    连续失败的代理会进入冷却时间，冷却期间排在最后。
+    记录只更新内存，由调用者在一批请求结束后调用 save 保存。
+    同一个文件在进程内只使用一个实例，通过 get_scoreboard 获取。
+    """
+    
+    def __init__(self, path: str = PROXY_SCOREBOARD_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.scores: Dict[str, Dict[str, Any]] = {}
+        self.proxy_list: List[str] = []
+        self.fetched_at: float = 0
+        self.dirty = False
+        self.load()
+    
+    def load(self):
+        """从磁盘读取评分记录"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.scores = data.get('scores', {})
+            self.proxy_list = data.get('proxies', [])
+            self.fetched_at = data.get('fetched_at', 0)
+        except Exception:
+            pass
+    
+    def save(self):
+        """保存评分记录（先写临时文件再替换），没有新的记录时不写入"""
+        # 写入文件也在锁内进行，多个线程同时保存时不会写同一个临时文件
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {'proxies': self.proxy_list, 'fetched_at': self.fetched_at, 'scores': self.scores}
+            temp_path = None
+            try:
+                directory = os.path.dirname(self.path) or '.'
+                os.makedirs(directory, exist_ok=True)
+                # 每次使用不同的临时文件，其他进程同时保存时不会互相覆盖
+                fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + '.', suffix='.tmp',
+                                                 dir=directory)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(temp_path, self.path)
+                self.dirty = False
+            except Exception as e:
+                print(f"保存代理评分失败: {e}")
+                if temp_path:
+                    with suppress(OSError):
+                        os.remove(temp_path)
+    
+    def set_proxy_list(self, proxies: List[str]):
+        """更新缓存的代理列表"""
+        with self.lock:
+            self.proxy_list = list(proxies)
+            self.fetched_at = time.time()
+            self.dirty = True
+    
+    @property
+    def list_expired(self) -> bool:
+        return time.time() - self.fetched_at > PROXY_LIST_TTL
+    
+    def _entry(self, proxy_url: str) -> Dict[str, Any]:
+        return self.scores.setdefault(proxy_url, {
+            'latency': None,
+            'throughput': None,
+            'failure_rate': 0.0,
+            'successes': 0,
+            'failures': 0,
+            'consecutive_failures': 0,
+            'cooldown_until': 0,
+        })
+    
+    @staticmethod
+    def _ewma(old: Optional[float], value: float) -> float:
+        return value if old is None else old + PROXY_EWMA_ALPHA * (value - old)
+    
+    def record_success(self, proxy_url: str, latency: Optional[float], size: int = 0, duration: float = 0):
+        """
+        记录一次成功的请求
+        
+        Args:
+            proxy_url: 代理地址
+            latency: 响应时间（秒），为 None 时不记录
+            size: 下载的字节数，不为 0 时同时记录下载速度
+            duration: 下载用时（秒）
+        """
+        with self.lock:
+            entry = self._entry(proxy_url)
+            if latency is not None:
+                entry['latency'] = self._ewma(entry['latency'], latency)
+            if size and duration > 0:
+                entry['throughput'] = self._ewma(entry['throughput'], size / duration)
+            entry['failure_rate'] = self._ewma(entry['failure_rate'], 0.0)
+            entry['successes'] += 1
+            entry['consecutive_failures'] = 0
+            entry['cooldown_until'] = 0
+            self.dirty = True
+    
+    def record_failure(self, proxy_url: str):
+        """记录一次失败的请求，连续失败时进入冷却"""
+        with self.lock:
+            entry = self._entry(proxy_url)
+            entry['failure_rate'] = self._ewma(entry['failure_rate'], 1.0)
+            entry['failures'] += 1
+            entry['consecutive_failures'] += 1
+            cooldown = min(PROXY_COOLDOWN_BASE * 2 ** (entry['consecutive_failures'] - 1), PROXY_COOLDOWN_MAX)
+            entry['cooldown_until'] = time.time() + cooldown
+            self.dirty = True
+    
+    def is_cooling_down(self, proxy_url: str) -> bool:
+        entry = self.scores.get(proxy_url)
+        return bool(entry) and entry['cooldown_until'] > time.time() # type: ignore
+    
+    def score(self, proxy_url: str) -> float:
+        """代理的评分，越小越好：估计延迟 ×（1 + 失败率），下载速度越快分数越低"""
+        entry = self.scores.get(proxy_url)
+        if not entry:
+            return PROXY_DEFAULT_LATENCY
+        latency = entry['latency'] if entry['latency'] is not None else PROXY_DEFAULT_LATENCY
+        score = latency * (1 + 4 * entry['failure_rate'])
+        if entry['throughput']:
+            # 每 1MB/s 的下载速度相当于延迟减半
+            score /= 1 + entry['throughput'] / (1024 * 1024)
+        return score
+    
+    def rank(self, proxies: List[str]) -> List[str]:
+        """按评分排序，冷却中的代理排在最后"""
+        with self.lock:
+            return sorted(proxies, key=lambda proxy: (self.is_cooling_down(proxy), self.score(proxy)))
+    
+    def has_history(self, proxy_url: str) -> bool:
+        entry = self.scores.get(proxy_url)
+        return bool(entry) and entry['successes'] > 0 # type: ignore
+
+
+_scoreboards: Dict[str, ProxyScoreboard] = {}
+_scoreboards_lock = threading.Lock()
+
+
+def get_scoreboard(path: str = PROXY_SCOREBOARD_PATH) -> ProxyScoreboard:
+    """返回这个文件对应的代理评分记录，进程内的所有代理管理器共用同一个实例"""
+    key = os.path.normcase(os.path.abspath(path))
+    with _scoreboards_lock:
+        scoreboard = _scoreboards.get(key)
+        if scoreboard is None:
+            scoreboard = _scoreboards[key] = ProxyScoreboard(path)
+        return scoreboard
+
+
 class ProxyManager:
-    """简化的代理管理器"""
+    """
+    代理管理器
     
-    def __init__(self):
+    代理列表缓存在评分记录中，过期后在后台刷新；
+    代理按历史延迟、下载速度和失败率排序，上一次最快的代理会被优先使用。
+    """
+    
+    def __init__(self, scoreboard_path: str = PROXY_SCOREBOARD_PATH):
+        self.scoreboard = get_scoreboard(scoreboard_path)
         self.proxies: List[str] = []
-        self.current_index: int = 0
         self.last_successful_proxy: Optional[str] = None  # 记录上一次成功的代理
+        self._refresh_thread: Optional[threading.Thread] = None
         self._initialize_proxies()
     
     def _initialize_proxies(self):
         """初始化代理列表"""
-        # 添加默认代理
-        self.proxies.append("https://gh-proxy.org/")
+        # 添加默认代理和缓存的代理
+        self.proxies = self._merge_proxies(self.scoreboard.proxy_list)
         
-        # 尝试从API获取代理列表
-        try:
-            self._fetch_proxies_from_api()
-        except Exception as e:
-            print(f"从API获取代理列表失败，使用默认代理: {e}")
+        if not self.scoreboard.proxy_list:
+            # 第一次运行时没有缓存，需要等待获取代理列表
+            try:
+                self._fetch_proxies_from_api()
+            except Exception as e:
+                print(f"从API获取代理列表失败，使用默认代理: {e}")
+        elif self.scoreboard.list_expired:
+            self.refresh_in_background()
+    
+    @staticmethod
+    def _merge_proxies(proxies: List[str]) -> List[str]:
+        return [DEFAULT_PROXY] + [proxy for proxy in proxies if proxy != DEFAULT_PROXY]
+    
+    def refresh_in_background(self):
+        """在后台线程中刷新代理列表"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(target=self._fetch_proxies_from_api, daemon=True)
+        self._refresh_thread.start()
     
     def _fetch_proxies_from_api(self):
         """从API获取代理列表"""
         api_url = "https://api.akams.cn/github"
         try:
-            response = requests.get(api_url, timeout=5)
+            response = get_session().get(api_url, timeout=5)
             response.raise_for_status()
             data = response.json()
             
@@ -109,25 +360,45 @@ class ProxyManager:
                         new_proxies.append(url)
                 
                 if new_proxies:
-                    self.proxies.extend(new_proxies)
+                    self.proxies = self._merge_proxies(new_proxies)
+                    self.scoreboard.set_proxy_list(new_proxies)
+                    self.scoreboard.save()
                     print(f"成功加载 {len(new_proxies)} 个代理")
                     
         except Exception as e:
             print(f"获取代理列表失败: {e}")
     
     def set_proxy_by_url(self, proxy_url: str):
-        """根据代理URL设置当前代理，并记录为成功代理"""
+        """记录上一次成功的代理"""
         if proxy_url in self.proxies:
-            self.current_index = self.proxies.index(proxy_url)
             self.last_successful_proxy = proxy_url  # 记录成功使用的代理
             return True
         return False
     
+    def record_success(self, proxy_url: str, latency: Optional[float], size: int = 0, duration: float = 0):
+        """记录代理请求成功（只更新内存，需要调用 save 保存）"""
+        self.scoreboard.record_success(proxy_url, latency, size, duration)
+    
+    def record_failure(self, proxy_url: str):
+        """记录代理请求失败（只更新内存，需要调用 save 保存）"""
+        self.scoreboard.record_failure(proxy_url)
+    
+    def save(self):
+        """保存代理评分，一批请求结束后调用一次"""
+        self.scoreboard.save()
+    
+    def get_best_proxy(self) -> Optional[str]:
+        """返回历史表现最好且没有在冷却中的代理，没有历史记录时返回 None"""
+        for proxy_url in self.get_proxies():
+            if self.scoreboard.is_cooling_down(proxy_url):
+                break
+            if self.scoreboard.has_history(proxy_url):
+                return proxy_url
+        return None
+    
     def get_proxies(self) -> List[str]:
-        """获取优先代理列表：上一次成功代理优先，然后是其他代理"""
-        result = self.proxies[self.current_index:] + self.proxies[:self.current_index]
-        
-        return result
+        """获取优先代理列表：按评分排序，冷却中的代理排在最后"""
+        return self.scoreboard.rank(self.proxies)
 
 class GitHubReleaseFetcher:
     """
@@ -153,11 +424,11 @@ class GitHubReleaseFetcher:
         self.proxy_manager = ProxyManager() if use_proxy else None
         
         # 配置requests会话
-        self.session = requests.Session()
-        self.session.headers.update({
+        # 共用连接池，不自动重试（失败时换代理重试）
+        self.session = new_session({
             'Accept': 'application/vnd.github.v3+json',
             'User-Agent': 'GitHub-Release-Fetcher/1.0'
-        })
+        }, retry=False)
         
         # 线程池配置
         self.max_workers = 3  # 最大并发线程数
@@ -183,7 +454,7 @@ class GitHubReleaseFetcher:
         return api_url
     
     def _request_with_proxy(self, repo_owner: str, repo_name: str, endpoint: str, 
-                          proxy_url: str, timeout: float = None) -> Optional[Dict[str, Any]]: # type: ignore
+                          proxy_url: str, timeout: float = None, **kwargs) -> Optional[Dict[str, Any]]: # type: ignore
         """使用指定代理发送请求"""
         if timeout is None:
             timeout = self.request_timeout
@@ -191,24 +462,44 @@ class GitHubReleaseFetcher:
         api_url = self._build_api_url(repo_owner, repo_name, endpoint, proxy_url)
         
         try:
-            response = self.session.get(api_url, timeout=timeout)
+            start = time.time()
+            response = self.session.get(api_url, timeout=timeout, **kwargs)
             if response.status_code == 200:
-                return response.json(), proxy_url # type: ignore
+                data = response.json()
+                if self.proxy_manager:
+                    self.proxy_manager.record_success(proxy_url, time.time() - start)
+                return data, proxy_url # type: ignore
             else:
                 print(f"代理 {proxy_url} 返回状态码: {response.status_code}")
+                if self.proxy_manager:
+                    self.proxy_manager.record_failure(proxy_url)
                 return None, proxy_url # type: ignore
                 
         except Exception as e:
             print(f"代理 {proxy_url} 请求失败: {e}")
+            if self.proxy_manager:
+                self.proxy_manager.record_failure(proxy_url)
             return None, proxy_url # type: ignore
     
     def _make_request(self, repo_owner: str, repo_name: str, endpoint: str, **kwargs) -> Optional[Dict[str, Any]]:
         """
-        发送请求，使用线程池有限并发尝试代理
+        发送请求，先尝试历史最快的代理，失败后竞速请求其他代理
+        
+        安装了 httpx 时使用异步竞速：错开启动各个代理的请求，第一个成功后取消其余请求；
+        否则使用线程池有限并发尝试代理。请求结束后保存一次代理评分
         
         Returns:
             JSON响应数据，如果失败则返回None
         """
+        try:
+            return self._request_through_proxies(repo_owner, repo_name, endpoint, **kwargs)
+        finally:
+            if self.proxy_manager:
+                self.proxy_manager.save()
+    
+    def _request_through_proxies(self, repo_owner: str, repo_name: str, endpoint: str,
+                                 **kwargs) -> Optional[Dict[str, Any]]:
+        """依次尝试历史最快的代理和其他代理，见 _make_request"""
         if not self.use_proxy or not self.proxy_manager:
             # 不使用代理，直接请求
             api_url = self._build_api_url(repo_owner, repo_name, endpoint)
@@ -220,13 +511,25 @@ class GitHubReleaseFetcher:
                 print(f"直接请求失败: {e}")
                 return None
         
+        # 先直接使用历史表现最好的代理
+        best_proxy = self.proxy_manager.get_best_proxy()
+        if best_proxy:
+            data, _ = self._request_with_proxy(repo_owner, repo_name, endpoint, best_proxy, **kwargs) # type: ignore
+            if data is not None:
+                self.proxy_manager.set_proxy_by_url(best_proxy)
+                print(f"成功使用代理: {best_proxy}")
+                return data
+        
         # 使用优先代理列表
-        proxies = self.proxy_manager.get_proxies()
+        proxies = [proxy for proxy in self.proxy_manager.get_proxies() if proxy != best_proxy]
         
         if not proxies:
             print("没有可用的代理")
             return None
         
+        if is_async_race_available():
+            return self._race_request(repo_owner, repo_name, endpoint, proxies, kwargs.get('params'))
+        
         print(f"使用线程池（最大 {self.max_workers} 个线程）尝试 {len(proxies)} 个代理...")
         
         executor = ThreadPoolExecutor(max_workers=self.max_workers)
@@ -250,7 +553,7 @@ class GitHubReleaseFetcher:
             for proxy_url in proxies:
                 future = executor.submit(
                     self._request_with_proxy, 
-                    repo_owner, repo_name, endpoint, proxy_url
+                    repo_owner, repo_name, endpoint, proxy_url, **kwargs
                 )
                 future_to_proxy[future] = proxy_url
             
@@ -274,7 +577,31 @@ class GitHubReleaseFetcher:
                 print(f"请求超时")
         
         print("所有代理尝试均失败")
-        return None    
+        return None
+    
+    def _race_request(self, repo_owner: str, repo_name: str, endpoint: str,
+                      proxies: List[str], params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """使用 httpx 异步竞速请求各个代理"""
+        print(f"异步竞速尝试 {len(proxies)} 个代理...")
+        urls = [self._build_api_url(repo_owner, repo_name, endpoint, proxy_url) for proxy_url in proxies]
+        
+        def report(index: int, ok: bool, latency: float):
+            if ok:
+                self.proxy_manager.record_success(proxies[index], latency) # type: ignore
+            else:
+                self.proxy_manager.record_failure(proxies[index]) # type: ignore
+        
+        result = race_json(urls, params=params, headers=dict(self.session.headers), # type: ignore
+                           verify=not self.ignore_ssl, timeout=self.request_timeout, report=report)
+        if result is None:
+            print("所有代理尝试均失败")
+            return None
+        
+        index, data = result
+        self.proxy_manager.set_proxy_by_url(proxies[index]) # type: ignore
+        print(f"成功使用代理: {proxies[index]}")
+        return data
+    
     def get_latest_release(self, repo_owner: str, repo_name: str) -> Optional[ReleaseInfo]:
         """
         获取最新release的完整信息
@@ -400,7 +727,8 @@ class GitHubReleaseFetcher:
         """解析GitHub API返回的release数据"""
         # 解析资源文件
         assets = []
-        proxys = deepcopy(self.proxy_manager)
+        # 所有release共用同一个代理管理器，下载结果会计入同一份评分
+        proxys = self.proxy_manager
         for asset in release_data.get('assets', []):
             true_download_url = asset['browser_download_url']
             true_download_url = [true_download_url[i:] for i in range(len(true_download_url))
@@ -414,7 +742,8 @@ class GitHubReleaseFetcher:
                 download_url=true_download_url,
                 content_type=asset.get('content_type', 'application/octet-stream'),
                 download_count=asset.get('download_count', 0),
-                proxys=proxys # type: ignore
+                proxys=proxys, # type: ignore
+                digest=asset.get('digest') or ''
             ))
         
         # 创建ReleaseInfo对象
@@ -0,0 +1,153 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# 所有会话共用同一个连接池：每个主机保持长连接，最多缓存 POOL_HOSTS 个主机的连接池
+POOL_HOSTS = 32
+POOL_MAXSIZE = 16
+# 同一个主机同时进行的请求数（流式请求只限制到收到响应头为止）
+HOST_CONCURRENCY = 16
+# 默认超时 (连接, 读取)，请求时传入 timeout 可以覆盖
+DEFAULT_TIMEOUT = (10, 30)
+# 连接失败和 429/5xx 时的重试，POST 等非幂等请求只在连接失败时重试
+RETRY_TOTAL = 2
+RETRY_BACKOFF = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_lock = threading.Lock()
+_adapters: Dict[bool, HTTPAdapter] = {}
+_session: Optional[requests.Session] = None
+_http2_clients: Dict[bool, Any] = {}
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+
+@contextmanager
+def _host_slot(url: str):
+    """占用一个主机的并发名额"""
+    host = urlsplit(url).netloc
+    with _lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(HOST_CONCURRENCY)
+    with slot:
+        yield
+
+
+def _get_adapter(retry: bool) -> HTTPAdapter:
+    """共用的连接池，retry 为 False 时不自动重试（由调用者自己换地址重试）"""
+    with _lock:
+        if retry not in _adapters:
+            max_retries = Retry(total=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF,
+                                status_forcelist=RETRY_STATUS, raise_on_status=False) if retry else 0
+            _adapters[retry] = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE,
+                                           max_retries=max_retries)
+        return _adapters[retry]
+
+
+class PooledSession(requests.Session):
+    """使用共用连接池的会话，提供默认超时和每个主机的并发限制"""
+
+    def __init__(self, retry: bool = True):
+        super().__init__()
+        adapter = _get_adapter(retry)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, *args, **kwargs): # type: ignore
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        with _host_slot(url):
+            return super().request(method, url, *args, **kwargs)
+
+    def close(self):
+        # 连接池由所有会话共用，关闭一个会话时不关闭连接池
+        pass
+
+
+def new_session(headers: Optional[Dict[str, str]] = None, retry: bool = True) -> PooledSession:
+    """
+    创建使用共用连接池的会话，适用于需要自己的请求头或 Cookie 的客户端
+
+    Args:
+        headers: 会话的默认请求头
+        retry: 是否在连接失败和 429/5xx 时自动重试，自己在多个地址之间重试的客户端应关闭
+    """
+    session = PooledSession(retry)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def get_session() -> PooledSession:
+    """获取共用的会话，代替直接调用 requests.get / requests.post"""
+    global _session
+    if _session is None:
+        session = new_session()
+        with _lock:
+            if _session is None:
+                _session = session
+    return _session # type: ignore
+
+
+def _httpx_timeout(timeout):
+    """把 requests 的 (连接, 读取) 超时转换为 httpx 的超时"""
+    if isinstance(timeout, tuple):
+        return httpx.Timeout(timeout[1], connect=timeout[0]) # type: ignore
+    return timeout
+
+
+def _get_http2_client(verify: bool):
+    """获取共用的 HTTP/2 客户端，没有安装 httpx 或 h2 时返回 None"""
+    if httpx is None:
+        return None
+    with _lock:
+        if verify not in _http2_clients:
+            try:
+                transport = httpx.HTTPTransport(http2=True, verify=verify, retries=RETRY_TOTAL,
+                                                limits=httpx.Limits(max_keepalive_connections=POOL_MAXSIZE))
+                _http2_clients[verify] = httpx.Client(transport=transport, timeout=_httpx_timeout(DEFAULT_TIMEOUT))
+            except ImportError:
+                # 没有安装 h2
+                _http2_clients[verify] = None
+        return _http2_clients[verify]
+
+
+def request(method: str, url: str, http2: bool = False, verify: bool = True, **kwargs):
+    """
+    发送请求，用于大量的简单请求（例如批量翻译）
+
+    Args:
+        method: 请求方法
+        url: 请求地址
+        http2: 安装了 httpx 和 h2 时使用 HTTP/2，同一个主机的请求共用一个连接
+        verify: 是否验证 HTTPS 证书
+        **kwargs: params、data、json、headers、timeout
+
+    Returns:
+        响应（requests.Response 或 httpx.Response，都支持 status_code、headers、json() 和 raise_for_status()）
+
+    Raises:
+        requests.exceptions.RequestException: 请求失败（HTTP/2 客户端的异常也转换为这个类型）
+    """
+    client = _get_http2_client(verify) if http2 else None
+    if client is None:
+        return get_session().request(method, url, verify=verify, **kwargs)
+
+    if 'timeout' in kwargs:
+        kwargs['timeout'] = _httpx_timeout(kwargs['timeout'])
+    with _host_slot(url):
+        try:
+            return client.request(method, url, **kwargs)
+        except httpx.TimeoutException as e: # type: ignore
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.HTTPError as e: # type: ignore
+            raise requests.exceptions.ConnectionError(str(e)) from e
@@ -0,0 +1,419 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .HttpClient import get_session
+
+PART_SUFFIX = '.part'
+META_SUFFIX = '.part.json'
+CHUNK_SIZE = 64 * 1024
+MIN_SEGMENT_SIZE = 1024 * 1024  # 每段至少 1MB
+META_SAVE_INTERVAL = 1.0
+REQUEST_TIMEOUT = (10, 30)
+# 计算摘要时为后面的数据段缓存的数据量，超出的部分在下载完成后从文件中读取
+HASH_BUFFER_SIZE = 64 * 1024 * 1024
+
+
+class SegmentError(Exception):
+    """分段下载失败"""
+
+
+def normalize_digest(digest: str) -> str:
+    """把 `sha256:<hex>` 或 `<HEX>` 格式的摘要统一为小写十六进制"""
+    digest = (digest or '').strip().lower()
+    return digest[len('sha256:'):] if digest.startswith('sha256:') else digest
+
+
+def hash_file(path: str, hasher=None, start: int = 0, end: Optional[int] = None):
+    """
+    计算文件 [start, end) 部分的 SHA-256
+
+    Args:
+        path: 文件路径
+        hasher: 已有的 hashlib 对象，为 None 时新建
+        start: 开始位置
+        end: 结束位置（不包含），为 None 时到文件末尾
+
+    Returns:
+        hashlib 对象
+    """
+    hasher = hasher or hashlib.sha256()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return hasher
+
+
+def check_digest(hasher, expected_sha256: str, path: str) -> bool:
+    """比较摘要，不一致时删除文件"""
+    actual = hasher.hexdigest()
+    if actual == normalize_digest(expected_sha256):
+        print(f"SHA-256 校验通过: {actual}")
+        return True
+    print(f"SHA-256 校验失败，文件已删除: {actual} != {normalize_digest(expected_sha256)}")
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    return False
+
+
+class _SegmentState:
+    """分段下载的共享状态：各段进度、总进度、取消标记和文件摘要"""
+
+    def __init__(self, meta: Dict[str, Any], meta_path: str,
+                 progress_callback: Optional[Callable[[int, int], None]], hasher=None):
+        self.meta = meta
+        self.meta_path = meta_path
+        self.progress_callback = progress_callback
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.last_save = 0.0
+        # 各段的数据不是按顺序到达的：紧接在已计算位置之后的数据直接计算摘要，
+        # 后面的数据段按顺序缓存在内存中，前一段计算完成后接着计算；
+        # 超出缓存大小或续传前已下载的部分在下载完成后从文件中补算
+        self.hasher = hasher
+        self.hashed_upto = 0
+        # {段序号: [开始位置, 结束位置, 数据块列表]}
+        self.hash_buffers: Dict[int, List[Any]] = {}
+        self.buffered_bytes = 0
+        # 有数据没有缓存的段，这些段之后的数据不再缓存
+        self.spilled = set()
+
+    @property
+    def downloaded(self) -> int:
+        return sum(pos - start for start, end, pos in self.meta['segments'])
+
+    def advance(self, index: int, chunk: bytes):
+        """写入一块数据后更新某一段的进度"""
+        with self.lock:
+            if self.hasher:
+                self._hash_chunk(index, self.meta['segments'][index][2], chunk)
+            self.meta['segments'][index][2] += len(chunk)
+            if time.time() - self.last_save > META_SAVE_INTERVAL:
+                self.save()
+            # 在锁内回调，保证回调不会被多个线程同时调用
+            if self.progress_callback:
+                self.progress_callback(self.downloaded, self.meta['size'])
+
+    def _hash_chunk(self, index: int, offset: int, chunk: bytes):
+        """按文件顺序计算摘要，不能马上计算的数据先缓存"""
+        if offset == self.hashed_upto:
+            self.hasher.update(chunk) # type: ignore
+            self.hashed_upto += len(chunk)
+            self._drain()
+            return
+        if index in self.spilled:
+            return
+        buffer = self.hash_buffers.get(index)
+        # 续传的段前面的数据已经在文件中，只缓存从段开始位置连续到达的数据
+        expected = buffer[1] if buffer else self.meta['segments'][index][0]
+        if offset != expected or self.buffered_bytes + len(chunk) > HASH_BUFFER_SIZE:
+            self.spilled.add(index)
+            return
+        if buffer is None:
+            buffer = self.hash_buffers[index] = [offset, offset, []]
+        buffer[2].append(chunk)
+        buffer[1] += len(chunk)
+        self.buffered_bytes += len(chunk)
+
+    def _drain(self):
+        """计算紧接在已计算位置之后的缓存数据"""
+        while True:
+            for index, buffer in self.hash_buffers.items():
+                if buffer[0] == self.hashed_upto:
+                    break
+            else:
+                return
+            del self.hash_buffers[index]
+            for chunk in buffer[2]:
+                self.hasher.update(chunk) # type: ignore
+            self.hashed_upto = buffer[1]
+            self.buffered_bytes -= buffer[1] - buffer[0]
+
+    def finish_hash(self, part_path: str) -> int:
+        """
+        下载完成后计算剩余部分的摘要，没有缓存的数据从文件中读取
+
+        Returns:
+            int: 从文件中读取的字节数
+        """
+        reread = 0
+        for start, end, chunks in sorted(self.hash_buffers.values(), key=lambda buffer: buffer[0]):
+            if start > self.hashed_upto:
+                hash_file(part_path, self.hasher, self.hashed_upto, start)
+                reread += start - self.hashed_upto
+            for chunk in chunks:
+                self.hasher.update(chunk) # type: ignore
+            self.hashed_upto = end
+        if self.hashed_upto < self.meta['size']:
+            hash_file(part_path, self.hasher, self.hashed_upto)
+            reread += self.meta['size'] - self.hashed_upto
+        self.hash_buffers.clear()
+        self.buffered_bytes = 0
+        return reread
+
+    def save(self):
+        """保存各段进度，用于下次续传"""
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        self.last_save = time.time()
+
+
+def probe(url: str, session=None, verify: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    检查服务器是否支持 Range 请求
+
+    Returns:
+        dict: {'url', 'size', 'etag', 'last_modified'}，不支持 Range 或大小未知时返回 None
+    """
+    session = session or get_session()
+    try:
+        with session.get(url, headers={'Range': 'bytes=0-0'}, stream=True,
+                         verify=verify, timeout=REQUEST_TIMEOUT) as response:
+            content_range = response.headers.get('Content-Range', '')
+            if response.status_code != 206 or '/' not in content_range:
+                return None
+            total = content_range.rsplit('/', 1)[1]
+            if not total.isdigit():
+                return None
+            return {
+                'url': response.url,
+                'size': int(total),
+                'etag': response.headers.get('ETag', ''),
+                'last_modified': response.headers.get('Last-Modified', ''),
+            }
+    except Exception as e:
+        print(f"检查下载地址失败 {url}: {e}")
+        return None
+
+
+def split_segments(size: int, connections: int) -> List[List[int]]:
+    """把文件分成若干段，每段为 [开始位置, 结束位置(包含), 当前位置]"""
+    count = max(1, min(connections, size // MIN_SEGMENT_SIZE))
+    segment_size = size // count
+    segments = []
+    for i in range(count):
+        start = i * segment_size
+        end = size - 1 if i == count - 1 else start + segment_size - 1
+        segments.append([start, end, start])
+    return segments
+
+
+def _load_meta(meta_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _fetch_segment(state: _SegmentState, index: int, urls: List[str], session, verify: bool,
+                   should_continue: Optional[Callable[[], bool]], max_retries: int,
+                   report: Optional[Callable[[str, bool, int, float], None]] = None):
+    """下载一段数据，失败时换下一个地址重试，并从这一段已下载的位置继续"""
+    meta = state.meta
+    segment = meta['segments'][index]
+    attempt = 0
+
+    while segment[2] <= segment[1]:
+        url = urls[(index + attempt) % len(urls)]
+        position = segment[2]
+        headers = {'Range': f'bytes={segment[2]}-{segment[1]}'}
+        if url == meta['url'] and (meta.get('etag') or meta.get('last_modified')):
+            headers['If-Range'] = meta.get('etag') or meta.get('last_modified')
+
+        start_time = time.time()
+        try:
+            with session.get(url, headers=headers, stream=True, verify=verify,
+                             timeout=REQUEST_TIMEOUT) as response:
+                content_range = response.headers.get('Content-Range', '')
+                if response.status_code != 206 or not content_range.endswith(f"/{meta['size']}"):
+                    raise SegmentError(f"服务器没有返回请求的数据段 (状态码 {response.status_code})")
+
+                with open(meta['part_path'], 'r+b') as f:
+                    f.seek(segment[2])
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if state.cancelled.is_set() or (should_continue and not should_continue()):
+                            state.cancelled.set()
+                            return
+                        if chunk:
+                            # 服务器返回的数据比请求的多时只写入这一段
+                            chunk = chunk[:segment[1] + 1 - segment[2]]
+                            f.write(chunk)
+                            state.advance(index, chunk)
+                            if segment[2] > segment[1]:
+                                break
+            if segment[2] <= segment[1] and segment[2] == position:
+                raise SegmentError("连接没有返回任何数据")
+            if report:
+                report(url, True, segment[2] - position, time.time() - start_time)
+        except Exception as e:
+            if report:
+                report(url, False, segment[2] - position, time.time() - start_time)
+            attempt += 1
+            if attempt > max_retries:
+                raise SegmentError(f"第 {index + 1} 段下载失败: {e}")
+            print(f"第 {index + 1} 段下载中断，换一个地址重试 ({attempt}/{max_retries}): {e}")
+            time.sleep(attempt)
+
+
+def download_segmented(urls: List[str], local_filename: str, connections: int = 4,
+                       progress_callback: Optional[Callable[[int, int], None]] = None,
+                       should_continue: Optional[Callable[[], bool]] = None,
+                       session=None, verify: bool = True, expected_size: int = 0,
+                       max_retries: int = 5,
+                       report: Optional[Callable[[str, bool, int, float], None]] = None,
+                       expected_sha256: str = '') -> Optional[bool]:
+    """
+    多连接分段下载
+
+    把文件按字节范围分成若干段同时下载，写入预先分配好大小的 `.part` 文件，
+    各段的进度保存在 `.part.json` 中，中断后可以继续下载。
+    有多个下载地址（例如不同的代理）时，各段会分散到不同的地址上。
+
+    Args:
+        urls: 同一个文件的下载地址列表
+        local_filename: 保存路径
+        connections: 同时下载的连接数
+        progress_callback: 进度回调 progress_callback(已下载字节数, 总字节数)
+        should_continue: 返回 False 时取消下载，已下载的部分会保留
+        session: 使用的 requests.Session，为 None 时使用共用的会话
+        verify: 是否验证 HTTPS 证书
+        expected_size: 预期的文件大小，不为 0 时检查服务器返回的大小
+        max_retries: 每一段的最大重试次数
+        report: 每次连接结束后回调 report(地址, 是否成功, 下载字节数, 用时秒数)，用于统计各地址的速度
+        expected_sha256: 预期的 SHA-256，不为空时校验，不一致时删除下载的文件
+
+    Returns:
+        True: 下载成功
+        False: 下载失败或被取消
+        None: 服务器不支持 Range 请求或无法获取文件大小，需要使用普通方式下载
+    """
+    session = session or get_session()
+    part_path = local_filename + PART_SUFFIX
+    meta_path = local_filename + META_SUFFIX
+    os.makedirs(os.path.dirname(local_filename) or '.', exist_ok=True)
+
+    info = None
+    for url in urls:
+        info = probe(url, session, verify)
+        if info:
+            urls = [url] + [other for other in urls if other != url]
+            break
+    if not info:
+        return None
+    if expected_size and info['size'] != expected_size:
+        print(f"文件大小与预期不符: {info['size']}/{expected_size} bytes")
+        return None
+
+    # 同一个文件未完成的分段下载可以继续
+    meta = _load_meta(meta_path)
+    if not (meta and meta.get('segments') and meta.get('size') == info['size']
+            and meta.get('etag') == info['etag'] and meta.get('last_modified') == info['last_modified']
+            and os.path.exists(part_path) and os.path.getsize(part_path) == info['size']):
+        meta = dict(info, segments=split_segments(info['size'], connections))
+        with open(part_path, 'wb') as f:
+            f.truncate(info['size'])
+    meta['part_path'] = part_path
+    # 续传时以本次检查的地址为准
+    meta['url'] = info['url'] if info['url'] in urls else urls[0]
+
+    state = _SegmentState(meta, meta_path, progress_callback,
+                          hashlib.sha256() if expected_sha256 else None)
+    state.save()
+
+    pending = [index for index, (start, end, pos) in enumerate(meta['segments']) if pos <= end]
+    if pending:
+        print(f"使用 {len(pending)} 个连接分段下载 ({info['size'] / 1024 / 1024:.1f}MB)")
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+        futures = [executor.submit(_fetch_segment, state, index, urls, session, verify,
+                                   should_continue, max_retries, report) for index in pending]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+                state.cancelled.set()
+
+    with state.lock:
+        state.save()
+
+    if errors:
+        print(f"分段下载失败: {errors[0]}")
+        return False
+    if state.cancelled.is_set():
+        print("下载已取消，已下载的部分会在下次继续")
+        return False
+
+    if any(pos <= end for start, end, pos in meta['segments']) or os.path.getsize(part_path) != info['size']:
+        print("分段下载不完整")
+        return False
+
+    if state.hasher:
+        reread = state.finish_hash(part_path)
+        if reread:
+            print(f"从文件补算摘要: {reread / 1024 / 1024:.1f}MB")
+        if not check_digest(state.hasher, expected_sha256, part_path):
+            os.remove(meta_path)
+            return False
+
+    os.replace(part_path, local_filename)
+    try:
+        os.remove(meta_path)
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def download_single(url: str, local_filename: str,
+                    progress_callback: Optional[Callable[[int, int], None]] = None,
+                    session=None, verify: bool = True,
+                    report: Optional[Callable[[str, bool, int, float], None]] = None,
+                    expected_sha256: str = '') -> bool:
+    """单连接下载，用于不支持 Range 请求的服务器，expected_sha256 不为空时边下载边计算摘要并校验"""
+    session = session or get_session()
+    start_time = time.time()
+    downloaded = 0
+    hasher = hashlib.sha256() if expected_sha256 else None
+    try:
+        with session.get(url, stream=True, verify=verify, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            total = int(response.headers.get('Content-Length', 0) or 0)
+            downloaded = 0
+            with open(local_filename + PART_SUFFIX, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                        if hasher:
+                            hasher.update(chunk)
+                        if progress_callback:
+                            progress_callback(downloaded, total)
+        if hasher and not check_digest(hasher, expected_sha256, local_filename + PART_SUFFIX):
+            # 数据有误的地址按失败记录
+            if report:
+                report(url, False, 0, time.time() - start_time)
+            return False
+        os.replace(local_filename + PART_SUFFIX, local_filename)
+        if report:
+            report(url, True, downloaded, time.time() - start_time)
+        return True
+    except Exception as e:
+        print(f"下载失败 {url}: {e}")
+        if report:
+            report(url, False, downloaded, time.time() - start_time)
+        return False
@@ -1,5 +1,5 @@
-import requests
 import json
+from .HttpClient import get_session
 
 WEBNOTE_HEADERS={
     'User-Agent':'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36 Edg/140.0.0.0',
@@ -43,7 +43,7 @@ class Note():
             self._fetch_note_info_write()
     
     def _fetch_note_info_write(self):
-        fetch_request = requests.post(f'{API_URL}/info',
+        fetch_request = get_session().post(f'{API_URL}/info',
                                      headers=WEBNOTE_HEADERS, data={'note_name': self.note_name, "note_pwd": self.pwd})
         fetch_request.raise_for_status()
         note_info = fetch_request.json()
@@ -65,7 +65,7 @@ class Note():
         return note_data
 
     def _fetch_note_info_ReadOnly(self):
-        fetch_request = requests.post(f'{API_URL}/info',
+        fetch_request = get_session().post(f'{API_URL}/info',
                                      headers=WEBNOTE_HEADERS, data={'note_id': self.note_name, "note_pwd": self.pwd})
         fetch_request.raise_for_status()
         note_info = fetch_request.json()
@@ -84,7 +84,7 @@ class Note():
         return note_data
     def update_note_content(self, new_content):
         print("更新笔记内容...")
-        update_request = requests.post(f'{API_URL}/save',
+        update_request = get_session().post(f'{API_URL}/save',
                                        headers=WEBNOTE_HEADERS,
                                        data={
                                            'note_name': self.note_name,
@@ -4,6 +4,8 @@
 from .FileTransfer import UpFileClient
 from .GithubDownload import GitHubReleaseFetcher, init_request, GithubRequester, ReleaseInfo, ReleaseAsset
 from .Webnote import Note
+from .SegmentedDownload import download_segmented
+from .HttpClient import get_session, new_session
 
 __all__ = [
     "UpFileClient",
@@ -12,5 +14,8 @@ __all__ = [
     "GithubRequester",
     "ReleaseInfo",
     "ReleaseAsset",
-    "Note"
+    "Note",
+    "download_segmented",
+    "get_session",
+    "new_session"
 ]
\ No newline at end of file